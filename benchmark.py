@@ -0,0 +1,224 @@
+#!/usr/bin/env python3
+"""
+Headless performance benchmarks
+Times UI.draw at the common display sizes in every timer state, plus the
+per-frame updates of TimerState, AudioSystem and GPIOControl, and compares
+results against a stored baseline
+
+Usage:
+    python benchmark.py run -o results.json        # full run
+    python benchmark.py run --quick -o quick.json  # fewer rounds, for a fast check
+    python benchmark.py compare baseline.json results.json --threshold 0.15
+"""
+
+import argparse
+import json
+import os
+import platform
+import statistics
+import subprocess
+import sys
+import time
+
+# Headless drivers, must be set before pygame initialises
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import pygame
+import config
+from src.game_state import TimerState
+
+BENCH_RESOLUTIONS = [(800, 480), (1280, 800), (1920, 1080), (3840, 2160)]
+STATES = ('idle', 'running', 'warning', 'critical', 'balls_rolling')
+
+
+def make_timer_state(name):
+    """A TimerState frozen in one of the benchmark states"""
+    timer_state = TimerState()
+    if name == 'idle':
+        return timer_state
+    timer_state.start_frame()
+    timer_state.last_update = None  # Frozen - draw() does not advance the timers
+    timer_state.frame_time_remaining = 7 * 60 + 42.5
+    timer_state.shot_time_remaining = {
+        'running': 12.5,
+        'warning': config.SHOT_WARNING_TIME - 0.5,
+        'critical': config.SHOT_CRITICAL_TIME - 0.5,
+        'balls_rolling': 15.0,
+    }[name]
+    timer_state.balls_rolling = name == 'balls_rolling'
+    return timer_state
+
+
+def measure(func, rounds, number, warmup=3):
+    """Call `func` `number` times per round and return per-call statistics in microseconds"""
+    for _ in range(warmup):
+        func()
+    per_call = []
+    for _ in range(rounds):
+        started = time.perf_counter()
+        for _ in range(number):
+            func()
+        per_call.append((time.perf_counter() - started) / number * 1e6)
+    per_call.sort()
+    return {
+        'median_us': round(statistics.median(per_call), 3),
+        'min_us': round(per_call[0], 3),
+        'max_us': round(per_call[-1], 3),
+        'rounds': rounds,
+        'number': number,
+    }
+
+
+def bench_ui(results, rounds, number):
+    from src.ui import UI
+    for width, height in BENCH_RESOLUTIONS:
+        screen = pygame.display.set_mode((width, height))
+        ui = UI(screen)
+        for state in STATES:
+            timer_state = make_timer_state(state)
+            name = f"ui.draw/{width}x{height}/{state}"
+            results[name] = measure(lambda: ui.draw(timer_state, flip=False), rounds, number)
+            print(f"{name:<36} {results[name]['median_us']:10.1f} us")
+
+
+def bench_timer(results, rounds, number):
+    timer_state = TimerState()
+    timer_state.start_frame()
+    results['timer_state.update/running'] = measure(timer_state.update, rounds, number * 100)
+    idle = TimerState()
+    results['timer_state.update/idle'] = measure(idle.update, rounds, number * 100)
+
+
+def bench_audio(results, rounds, number):
+    from src.audio import AudioSystem
+    audio = AudioSystem()
+    if not audio.ready:
+        print("audio: sound disabled or mixer unavailable - skipped")
+        return
+    for state in ('idle', 'running', 'critical'):
+        timer_state = make_timer_state(state)
+        audio.update(timer_state)  # Play the cues for this state once, then measure the steady state
+        results[f"audio.update/{state}"] = measure(lambda: audio.update(timer_state), rounds, number * 100)
+
+
+def bench_gpio(results, rounds, number):
+    try:
+        from gpiozero import Device
+        from gpiozero.pins.mock import MockFactory
+    except ImportError:
+        print("gpio: gpiozero not installed - skipped")
+        return
+    from src.commands import CommandQueue
+    from src.gpio_control import GPIOControl
+    Device.pin_factory = MockFactory()
+    use_gpio = config.USE_GPIO
+    config.USE_GPIO = True
+    try:
+        gpio = GPIOControl(CommandQueue())
+        for state in ('idle', 'running', 'critical'):
+            timer_state = make_timer_state(state)
+            results[f"gpio.update/{state}"] = measure(lambda: gpio.update(timer_state), rounds, number * 10)
+        gpio.cleanup()
+    finally:
+        config.USE_GPIO = use_gpio
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True,
+                              cwd=os.path.dirname(os.path.abspath(__file__))).stdout.strip() or None
+    except OSError:
+        return None
+
+
+def run(args):
+    rounds, number = (5, 10) if args.quick else (args.rounds, args.number)
+    pygame.display.init()
+    results = {}
+    bench_ui(results, rounds, number)
+    bench_timer(results, rounds, number)
+    bench_audio(results, rounds, number)
+    bench_gpio(results, rounds, number)
+    pygame.quit()
+
+    for name in sorted(results):
+        if not name.startswith('ui.draw'):
+            print(f"{name:<36} {results[name]['median_us']:10.3f} us")
+
+    report = {
+        'meta': {
+            'timestamp': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            'revision': git_revision(),
+            'python': platform.python_version(),
+            'pygame': pygame.version.ver,
+            'sdl': '.'.join(map(str, pygame.get_sdl_version())),
+            'machine': platform.machine(),
+            'platform': platform.platform(),
+            'video_driver': os.environ.get('SDL_VIDEODRIVER'),
+        },
+        'results': results,
+    }
+    with open(args.output, 'w') as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+    print(f"Results written to {args.output}")
+    return True
+
+
+def compare(args):
+    with open(args.baseline) as f:
+        baseline = json.load(f)
+    with open(args.current) as f:
+        current = json.load(f)
+    if baseline['meta'].get('machine') != current['meta'].get('machine'):
+        print(f"Warning: comparing {baseline['meta'].get('machine')} against {current['meta'].get('machine')}")
+
+    regressions = []
+    print(f"{'benchmark':<36} {'baseline':>10} {'current':>10} {'change':>8}")
+    for name in sorted(set(baseline['results']) | set(current['results'])):
+        old = baseline['results'].get(name)
+        new = current['results'].get(name)
+        if not old or not new:
+            print(f"{name:<36} {'only in ' + ('current' if new else 'baseline'):>30}")
+            continue
+        change = new['median_us'] / old['median_us'] - 1 if old['median_us'] else 0.0
+        min_change = new['min_us'] / old['min_us'] - 1 if old['min_us'] else 0.0
+        flag = ''
+        # Noise moves the median now and then - a real slowdown also moves the best round
+        if change > args.threshold and min_change > args.threshold:
+            flag = '  REGRESSION'
+            regressions.append(name)
+        elif change < -args.threshold:
+            flag = '  faster'
+        print(f"{name:<36} {old['median_us']:10.2f} {new['median_us']:10.2f} {change:+8.1%}{flag}")
+
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) above {args.threshold:.0%}")
+        return False
+    print(f"\nNo regressions above {args.threshold:.0%}")
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless shot clock benchmarks")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    run_parser = commands.add_parser('run', help="run all benchmarks and save JSON results")
+    run_parser.add_argument('-o', '--output', default='benchmark.json')
+    run_parser.add_argument('--rounds', type=int, default=15, help="timed rounds per benchmark (median is reported)")
+    run_parser.add_argument('--number', type=int, default=30, help="calls per round for UI.draw")
+    run_parser.add_argument('--quick', action='store_true', help="5 rounds of 10 calls")
+
+    compare_parser = commands.add_parser('compare', help="flag regressions against a baseline")
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+    compare_parser.add_argument('--threshold', type=float, default=0.15,
+                                help="relative slowdown of median and best round that counts as a regression")
+
+    args = parser.parse_args()
+    ok = run(args) if args.command == 'run' else compare(args)
+    return 0 if ok else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -22,6 +22,10 @@ FRAME_DURATION = 10 * 60  # 10 Minuten
 FIRST_HALF_DURATION = 5 * 60  # Erste 5 Minuten
 SHOT_TIME_FIRST_HALF = 15  # 15 Sekunden in erster Hälfte
 SHOT_TIME_SECOND_HALF = 10  # 10 Sekunden in zweiter Hälfte
+# Phase schedule instead of the two halves above (see docs/PHASES.md), None = two halves
+# e.g. [(600, 15, 'assets/sounds/15_seconds.wav'), (300, 10, 'assets/sounds/10_seconds.wav'), (60, 5, None)]
+PHASES = None
+UNDO_DEPTH = 32  # Commands that can be undone (U, Shift+U = redo), read at startup
 
 # Warning thresholds
 SHOT_WARNING_TIME = 5  # Warnung bei 5 Sekunden
@@ -39,6 +43,7 @@ BUTTON_RESET_PIN = 6
 
 # UI settings
 SHOW_LED_INDICATORS = True  # Show LED circles in UI for testing
+SHOW_SHOT_PROGRESS = True  # Shrinking bar under the shot timer (pre-rendered, one blit per frame)
 
 # Audio settings
 SOUND_ENABLED = True  # Sound effects enabled
@@ -46,3 +51,112 @@ SOUND_VOLUME = 0.7   # Volume level (0.0 - 1.0)
 TTS_ENABLED = True   # Text-to-Speech (uses macOS voices on Mac)
 TTS_VOICE = 'en-gb+f3'  # espeak voice (not used on macOS)
 TTS_SPEED = 175      # Speech rate in WPM (not used on macOS)
+
+# Voice announcements (WAV files)
+ANNOUNCEMENT_15_SECONDS = 'assets/sounds/15_seconds.wav'  # "15 seconds shot clock now in operation"
+ANNOUNCEMENT_10_SECONDS = 'assets/sounds/10_seconds.wav'  # "10 seconds shot clock now in operation"
+
+# Remote control (HTTP/WebSocket API for phones and tablets)
+REMOTE_ENABLED = False  # Start the embedded control server
+REMOTE_HOST = '0.0.0.0'  # Listen on all interfaces (LAN)
+REMOTE_PORT = 8080       # Open http://<pi-address>:8080/ on the phone
+
+# Spectator stream (ws://<pi-address>:8080/stream, page at /spectator)
+SPECTATOR_MAX_QUEUE = 32          # Pending updates per viewer before it gets resynced
+SPECTATOR_EVICT_TIMEOUT = 5.0     # Seconds a viewer may stall before it is disconnected
+SPECTATOR_WRITE_BUFFER = 16 * 1024  # Bytes buffered per viewer before waiting on it
+
+# Shared-memory frame output for streaming/overlays (see docs/FRAME_OUTPUT.md)
+FRAME_OUTPUT_ENABLED = False       # Publish rendered frames to shared memory
+FRAME_OUTPUT_PATH = None           # None = /dev/shm/snooker-shotclock-frame
+FRAME_OUTPUT_TRANSPARENT = False   # Also write <path>-alpha with transparent background
+
+# Shared-memory state feed for external drivers (7-segment display, lighting)
+STATE_FEED_ENABLED = False  # Mirror the timer state to shared memory every frame
+STATE_FEED_PATH = None      # None = /dev/shm/snooker-shotclock-state
+
+# Asset cache (prescaled images in display format, see prewarm_assets.py)
+ASSET_CACHE_DIR = None  # None = ~/.cache/snooker-shotclock
+
+# Hot config reload (see docs/CONFIG_RELOAD.md)
+CONFIG_OVERRIDE_PATH = 'config.local.toml'  # Overrides watched while running (.toml or .json), None = off
+CONFIG_WATCH_INTERVAL = 1.0                 # Seconds between checks for a changed file
+
+# Performance HUD (F3) and CSV recording (F4)
+PERF_HUD_ENABLED = False  # Show the HUD from startup
+PERF_WINDOW = 600         # Frames in the rolling percentile window (10s at 60 FPS)
+PERF_CSV_DIR = None       # None = current directory, files are perf-<date>-<time>.csv
+PERF_THERMAL_PATH = '/sys/class/thermal/thermal_zone0/temp'  # CPU temperature (millidegrees)
+
+# Prometheus metrics (see docs/METRICS.md)
+METRICS_PORT = None               # e.g. 9101 for http://<pi-address>:9101/metrics, None = off
+METRICS_TEXTFILE_PATH = None      # e.g. '/var/lib/node_exporter/textfile/shotclock.prom'
+METRICS_TEXTFILE_INTERVAL = 15.0  # Seconds between textfile updates
+
+# Main loop watchdog
+WATCHDOG_ENABLED = True      # Detect a hanging main loop and dump all thread stacks
+WATCHDOG_STALL_SECONDS = 2.0 # No loop iteration for this long counts as a stall
+WATCHDOG_RESTART = False     # Exit with code 1 on a stall, for Restart=on-failure (the clock state is lost)
+WATCHDOG_SYSTEMD = False     # Send READY/WATCHDOG=1 to systemd (Type=notify, WatchdogSec=...)
+
+# Logging (written by a background thread, see docs/LOGGING.md)
+LOG_FILE = 'logs/shotclock.log'  # Relative to the project directory, None = no log file
+LOG_MAX_BYTES = 1024 * 1024      # Rotate after 1 MB
+LOG_BACKUP_COUNT = 5             # Keep shotclock.log.1 ... .5
+LOG_LEVEL = 'INFO'
+LOG_FORMAT = 'logfmt'            # 'logfmt' (key=value) or 'json' (one object per line)
+LOG_CONSOLE = True               # Also log to the terminal
+LOG_RATE_LIMIT_SECONDS = 60.0    # Same warning/error at most once per window, then "repeated N times"
+
+# Match history (frames and shots in SQLite, see docs/MATCH_HISTORY.md)
+HISTORY_ENABLED = False                # Record every frame and shot
+HISTORY_DB_PATH = 'data/history.db'    # Relative to the project directory
+HISTORY_TABLE_ID = None                # Table name in the records, None = hostname
+HISTORY_SEASON = None                  # e.g. '2026/27', None = July to June of the frame date
+HISTORY_NIGHT_ROLLOVER_HOUR = 6        # Frames before 6:00 count to the night before
+HISTORY_FLUSH_SECONDS = 5.0            # Max. seconds rows wait before they are written
+
+# Second clock at the same table (see docs/DISPLAY_SYNC.md)
+SYNC_ROLE = None                 # 'leader' = multicast the timer state, followers run follower.py
+SYNC_GROUP = '239.255.42.99'     # Multicast group (administratively scoped, stays in the LAN)
+SYNC_PORT = 5199
+SYNC_RATE = 20                   # State packets per second (plus one on every start/reset/pause)
+SYNC_INTERFACE = None            # IP of the interface to use, None = default route
+SYNC_TIMEOUT = 2.0               # Follower freezes the display after this long without packets
+
+# Timing, audio and GPIO in a separate process from rendering (see docs/PROCESS_ISOLATION.md)
+PROCESS_ISOLATION = False        # A stalled draw/flip can then never delay the clock or a zonk
+TIMING_RATE = 200                # Timing process updates per second
+TIMING_CPU = None                # Pin the timing process to this core, e.g. 3 (None = any)
+RENDER_CPU = None                # Pin the render process to this core, e.g. 2 (None = any)
+TIMING_PRIORITY = None           # SCHED_FIFO priority 1-99 for the timing process (needs CAP_SYS_NICE)
+
+# Game controllers (see docs/CONTROLLERS.md)
+CONTROLLER_ENABLED = True        # Mapped pads on their own polling thread (False = raw button indices in the main loop)
+CONTROLLER_POLL_RATE = 250       # Button polls per second while a pad is connected
+CONTROLLER_MAPPINGS_FILE = None  # Extra SDL mappings (gamecontrollerdb.txt) for pads SDL does not know
+CONTROLLER_BUTTONS = {           # Button (by position, same on every pad) -> command
+    'a': 'start',
+    'b': 'reset-shot',
+    'x': 'pause',
+    'y': 'reset-frame',
+    'leftshoulder': 'undo',
+    'rightshoulder': 'redo',
+}
+
+# Render governor: lower visual quality on a hot or busy Pi, never the timer rate (see docs/RENDER_GOVERNOR.md)
+GOVERNOR_ENABLED = True
+GOVERNOR_THROTTLE_PATH = '/sys/devices/platform/soc/soc:firmware/get_throttled'  # Pi firmware flags (hex), None = off
+GOVERNOR_TEMP_HIGH = 75.0        # Step down at or above this CPU temperature (PERF_THERMAL_PATH)
+GOVERNOR_TEMP_LOW = 65.0         # Recover only at or below (hysteresis)
+GOVERNOR_LATE_RATIO = 0.05       # Step down when more than 5% of the loop iterations overrun the frame budget
+GOVERNOR_REDUCED_FPS = 20        # Redraw rate on the 'reduced' level (changed digits are still drawn at once)
+GOVERNOR_INTERVAL = 2.0          # Seconds between two checks
+GOVERNOR_STEP_SECONDS = 10.0     # Min. seconds between two steps down (temperature reacts slowly)
+GOVERNOR_RECOVER_SECONDS = 30.0  # Cool and fast for this long before one level comes back
+
+# Main loop: 'asyncio' runs when an input, command or timer deadline wakes it and
+# draws only changes, 'sync' polls everything FPS times a second (see docs/MAIN_LOOP.md)
+MAIN_LOOP = 'asyncio'
+ASYNC_EVENT_INTERVAL = 0.005  # Seconds between two looks at the pygame event queue (SDL has no fd to wait on)
+ASYNC_IDLE_INTERVAL = 0.25    # Longest sleep without any wake-up (config reloads, startup, watchdog)
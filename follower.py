@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Follower display for a second clock at the same table
+Render-only: shows the timer state the leader (SYNC_ROLE = 'leader')
+multicasts on the LAN, interpolated to the leader's clock
+
+Usage:
+    python follower.py
+"""
+
+import logging
+import sys
+
+import pygame
+import config
+from main import create_display
+from src import logs
+from src.config_reload import ConfigReloader
+from src.display_sync import SyncFollower
+from src.game_state import TimerState
+from src.ui import UI
+
+logger = logging.getLogger('follower')
+
+
+def main():
+    logs.setup_logging()
+    ConfigReloader().load_now()
+
+    pygame.display.init()
+    screen = create_display()
+    pygame.display.set_caption("Snooker Shot Clock (follower)")
+    ui = UI(screen)
+    timer_state = TimerState()
+
+    follower = SyncFollower()
+    try:
+        follower.start()
+    except OSError as e:
+        logger.error("Failed to join %s:%d: %s", config.SYNC_GROUP, config.SYNC_PORT, e)
+        pygame.quit()
+        logs.shutdown()
+        return 1
+
+    clock = pygame.time.Clock()
+    running = True
+    try:
+        while running:
+            for event in pygame.event.get():
+                if event.type == pygame.QUIT:
+                    running = False
+                elif event.type == pygame.KEYDOWN and event.key in (pygame.K_ESCAPE, pygame.K_q):
+                    running = False
+            follower.apply(timer_state)
+            ui.draw(timer_state)
+            clock.tick(config.FPS)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        follower.stop()
+        pygame.quit()
+        logger.info("Follower stopped")
+        logs.shutdown()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
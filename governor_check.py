@@ -0,0 +1,148 @@
+#!/usr/bin/env python3
+"""
+Render governor check
+First plays a hot evening against fake thermal and throttle files on a
+virtual clock: heating up, throttling, slow frames and cooling down must
+step the quality levels down and back up in the documented order, with
+hysteresis (no recovery between the two temperature thresholds, one level
+per recover period). Then runs the real draw loop for a few seconds on every
+level and shows how many frames are drawn and how much CPU it costs, while
+the loop - and with it the timers and audio - keeps its full rate.
+
+Usage:
+    python governor_check.py                 # scenario + 3 s per level
+    python governor_check.py --seconds 10
+"""
+
+import argparse
+import os
+import sys
+import tempfile
+import time
+
+# Headless drivers, must be set before pygame initialises
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+import pygame
+import config
+from src import logs
+from src.game_state import TimerState, VirtualClock
+from src.governor import LEVELS, RenderGovernor
+
+
+class FakeSystem:
+    """Thermal zone and get_throttled files the governor reads instead of /sys"""
+
+    def __init__(self, directory):
+        self.thermal = os.path.join(directory, 'temp')
+        self.throttle = os.path.join(directory, 'get_throttled')
+        self.set(50.0, 0)
+
+    def set(self, temp, flags):
+        with open(self.thermal, 'w') as f:
+            f.write(f"{int(temp * 1000)}\n")
+        with open(self.throttle, 'w') as f:
+            f.write(f"0x{flags:x}\n")
+
+
+# (seconds, temperature, throttle flags, fraction of slow frames, expected level at the end)
+SCENARIO = (
+    (60, 55.0, 0x0, 0.0, 'full'),        # Cool evening
+    (8, 78.0, 0x0, 0.0, 'reduced'),      # Hot: first step at once ...
+    (12, 78.0, 0x0, 0.0, 'static'),      # ... the next only after GOVERNOR_STEP_SECONDS
+    (60, 70.0, 0x0, 0.0, 'static'),      # Between the thresholds: level is kept
+    (45, 60.0, 0x0, 0.0, 'reduced'),     # Cool: one level per recover period
+    (35, 60.0, 0x0, 0.0, 'full'),
+    (4, 60.0, 0x4, 0.0, 'reduced'),      # Firmware throttling while the sensor looks fine
+    (40, 60.0, 0x0, 0.0, 'full'),
+    (4, 60.0, 0x0, 0.5, 'reduced'),      # Half the frames over budget
+    (15, 60.0, 0x0, 0.5, 'static'),
+    (15, 60.0, 0x0, 0.5, 'minimal'),
+    (15, 60.0, 0x0, 0.5, 'minimal'),     # Nothing below minimal
+)
+
+
+def run_scenario(fake):
+    """Feed the scenario to a governor; returns the failed steps"""
+    clock = VirtualClock(0.0)
+    governor = RenderGovernor(fps=config.FPS, clock=clock)
+    budget = 1.0 / config.FPS
+    failures = []
+    print(f"{'time':>6} {'temp':>6} {'flags':>6} {'slow':>5}  {'level':<8} expected")
+    for seconds, temp, flags, slow, expected in SCENARIO:
+        fake.set(temp, flags)
+        frames = int(seconds * config.FPS)
+        slow_every = int(1 / slow) if slow else 0
+        for i in range(frames):
+            clock.advance(budget)
+            work = budget * 2 if slow_every and i % slow_every == 0 else budget / 4
+            governor.frame(work)
+        ok = governor.name == expected
+        print(f"{clock():5.0f}s {temp:5.1f}C {flags:#6x} {slow:5.0%}  {governor.name:<8} {expected}"
+              f"{'' if ok else '  <- FAIL'}")
+        if not ok:
+            failures.append((clock(), governor.name, expected))
+    return failures
+
+
+def measure_level(level, seconds, screen):
+    """Run the main loop's update/draw sequence on one level"""
+    from src.ui import UI
+    ui = UI(screen)
+    governor = RenderGovernor()
+    governor.level = level
+    ui.show_assets = governor.show_assets
+    timer_state = TimerState()
+    timer_state.start_frame()
+    clock = pygame.time.Clock()
+    loops = draws = 0
+    cpu_start = time.process_time()
+    end = time.monotonic() + seconds
+    while time.monotonic() < end:
+        pygame.event.pump()
+        timer_state.update()
+        if governor.should_draw(ui.content_key(timer_state)):
+            ui.draw(timer_state)
+            draws += 1
+        loops += 1
+        clock.tick(config.FPS)
+    cpu = time.process_time() - cpu_start
+    return loops / seconds, draws / seconds, cpu / seconds * 100
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check the render governor's levels and hysteresis")
+    parser.add_argument('--seconds', type=float, default=3.0, help="draw loop time per level")
+    args = parser.parse_args()
+    config.LOG_FILE = None
+    logs.setup_logging()
+
+    with tempfile.TemporaryDirectory() as directory:
+        fake = FakeSystem(directory)
+        config.PERF_THERMAL_PATH = fake.thermal
+        config.GOVERNOR_THROTTLE_PATH = fake.throttle
+        failures = run_scenario(fake)
+
+    pygame.display.init()
+    screen = pygame.display.set_mode((config.SCREEN_WIDTH, config.SCREEN_HEIGHT))
+    print(f"\n{config.SCREEN_WIDTH}x{config.SCREEN_HEIGHT}, {args.seconds:g}s per level")
+    print(f"{'level':<8} {'loop/s':>7} {'draws/s':>8} {'cpu':>6}")
+    for level, name in enumerate(LEVELS):
+        loop_rate, draw_rate, cpu = measure_level(level, args.seconds, screen)
+        print(f"{name:<8} {loop_rate:7.1f} {draw_rate:8.1f} {cpu:5.1f}%")
+        if loop_rate < config.FPS * 0.9:
+            failures.append((name, 'loop rate', loop_rate))
+    pygame.quit()
+    logs.shutdown()
+
+    if failures:
+        print(f"\nFAIL: {failures}")
+        return 1
+    print("\nPASS: levels step down and recover with hysteresis, the loop keeps its rate on every level")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,153 @@
+#!/usr/bin/env python3
+"""
+Render stall check for PROCESS_ISOLATION
+Runs one shot to expiry twice - once with the timer in the render loop (as
+without isolation), once with the timing process - while the render loop
+stalls with the GIL held right across every second boundary. A separate
+monitor process watches the published state and records when the shot
+seconds change; the change to 0 is the moment the zonk plays. With isolation
+every change must stay within the tolerance of the ideal time.
+
+Usage:
+    python isolation_check.py                   # 250 ms stalls
+    python isolation_check.py --stall-ms 800 --tolerance-ms 15
+"""
+
+import argparse
+import math
+import multiprocessing
+import os
+import statistics
+import sys
+import time
+
+# Headless drivers, must be set before pygame initialises (inherited by the timing process)
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import config
+from src import logs
+from src.game_state import TimerState
+from src.phases import schedule
+from src.shm import SharedBuffer, default_path
+from src import timing_process
+
+POLL = 0.0002  # How often the monitor looks at the published state
+
+
+def monitor(path, duration, results):
+    """Record (time, shown shot seconds) whenever the published value changes"""
+    shared = SharedBuffer(path, timing_process.STATE_SIZE, timing_process.SEQ_OFFSET, create=False)
+    changes = []
+    shown = None
+    end = time.monotonic() + duration
+    while time.monotonic() < end:
+        payload = timing_process.read(shared)
+        if payload:
+            seconds = math.ceil(payload[2])  # As published, no interpolation
+            if seconds != shown:
+                changes.append((time.monotonic(), seconds))
+                shown = seconds
+        time.sleep(POLL)
+    shared.close()
+    results.put(changes)
+
+
+def stall(seconds):
+    """Busy render work that keeps the GIL, like a slow draw"""
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def render_loop(args, timer_state, started, on_frame, limit):
+    """Frame loop that stalls shortly before every full second of the shot"""
+    next_stall = started + 1.0 - args.stall_ms / 2000
+    end = started + limit + 0.5
+    while time.monotonic() < end:
+        frame_start = time.monotonic()
+        timer_state.update()
+        on_frame()
+        if frame_start >= next_stall:
+            stall(args.stall_ms / 1000)
+            next_stall += 1.0
+        time.sleep(max(0.0, 1.0 / args.fps - (time.monotonic() - frame_start)))
+
+
+def run(args, isolated, limit):
+    context = multiprocessing.get_context('spawn')
+    results = context.Queue()
+    duration = limit + 1.5
+    if isolated:
+        timing = timing_process.TimingProcess()
+        timing.start()
+        path = timing.path
+        timer_state = timing_process.RemoteTimerState(timing)
+        on_frame = lambda: None
+        time.sleep(1.5)  # Let the timing process come up
+    else:
+        timing = None
+        path = default_path(f'snooker-shotclock-check-{os.getpid()}')
+        shared = SharedBuffer(path, timing_process.STATE_SIZE, timing_process.SEQ_OFFSET)
+        timer_state = TimerState(clock=time.monotonic)
+        on_frame = lambda: timing_process.publish(shared, timer_state)
+        on_frame()
+    watcher = context.Process(target=monitor, args=(path, duration, results))
+    watcher.start()
+    time.sleep(0.3)
+
+    started = time.monotonic()
+    timer_state.start_frame()
+    render_loop(args, timer_state, started, on_frame, limit)
+    changes = results.get(timeout=duration + 10)
+    watcher.join()
+    if timing:
+        timing.stop()
+    else:
+        shared.close()
+        os.unlink(path)
+
+    # Shows `limit - k` from started + k on
+    late = [(at - (started + limit - seconds)) * 1000 for at, seconds in changes
+            if at > started and 0 <= seconds < limit]
+    return late, len(changes)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check that render stalls do not delay the timing process")
+    parser.add_argument('--stall-ms', type=float, default=250.0, help="render stall across every second boundary")
+    parser.add_argument('--fps', type=float, default=config.FPS, help="render loop rate")
+    parser.add_argument('--tolerance-ms', type=float, default=None,
+                        help="allowed lateness with isolation (default: two timing ticks + 5 ms)")
+    args = parser.parse_args()
+    tolerance_ms = args.tolerance_ms
+    if tolerance_ms is None:
+        tolerance_ms = 2000 / config.TIMING_RATE + 5
+    config.HISTORY_ENABLED = False
+    logs.setup_logging()
+
+    limit = schedule().phases[0].shot_time  # Shot time at the start of a frame
+    print(f"{limit}s shot, render stalls of {args.stall_ms:g} ms every second\n")
+    print(f"{'mode':<18} {'changes':>8} {'median':>9} {'max':>9}")
+    failed = False
+    for isolated in (False, True):
+        late, count = run(args, isolated, limit)
+        name = 'timing process' if isolated else 'render loop'
+        if not late:
+            print(f"{name:<18} no changes seen")
+            failed = True
+            continue
+        print(f"{name:<18} {len(late):8d} {statistics.median(late):7.1f}ms {max(late):7.1f}ms")
+        if isolated and (max(late) > tolerance_ms or len(late) < limit):
+            failed = True
+    logs.shutdown()
+
+    if failed:
+        print(f"\nFAIL: with isolation a change came later than {tolerance_ms:.1f} ms or was missing")
+        return 1
+    print(f"\nPASS: with isolation every change (and the zonk) within {tolerance_ms:.1f} ms despite the stalls")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
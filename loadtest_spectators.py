@@ -0,0 +1,200 @@
+#!/usr/bin/env python3
+"""
+Load test for the spectator stream
+Connects hundreds of local viewers (plus a few that never read) to an
+in-process server and reports fan-out latency and slow-client eviction
+
+Usage:
+    python loadtest_spectators.py --subscribers 500 --stalled 5 --duration 12
+"""
+
+import argparse
+import asyncio
+import base64
+import json
+import os
+import socket
+import struct
+import sys
+import threading
+import time
+
+import config
+from src.commands import CommandQueue
+from src.game_state import TimerState
+from src.remote_control import RemoteControlServer
+
+
+class ViewerStats:
+    """What one simulated viewer saw"""
+
+    def __init__(self):
+        self.snapshots = 0
+        self.deltas = 0
+        self.gaps = 0
+        self.latencies = []
+        self.last_seq = None
+        self.error = None
+
+
+def upgrade_request():
+    """Build the WebSocket upgrade request for the spectator stream"""
+    key = base64.b64encode(os.urandom(16)).decode()
+    return (
+        "GET /stream HTTP/1.1\r\nHost: localhost\r\nUpgrade: websocket\r\n"
+        f"Connection: Upgrade\r\nSec-WebSocket-Key: {key}\r\nSec-WebSocket-Version: 13\r\n\r\n"
+    ).encode()
+
+
+async def open_stream(port):
+    """Connect and upgrade to the spectator WebSocket"""
+    reader, writer = await asyncio.open_connection('127.0.0.1', port)
+    writer.write(upgrade_request())
+    await writer.drain()
+    response = await reader.readuntil(b'\r\n\r\n')
+    if not response.startswith(b'HTTP/1.1 101'):
+        raise RuntimeError(f"Upgrade failed: {response[:40]!r}")
+    return reader, writer
+
+
+async def read_message(reader):
+    """Read one unmasked server frame and decode its JSON payload"""
+    first, second = await reader.readexactly(2)
+    length = second & 0x7F
+    if length == 126:
+        length = struct.unpack('!H', await reader.readexactly(2))[0]
+    elif length == 127:
+        length = struct.unpack('!Q', await reader.readexactly(8))[0]
+    return json.loads(await reader.readexactly(length))
+
+
+async def viewer(port, stats):
+    """A well-behaved viewer that reads every update until it is cancelled"""
+    try:
+        reader, writer = await open_stream(port)
+    except Exception as e:
+        stats.error = e
+        return
+    try:
+        while True:
+            message = await read_message(reader)
+            now = time.time()
+            if message['type'] == 'snapshot':
+                stats.snapshots += 1
+                stats.latencies.append(now - message['state']['timestamp'])
+            else:
+                stats.deltas += 1
+                if 'timestamp' in message['changes']:
+                    stats.latencies.append(now - message['changes']['timestamp'])
+                if stats.last_seq is not None and message['seq'] != stats.last_seq + 1:
+                    stats.gaps += 1
+            stats.last_seq = message['seq']
+    except asyncio.CancelledError:
+        pass
+    except Exception as e:
+        stats.error = e
+    finally:
+        writer.close()
+
+
+async def stalled_viewer(port, stop):
+    """A viewer that connects and then never reads again"""
+    # Raw socket instead of streams: a StreamReader would keep buffering in the background
+    loop = asyncio.get_running_loop()
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, 4096)
+    sock.setblocking(False)
+    try:
+        await loop.sock_connect(sock, ('127.0.0.1', port))
+        await loop.sock_sendall(sock, upgrade_request())
+        await loop.sock_recv(sock, 1024)
+        await stop.wait()
+    finally:
+        sock.close()
+
+
+def drive_clock(timer_state, server, speed, stop):
+    """Headless main loop running the frame clock `speed` times faster than real time"""
+    timer_state.start_frame()
+    while not stop.is_set():
+        timer_state.update()
+        # Advance virtual time faster so viewers see more transitions per second
+        extra = (speed - 1) / config.FPS
+        timer_state.frame_time_remaining = max(1, timer_state.frame_time_remaining - extra)
+        timer_state.shot_time_remaining -= extra
+        if timer_state.shot_time_remaining <= 0:
+            timer_state.reset_shot()
+        server.publish(timer_state)
+        time.sleep(1 / config.FPS)
+
+
+async def run(args):
+    server = RemoteControlServer(CommandQueue(), host='127.0.0.1', port=0)
+    server.spectators.evict_timeout = args.evict_timeout
+    server.start()
+    timer_state = TimerState()
+    thread_stop = threading.Event()
+    driver = threading.Thread(target=drive_clock, args=(timer_state, server, args.speed, thread_stop), daemon=True)
+
+    stop = asyncio.Event()
+    stats = [ViewerStats() for _ in range(args.subscribers)]
+    started = time.perf_counter()
+    viewers = [asyncio.ensure_future(viewer(server.port, s)) for s in stats]
+    stalled = [asyncio.ensure_future(stalled_viewer(server.port, stop)) for _ in range(args.stalled)]
+    # Let everyone connect before the clock starts moving
+    while len(server.spectators.subscribers) < args.subscribers + args.stalled:
+        if time.perf_counter() - started > 30:
+            break
+        await asyncio.sleep(0.05)
+    connect_time = time.perf_counter() - started
+    driver.start()
+
+    await asyncio.sleep(args.duration)
+    stop.set()
+    thread_stop.set()
+    for task in viewers:
+        task.cancel()
+    await asyncio.gather(*viewers, *stalled, return_exceptions=True)
+    driver.join()
+    server.stop()
+
+    latencies = sorted(l * 1000 for s in stats for l in s.latencies)
+    errors = [s.error for s in stats if s.error]
+    healthy = [s for s in stats if s.snapshots and not s.error]
+    deltas = sum(s.deltas for s in stats)
+    gaps = sum(s.gaps for s in stats)
+    print("=" * 60)
+    print("SPECTATOR LOAD TEST")
+    print("=" * 60)
+    print(f"Viewers: {args.subscribers} reading, {args.stalled} stalled (connected in {connect_time:.2f}s)")
+    print(f"Healthy viewers with snapshot: {len(healthy)}/{args.subscribers}, errors: {len(errors)}")
+    print(f"Deltas delivered: {deltas} ({deltas / max(1, args.subscribers) / args.duration:.1f}/s per viewer), gaps: {gaps}")
+    print(f"Evicted: {server.spectators.evicted}")
+    if latencies:
+        p50 = latencies[len(latencies) // 2]
+        p99 = latencies[min(len(latencies) - 1, int(len(latencies) * 0.99))]
+        print(f"Fan-out latency: p50 {p50:.2f} ms, p99 {p99:.2f} ms, max {latencies[-1]:.2f} ms")
+    print("=" * 60)
+
+    ok = len(healthy) == args.subscribers and gaps == 0
+    if args.stalled:
+        ok = ok and server.spectators.evicted >= args.stalled
+    for error in errors[:5]:
+        print(f"❌ {error!r}")
+    print("✅ Passed" if ok else "❌ Failed")
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Spectator stream load test")
+    parser.add_argument('--subscribers', type=int, default=500)
+    parser.add_argument('--stalled', type=int, default=5, help="Viewers that never read")
+    parser.add_argument('--duration', type=float, default=12.0, help="Seconds to stream")
+    parser.add_argument('--speed', type=float, default=60.0, help="Virtual clock speed-up")
+    parser.add_argument('--evict-timeout', type=float, default=2.0)
+    args = parser.parse_args()
+    return asyncio.run(run(args))
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
@@ -0,0 +1,235 @@
+#!/usr/bin/env python3
+"""
+Main loop benchmark
+Runs the real main loop headless with both drivers (MAIN_LOOP 'sync' and
+'asyncio') through the same scenarios and compares CPU use, loop passes,
+drawn frames and latency: for inputs from the moment a key press (pygame
+event) or a remote command (CommandQueue from another thread, like the HTTP
+server and controllers) is issued until the first frame that shows the new
+shot time has been drawn, for the running clock from the moment a shot
+second ran out until its new digit was drawn (ticks and LEDs follow the same
+boundaries).
+
+Usage:
+    python loop_benchmark.py                 # every scenario, 10 s per run
+    python loop_benchmark.py --seconds 30 --scenario presses
+"""
+
+import argparse
+import math
+import os
+import random
+import statistics
+import sys
+import threading
+import time
+
+# Headless drivers, must be set before pygame initialises
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+import pygame
+import config
+from src import logs
+from src.audio import AudioSystem
+from src.commands import CommandQueue
+from src.config_reload import ConfigReloader
+from src.game_state import TimerState
+from src.gpio_control import GPIOControl
+from src.input_handler import InputHandler
+from src.main_loop import MainLoop
+from src.perf import PerfControl
+from src.startup import BackgroundInit, StartupTimer
+from src.ui import UI
+
+MODES = ('sync', 'asyncio')
+
+# name -> (frame running, progress bar, inputs)
+SCENARIOS = {
+    'idle': (False, False, False),
+    'running': (True, False, False),
+    'progress': (True, True, False),
+    'presses': (True, False, True),
+}
+
+
+class Probe:
+    """Counts passes and draws and notes when a new shot first reached the screen"""
+
+    def __init__(self, main_loop):
+        self.passes = 0
+        self.draws = 0
+        self.pending = []  # (source, issued, shots_started that shows it)
+        self.latencies = {'key': [], 'remote': []}
+        self.digit_lags = []
+        self._shown = (None, None)  # (shot time string, shots_started) of the last drawn frame
+        self._lock = threading.Lock()
+        begin, draw = main_loop.begin, main_loop.ui.draw
+        timer_state = main_loop.timer_state
+
+        def counting_begin():
+            self.passes += 1
+            begin()
+
+        def timed_draw(state, flip=True):
+            draw(state, flip)
+            self.draws += 1
+            now = time.perf_counter()
+            shown = (state.get_shot_time_str(), state.shots_started)
+            if shown[1] == self._shown[1] and shown[0] != self._shown[0] and state.shot_time_remaining > 0:
+                # Same shot, next second: the boundary was crossed this long before the update
+                self.digit_lags.append(math.ceil(state.shot_time_remaining) - state.shot_time_remaining)
+            self._shown = shown
+            with self._lock:
+                done = [p for p in self.pending if timer_state.shots_started >= p[2]]
+                for p in done:
+                    self.latencies[p[0]].append(now - p[1])
+                    self.pending.remove(p)
+
+        main_loop.begin = counting_begin
+        main_loop.ui.draw = timed_draw
+
+    def issued(self, source, shots_started):
+        with self._lock:
+            self.pending.append((source, time.perf_counter(), shots_started))
+
+
+def press_inputs(main_loop, probe, stop):
+    """Alternate key presses and remote commands every 1.2-2 s (the shown shot time always changes)"""
+    timer_state = main_loop.timer_state
+    expected = timer_state.shots_started
+    source = 'key'
+    while not stop.wait(random.uniform(1.2, 2.0)):
+        expected += 1
+        probe.issued(source, expected)
+        if source == 'key':
+            pygame.event.post(pygame.event.Event(pygame.KEYDOWN, key=pygame.K_s, mod=0, unicode='s', scancode=0))
+            source = 'remote'
+        else:
+            main_loop.command_queue.put('reset-shot')
+            source = 'key'
+
+
+def build(screen):
+    """The components main.py sets up, without network, history and sync"""
+    startup = StartupTimer()
+    background = BackgroundInit(startup)
+    timer_state = TimerState()
+    ui = UI(screen, defer_assets=True)
+    input_handler = InputHandler(ui, timer_state)
+    command_queue = CommandQueue()
+    audio_system = AudioSystem(defer_load=True)
+    gpio_control = GPIOControl(command_queue, defer_setup=True)
+    background.start('audio', audio_system.load)
+    background.start('gpio', gpio_control.setup)
+    background.start('logo', ui.load_logo)
+    governor = None
+    if config.GOVERNOR_ENABLED:
+        from src.governor import RenderGovernor
+        governor = RenderGovernor()
+    return MainLoop(
+        screen, ui, timer_state, input_handler, command_queue, ConfigReloader(), PerfControl(ui.scale),
+        startup, background, audio_system=audio_system, gpio_control=gpio_control, governor=governor,
+    ), gpio_control
+
+
+def run(mode, scenario, seconds, screen):
+    running, progress, inputs = SCENARIOS[scenario]
+    config.SHOW_SHOT_PROGRESS = progress
+    main_loop, gpio_control = build(screen)
+    if running:
+        main_loop.timer_state.start_frame()
+    probe = Probe(main_loop)
+    pygame.event.clear()
+
+    stop = threading.Event()
+    threads = [threading.Timer(seconds, lambda: pygame.event.post(pygame.event.Event(pygame.QUIT)))]
+    if inputs:
+        threads.append(threading.Thread(target=press_inputs, args=(main_loop, probe, stop), daemon=True))
+    for thread in threads:
+        thread.start()
+    cpu_start, start = time.process_time(), time.perf_counter()
+    try:
+        if mode == 'asyncio':
+            import asyncio
+            from src.async_loop import AsyncMainLoop
+            asyncio.run(AsyncMainLoop(main_loop).run())
+        else:
+            main_loop.run()
+    finally:
+        stop.set()
+        for thread in threads:
+            thread.join()
+        gpio_control.cleanup()
+    end = time.perf_counter()
+    elapsed = end - start
+    cpu = time.process_time() - cpu_start
+    return {
+        'passes': probe.passes / elapsed,
+        'draws': probe.draws / elapsed,
+        'cpu': cpu / elapsed * 100,
+        'latencies': probe.latencies['key'] + probe.latencies['remote'],
+        'digit_lags': probe.digit_lags,
+        'unshown': [p for p in probe.pending if end - p[1] > 0.1],  # Not racing the quit
+    }
+
+
+def latency_str(values):
+    if not values:
+        return f"{'-':>7} {'-':>7} {'-':>7}"
+    values = sorted(values)
+    p95 = values[min(len(values) - 1, int(len(values) * 0.95))]
+    return f"{statistics.mean(values) * 1000:6.1f}ms {p95 * 1000:6.1f}ms {values[-1] * 1000:6.1f}ms"
+
+
+def digit_str(values):
+    if not values:
+        return f"{'-':>6}"
+    return f"{max(values) * 1000:4.1f}ms"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare the sync and asyncio main loops")
+    parser.add_argument('--seconds', type=float, default=10.0, help="run time per scenario and mode")
+    parser.add_argument('--scenario', choices=SCENARIOS, action='append', help="only these scenarios")
+    args = parser.parse_args()
+    config.LOG_FILE = None
+    config.WATCHDOG_ENABLED = False
+    logs.setup_logging()
+
+    pygame.display.init()
+    screen = pygame.display.set_mode((config.SCREEN_WIDTH, config.SCREEN_HEIGHT))
+    print(f"{config.SCREEN_WIDTH}x{config.SCREEN_HEIGHT}, FPS {config.FPS}, {args.seconds:g}s per run")
+    print(f"{'scenario':<9} {'loop':<8} {'passes/s':>8} {'draws/s':>8} {'cpu':>6}  "
+          f"{'latency':>8} {'p95':>8} {'max':>8}  {'digit':>6}")
+    failures = []
+    for scenario in args.scenario or SCENARIOS:
+        results = {}
+        for mode in MODES:
+            result = results[mode] = run(mode, scenario, args.seconds, screen)
+            print(f"{scenario:<9} {mode:<8} {result['passes']:8.1f} {result['draws']:8.1f} "
+                  f"{result['cpu']:5.1f}%  {latency_str(result['latencies'])}  {digit_str(result['digit_lags'])}")
+        for mode, result in results.items():
+            # A new second must never wait for the next idle wake-up
+            if result['digit_lags'] and max(result['digit_lags']) > 1.0 / config.FPS + 0.01:
+                failures.append((scenario, mode, 'digit lag', max(result['digit_lags'])))
+        if SCENARIOS[scenario][2]:
+            for mode, result in results.items():
+                # Every input must reach the screen, within two frames
+                if result['unshown'] or not result['latencies']:
+                    failures.append((scenario, mode, 'inputs not shown', len(result['unshown'])))
+                elif max(result['latencies']) > 2.0 / config.FPS + 0.01:
+                    failures.append((scenario, mode, 'latency', max(result['latencies'])))
+    pygame.quit()
+    logs.shutdown()
+
+    if failures:
+        print(f"\nFAIL: {failures}")
+        return 1
+    print("\nPASS: both loops show every input within two frames and every new second within one")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
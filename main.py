@@ -3,84 +3,239 @@
 Snooker Shot Clock
 A pygame-based shot clock for snooker frames with LED indicators
 """
+import logging
 import sys
+import time
+
+# Taken before the heavy imports so startup reporting covers them
+STARTUP_TIME = time.perf_counter()
+
 import pygame
 import config
+from src import logs
+from src.startup import StartupTimer, BackgroundInit
 from src.game_state import TimerState
 from src.ui import UI
 from src.input_handler import InputHandler
 from src.audio import AudioSystem
 from src.gpio_control import GPIOControl
+from src.commands import CommandQueue
+from src.config_reload import ConfigReloader
+from src.perf import PerfControl
+from src.metrics import metrics
+from src.main_loop import MainLoop, create_display, create_frame_output
+
+logger = logging.getLogger('main')
 
 
 def main():
     """Main entry point"""
-    # Initialize pygame
-    pygame.init()
+    # Log writes happen on a background thread from here on
+    logs.setup_logging()
+    startup = StartupTimer(STARTUP_TIME)
+    startup.record('imports', STARTUP_TIME, time.perf_counter())
+    background = BackgroundInit(startup)
     
-    # Initialize joystick support for Bluetooth controllers
-    pygame.joystick.init()
-    if pygame.joystick.get_count() > 0:
-        joystick = pygame.joystick.Joystick(0)
-        joystick.init()
-        print(f"Joystick detected: {joystick.get_name()}")
+    # Local overrides are applied before anything reads the config
+    config_reloader = ConfigReloader()
+    config_reloader.load_now()
     
-    # Create display
-    if config.FULLSCREEN:
-        screen = pygame.display.set_mode((config.SCREEN_WIDTH, config.SCREEN_HEIGHT), pygame.FULLSCREEN)
-    else:
-        screen = pygame.display.set_mode((config.SCREEN_WIDTH, config.SCREEN_HEIGHT))
+    # Timing, audio and GPIO in their own process - started first, it comes up while the display opens
+    timing_process = None
+    if config.PROCESS_ISOLATION:
+        from src.timing_process import TimingProcess, tune_process
+        tune_process(config.RENDER_CPU)
+        timing_process = TimingProcess()
+        with startup.phase('timing'):
+            timing_process.start()
+    
+    # Only bring up what the first frame needs - mixer and joysticks come later
+    with startup.phase('display'):
+        pygame.display.init()
         
-    pygame.display.set_caption("Snooker Shot Clock")
+        # Create display
+        screen = create_display()
+        pygame.display.set_caption("Snooker Shot Clock")
     
     # Hide mouse cursor in fullscreen
     if config.FULLSCREEN:
         pygame.mouse.set_visible(True)  # Keep visible for now, can be disabled later
     
-    # Initialize components
-    timer_state = TimerState()
-    ui = UI(screen)
+    # Optional shared-memory frame output for stream capture
+    frame_output = create_frame_output(screen)
+    
+    # Initialize components - slow device and asset setup runs in parallel threads
+    if timing_process:
+        from src.timing_process import RemoteTimerState
+        timer_state = RemoteTimerState(timing_process)
+    else:
+        timer_state = TimerState()
+    with startup.phase('ui'):
+        ui = UI(screen, frame_output, defer_assets=True)
     input_handler = InputHandler(ui, timer_state)
-    audio_system = AudioSystem()
-    gpio_control = GPIOControl(timer_state)  # Pass timer_state for button callbacks
     
-    # Main game loop
-    clock = pygame.time.Clock()
-    running = True
+    # Frame profiler - F3 shows the HUD, F4 records a CSV (off = no instrumentation at all)
+    perf_control = PerfControl(ui.scale)
+    input_handler.key_actions[pygame.K_F3] = perf_control.toggle_hud
+    input_handler.key_actions[pygame.K_F4] = perf_control.toggle_csv
+    # Remote control, controllers and GPIO buttons - commands are applied in the main loop
+    command_queue = CommandQueue()
+    audio_system = None
+    gpio_control = None
+    if not timing_process:
+        audio_system = AudioSystem(defer_load=True)
+        gpio_control = GPIOControl(command_queue, defer_setup=True)  # Button presses go through the queue
+        background.start('audio', audio_system.load)
+        background.start('gpio', gpio_control.setup)
+    background.start('logo', ui.load_logo)
+    
+    # Remote control server (phones/tablets)
+    remote_server = None
+    if config.REMOTE_ENABLED:
+        from src.remote_control import RemoteControlServer
+        remote_server = RemoteControlServer(command_queue)
+        try:
+            if config.MAIN_LOOP != 'asyncio':  # Otherwise it serves on the main loop
+                remote_server.start()
+        except Exception as e:
+            logger.error("Failed to start remote control: %s", e)
+            remote_server = None
+    
+    # Game controllers polled on their own thread, presses are timestamped and applied in the main loop
+    if config.CONTROLLER_ENABLED:
+        try:
+            from src.controller_input import ControllerInput
+            input_handler.controllers = ControllerInput(timing_process or command_queue)
+        except Exception as e:
+            logger.error("Failed to set up controller input: %s", e)
+    
+    # Shared-memory state feed for external hardware drivers
+    state_feed = None
+    if config.STATE_FEED_ENABLED:
+        try:
+            from src.state_feed import StateFeedWriter
+            state_feed = StateFeedWriter(config.STATE_FEED_PATH)
+        except Exception as e:
+            logger.error("Failed to initialize state feed: %s", e)
+    
+    # Second clock at the table: multicast the timer state to followers
+    sync_leader = None
+    if config.SYNC_ROLE == 'leader':
+        try:
+            from src.display_sync import SyncLeader
+            sync_leader = SyncLeader()
+            sync_leader.start()
+        except Exception as e:
+            logger.error("Failed to start sync leader: %s", e)
+            sync_leader = None
+    
+    # Match history (frames and shots) recorded to SQLite on a background thread
+    history_writer = None
+    match_recorder = None
+    if config.HISTORY_ENABLED and not timing_process:
+        try:
+            from src.history import HistoryWriter, MatchRecorder
+            history_writer = HistoryWriter()
+            history_writer.start()
+            match_recorder = MatchRecorder(history_writer)
+        except Exception as e:
+            logger.error("Failed to start match history: %s", e)
+            history_writer = None
     
-    print("Snooker Shot Clock started")
-    print("Controls:")
-    print("  SPACE - Start Frame")
-    print("  R - Reset Frame")
-    print("  P - Pause Frame")
-    print("  S - Reset Shot")
-    print("  ESC/Q - Quit")
+    # Watch the override file for changes while running
+    config_reloader.start()
+    
+    # Lowers visual quality when the Pi runs hot or frames get slow - the loop and the timers keep their rate
+    governor = None
+    if config.GOVERNOR_ENABLED:
+        from src.governor import RenderGovernor
+        governor = RenderGovernor()
+    
+    # Prometheus metrics (HTTP endpoint and/or node_exporter textfile)
+    metrics.timer_state = timer_state
+    metrics.governor = governor
+    metrics.timing = timing_process
+    metrics_exporter = None
+    if config.METRICS_PORT is not None or config.METRICS_TEXTFILE_PATH:
+        from src.metrics import MetricsExporter
+        metrics_exporter = MetricsExporter()
+        try:
+            metrics_exporter.start()
+        except Exception as e:
+            logger.error("Failed to start metrics exporter: %s", e)
+            metrics_exporter = None
+    
+    logger.info(
+        "Snooker Shot Clock started\n"
+        "Controls:\n"
+        "  SPACE - Start Frame\n"
+        "  R - Reset Frame\n"
+        "  P - Pause Frame\n"
+        "  S - Reset Shot\n"
+        "  U - Undo (Shift+U: Redo)\n"
+        "  F3 - Performance HUD\n"
+        "  F4 - Record performance CSV\n"
+        "  ESC/Q - Quit"
+    )
+    
+    # Watchdog for a hanging main loop (blocked audio device, stuck input, ...)
+    watchdog = None
+    if config.WATCHDOG_ENABLED:
+        from src.watchdog import LoopWatchdog
+        watchdog = LoopWatchdog()
+        watchdog.start()
+    
+    main_loop = MainLoop(
+        screen, ui, timer_state, input_handler, command_queue, config_reloader, perf_control,
+        startup, background, frame_output=frame_output, audio_system=audio_system,
+        gpio_control=gpio_control, timing_process=timing_process, remote_server=remote_server,
+        state_feed=state_feed, sync_leader=sync_leader, match_recorder=match_recorder,
+        governor=governor, watchdog=watchdog,
+    )
+    
+    def release():
+        """Stop the services, release devices, flush the history, remove shared memory"""
+        config_reloader.stop()
+        perf_control.close()
+        if input_handler.controllers:
+            input_handler.controllers.stop()
+        if remote_server:
+            remote_server.stop()
+        if metrics_exporter:
+            metrics_exporter.stop()
+        if gpio_control:
+            gpio_control.cleanup()
+        if timing_process:
+            timing_process.stop()
+        if main_loop.frame_output:
+            main_loop.frame_output.close()
+        if state_feed:
+            state_feed.close()
+        if history_writer:
+            history_writer.stop()
+        if sync_leader:
+            sync_leader.stop()
+    
+    if watchdog:
+        watchdog.on_restart = release  # A stalled loop never reaches the finally below
     
     try:
-        while running:
-            # Handle input
-            running = input_handler.handle_events()
-            
-            # Update game state
-            timer_state.update()
-            
-            # Update audio
-            audio_system.update(timer_state)
-            
-            # Update GPIO LEDs
-            gpio_control.update(timer_state)
-            
-            # Render UI
-            ui.draw(timer_state)
-            
-            # Maintain frame rate
-            clock.tick(config.FPS)
+        if config.MAIN_LOOP == 'asyncio':
+            # Every source wakes the loop, frames are only drawn when something changed
+            import asyncio
+            from src.async_loop import AsyncMainLoop
+            asyncio.run(AsyncMainLoop(main_loop).run())
+        else:
+            main_loop.run()
             
     finally:
         # Cleanup
-        gpio_control.cleanup()
+        if watchdog:
+            watchdog.stop()
+        release()
         pygame.quit()
-        print("Shot clock stopped")
+        logger.info("Shot clock stopped")
+        logs.shutdown()
         
     return 0
 
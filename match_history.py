@@ -0,0 +1,83 @@
+#!/usr/bin/env python3
+"""
+Query and export the match history database
+Shows per-night and per-season stats and exports frames or shots as CSV
+
+Usage:
+    python match_history.py nights                      # all nights, newest first
+    python match_history.py nights --since 2026-09-01 --table tisch1
+    python match_history.py season 2026/27
+    python match_history.py export shots --night 2026-03-14 -o shots.csv
+    python match_history.py export frames --season 2026/27 -o frames.csv
+"""
+
+import argparse
+import sqlite3
+import sys
+
+from src import history
+
+
+def print_table(columns, rows):
+    """Print rows as aligned columns"""
+    rows = [['' if value is None else str(value) for value in row] for row in rows]
+    if not rows:
+        print("No frames recorded for this selection")
+        return
+    widths = [max(len(column), *(len(row[i]) for row in rows)) for i, column in enumerate(columns)]
+    print('  '.join(column.ljust(width) for column, width in zip(columns, widths)))
+    for row in rows:
+        print('  '.join(value.rjust(width) if i > 1 else value.ljust(width)
+                        for i, (value, width) in enumerate(zip(row, widths))))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Shot clock match history")
+    parser.add_argument('--db', help="database path (default: HISTORY_DB_PATH from config.py)")
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    def add_filters(command):
+        command.add_argument('--table', help="only this table (HISTORY_TABLE_ID / hostname)")
+        command.add_argument('--night', help="only this night (YYYY-MM-DD)")
+        command.add_argument('--since', help="first night (YYYY-MM-DD)")
+        command.add_argument('--until', help="last night (YYYY-MM-DD)")
+
+    nights = commands.add_parser('nights', help="stats per night and table")
+    add_filters(nights)
+    nights.add_argument('--season')
+
+    season = commands.add_parser('season', help="stats per season and table")
+    season.add_argument('season', nargs='?', help="e.g. 2026/27 (default: all seasons)")
+    add_filters(season)
+
+    export = commands.add_parser('export', help="export frames or shots as CSV")
+    export.add_argument('what', choices=('frames', 'shots'))
+    export.add_argument('-o', '--output', help="CSV file (default: stdout)")
+    export.add_argument('--season')
+    add_filters(export)
+
+    args = parser.parse_args()
+    filters = {'table': args.table, 'night': args.night, 'since': args.since,
+               'until': args.until, 'season': args.season}
+    try:
+        conn = history.connect(args.db, readonly=True)
+        if args.command == 'nights':
+            print_table(*history.night_stats(conn, **filters))
+        elif args.command == 'season':
+            print_table(*history.season_stats(conn, **filters))
+        else:
+            out = open(args.output, 'w', newline='') if args.output else sys.stdout
+            try:
+                count = history.export_csv(conn, args.what, out, **filters)
+            finally:
+                if args.output:
+                    out.close()
+            print(f"{count} {args.what} exported", file=sys.stderr)
+    except sqlite3.Error as e:
+        print(f"Could not read {history.database_path(args.db)}: {e}", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,58 @@
+#!/usr/bin/env python3
+"""
+Pre-warm the image asset cache
+Scales every image asset for the common display resolutions and stores it in
+the display pixel format, so the clock never decodes or smoothscales at boot
+
+Usage:
+    python prewarm_assets.py                 # resolutions from test_resolution.py
+    python prewarm_assets.py 1280x800 800x480
+"""
+
+import os
+import sys
+
+# Headless: only the pixel format of a 32 bit display is needed
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+
+import pygame
+from src.assets import cache_dir, cache_path, display_byte_order, load_image, source_digest
+from src.ui import LOGO_BASE_SIZE, LOGO_PATH, scale_factor
+from test_resolution import COMMON_RESOLUTIONS
+
+# (path, size at the 1920x1080 reference) for every prescaled image
+IMAGE_ASSETS = [
+    (LOGO_PATH, LOGO_BASE_SIZE),
+]
+
+
+def parse_resolution(text):
+    width, height = text.lower().split('x')
+    return int(width), int(height)
+
+
+def main():
+    resolutions = [parse_resolution(arg) for arg in sys.argv[1:]] or COMMON_RESOLUTIONS
+    pygame.display.init()
+    pygame.display.set_mode((1, 1))
+    byte_order = display_byte_order()
+    if not byte_order:
+        print("Display format has no cacheable 32 bit byte order - nothing to do")
+        return False
+
+    print(f"Cache directory: {cache_dir()} (format {byte_order})")
+    for width, height in resolutions:
+        scale = scale_factor(width, height)
+        for path, base_size in IMAGE_ASSETS:
+            size = (int(base_size * scale), int(base_size * scale))
+            load_image(path, size)
+            with open(path, 'rb') as f:
+                cached = cache_path(path, source_digest(f.read()), size, byte_order)
+            status = "✅" if os.path.exists(cached) else "❌"
+            print(f"{status} {width}x{height}: {os.path.basename(path)} {size[0]}x{size[1]}")
+    pygame.quit()
+    return True
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
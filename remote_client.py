@@ -0,0 +1,179 @@
+#!/usr/bin/env python3
+"""
+Command line client for the remote control API
+Sends commands to a running shot clock and measures command latency: until
+the command is accepted, and until the published state shows it applied
+
+Usage:
+    python remote_client.py state
+    python remote_client.py start
+    python remote_client.py balls-rolling on
+    python remote_client.py bench --clients 50 --requests 100
+    python remote_client.py selftest   # starts a local server, no display needed
+"""
+
+import argparse
+import http.client
+import json
+import statistics
+import sys
+import threading
+import time
+
+import config
+
+
+def send(conn, method, path, body=None):
+    """Send one request over a keep-alive connection and decode the JSON answer"""
+    payload = json.dumps(body).encode() if body is not None else None
+    headers = {'Content-Type': 'application/json'} if payload else {}
+    conn.request(method, path, body=payload, headers=headers)
+    response = conn.getresponse()
+    return response.status, json.loads(response.read() or b'{}')
+
+
+def run_command(host, port, command, value=None):
+    """Run a single command and print the result"""
+    conn = http.client.HTTPConnection(host, port, timeout=5)
+    if command == 'state':
+        status, result = send(conn, 'GET', '/api/state')
+    else:
+        body = None
+        if command == 'balls-rolling':
+            body = {'rolling': value != 'off'}
+        status, result = send(conn, 'POST', f'/api/{command}', body)
+    print(f"{status} {json.dumps(result, indent=2)}")
+    return 200 <= status < 300
+
+
+def wait_applied(conn, number, timeout=2.0):
+    """Poll /api/state until the command with this number shows as applied"""
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline:
+        _, result = send(conn, 'GET', '/api/state')
+        if result.get('state', {}).get('applied', 0) >= number:
+            return True
+        time.sleep(0.001)
+    return False
+
+
+def percentiles(values):
+    values = sorted(values)
+    return values[len(values) // 2], values[min(len(values) - 1, int(len(values) * 0.99))]
+
+
+def run_bench(host, port, clients, requests):
+    """Hammer the API from many concurrent clients and report latencies"""
+    latencies = []
+    applied = []  # From sending a command until the published state shows it
+    errors = []
+    lock = threading.Lock()
+
+    def worker():
+        conn = http.client.HTTPConnection(host, port, timeout=5)
+        local = []
+        local_applied = []
+        try:
+            for i in range(requests):
+                # Mix commands with state reads like a real referee tablet would
+                path, method = ('/api/state', 'GET') if i % 2 else ('/api/reset-shot', 'POST')
+                started = time.perf_counter()
+                status, result = send(conn, method, path)
+                local.append((time.perf_counter() - started) * 1000)
+                if status >= 300:
+                    raise RuntimeError(f"HTTP {status} for {path}")
+                if 'queued' in result:  # Older servers only acknowledge
+                    if not wait_applied(conn, result['queued']):
+                        raise RuntimeError(f"{path} not applied within 2 s")
+                    local_applied.append((time.perf_counter() - started) * 1000)
+        except Exception as e:
+            with lock:
+                errors.append(e)
+        finally:
+            conn.close()
+            with lock:
+                latencies.extend(local)
+                applied.extend(local_applied)
+
+    threads = [threading.Thread(target=worker) for _ in range(clients)]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+
+    if not latencies:
+        print(f"No successful requests ({len(errors)} errors)")
+        return False
+
+    p50, p99 = percentiles(latencies)
+    print("=" * 60)
+    print(f"Clients: {clients}, requests: {len(latencies)}, errors: {len(errors)}")
+    print(f"Throughput: {len(latencies) / elapsed:.0f} req/s")
+    print(f"Latency: mean {statistics.mean(latencies):.2f} ms, p50 {p50:.2f} ms, "
+          f"p99 {p99:.2f} ms, max {max(latencies):.2f} ms")
+    if applied:
+        applied_p50, applied_p99 = percentiles(applied)
+        print(f"Applied: mean {statistics.mean(applied):.2f} ms, p50 {applied_p50:.2f} ms, "
+              f"p99 {applied_p99:.2f} ms, max {max(applied):.2f} ms")
+    print("=" * 60)
+    return not errors and p50 < 10
+
+
+def run_selftest(clients, requests):
+    """Start an in-process server with a headless main loop and benchmark it"""
+    from src.commands import CommandQueue
+    from src.game_state import TimerState
+    from src.remote_control import RemoteControlServer
+
+    timer_state = TimerState()
+    command_queue = CommandQueue()
+    server = RemoteControlServer(command_queue, host='127.0.0.1', port=0)
+    server.start()
+
+    stop = threading.Event()
+
+    def main_loop():
+        while not stop.is_set():
+            command_queue.process(timer_state)
+            timer_state.update()
+            server.publish(timer_state)
+            time.sleep(1 / config.FPS)
+
+    loop_thread = threading.Thread(target=main_loop, daemon=True)
+    loop_thread.start()
+    try:
+        ok = run_command('127.0.0.1', server.port, 'start')
+        time.sleep(0.1)
+        conn = http.client.HTTPConnection('127.0.0.1', server.port, timeout=5)
+        _, result = send(conn, 'GET', '/api/state')
+        ok = ok and result['state'].get('state') == 'running'
+        print(f"Frame started via API: {'✅' if ok else '❌'}")
+        ok = run_bench('127.0.0.1', server.port, clients, requests) and ok
+    finally:
+        stop.set()
+        loop_thread.join()
+        server.stop()
+    return ok
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Snooker Shot Clock remote control client")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=config.REMOTE_PORT)
+    parser.add_argument('--clients', type=int, default=50, help="Concurrent clients for bench/selftest")
+    parser.add_argument('--requests', type=int, default=100, help="Requests per client for bench/selftest")
+    parser.add_argument('command', help="state, start, pause, reset-frame, reset-shot, balls-rolling, undo, redo, bench or selftest")
+    parser.add_argument('value', nargs='?', help="on/off for balls-rolling")
+    args = parser.parse_args()
+
+    if args.command == 'selftest':
+        return run_selftest(args.clients, args.requests)
+    if args.command == 'bench':
+        return run_bench(args.host, args.port, args.clients, args.requests)
+    return run_command(args.host, args.port, args.command, args.value)
+
+
+if __name__ == "__main__":
+    sys.exit(0 if main() else 1)
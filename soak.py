@@ -0,0 +1,290 @@
+#!/usr/bin/env python3
+"""
+Soak test for memory growth
+Drives TimerState, UI.draw and AudioSystem (and optionally the match history)
+headless through days of simulated club nights on an accelerated virtual
+clock. Takes tracemalloc snapshots and RSS samples along the way and fails
+if memory grows past a bound or keeps trending upward, listing the top
+allocation sites.
+
+Usage:
+    python soak.py                               # 2 simulated days
+    python soak.py --days 0.25                   # quick check, about a minute
+    python soak.py --days 7 --history -o soak.json
+"""
+
+import argparse
+import gc
+import json
+import os
+import random
+import sys
+import tempfile
+import time
+import tracemalloc
+
+# Headless drivers, must be set before pygame initialises
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import pygame
+import config
+from src.game_state import GameState, TimerState, VirtualClock
+from src.metrics import resident_memory
+from src.phases import schedule
+
+# Allocations of the harness itself and of the import machinery
+IGNORED_FILES = (tracemalloc.__file__, os.path.abspath(__file__), '<frozen importlib._bootstrap>',
+                 '<frozen importlib._bootstrap_external>', '<unknown>')
+
+
+class ClubNight:
+    """Plays frames like a referee would: shots reset or expire, balls roll,
+    frames get paused, reset early or run out, with breaks in between
+    """
+
+    def __init__(self, timer_state, seed):
+        self.timer_state = timer_state
+        self.random = random.Random(seed)
+        self.next_action = timer_state.clock() + self.random.uniform(5, 60)
+        self.frame_end = None
+        self.rolling_until = None
+        self.paused_until = None
+
+    def step(self):
+        ts = self.timer_state
+        now = ts.clock()
+        if self.rolling_until is not None and now >= self.rolling_until:
+            ts.set_balls_rolling(False)
+            self.rolling_until = None
+        if self.paused_until is not None and now >= self.paused_until:
+            ts.pause_frame()
+            self.paused_until = None
+        if now < self.next_action or self.rolling_until or self.paused_until:
+            return
+
+        if ts.state == GameState.IDLE:
+            if self.frame_end is None:
+                ts.start_frame()
+                # Most frames are decided early, some run out of frame time
+                self.frame_end = now + self.random.uniform(180, config.FRAME_DURATION + 60)
+                self._next_shot(now)
+            else:
+                self.frame_end = None
+                self.next_action = now + self.random.uniform(30, 300)  # Break between frames
+            return
+
+        if now >= self.frame_end:
+            ts.reset_frame()
+            self.next_action = now
+            return
+
+        roll = self.random.random()
+        if roll < 0.02:
+            ts.pause_frame()
+            self.paused_until = now + self.random.uniform(10, 90)
+        elif roll < 0.25:
+            ts.set_balls_rolling(True)
+            self.rolling_until = now + self.random.uniform(1, 6)
+        else:
+            ts.reset_shot()
+        self._next_shot(now)
+
+    def _next_shot(self, now):
+        # Slightly past the shot time now and then, so shots also expire
+        self.next_action = now + self.random.uniform(2, schedule().phases[0].shot_time + 3)
+
+
+def take_snapshot():
+    gc.collect()
+    snapshot = tracemalloc.take_snapshot()
+    return snapshot.filter_traces([tracemalloc.Filter(False, name) for name in IGNORED_FILES])
+
+
+def traced_size(snapshot):
+    return sum(stat.size for stat in snapshot.statistics('filename'))
+
+
+def slope(xs, ys):
+    """Least-squares slope of ys over xs"""
+    n = len(xs)
+    mean_x = sum(xs) / n
+    mean_y = sum(ys) / n
+    var_x = sum((x - mean_x) ** 2 for x in xs)
+    if not var_x:
+        return 0.0
+    return sum((x - mean_x) * (y - mean_y) for x, y in zip(xs, ys)) / var_x
+
+
+def top_sites(snapshot, baseline, limit):
+    """Call sites whose retained memory grew the most since the baseline"""
+    sites = []
+    for stat in snapshot.compare_to(baseline, 'traceback')[:limit]:
+        if stat.size_diff <= 0:
+            break
+        frames = [f"{frame.filename}:{frame.lineno}" for frame in stat.traceback[-4:]]
+        sites.append({'size_diff': stat.size_diff, 'count_diff': stat.count_diff, 'traceback': frames})
+    return sites
+
+
+def run(args):
+    pygame.display.init()
+    screen = pygame.display.set_mode(args.resolution)
+    clock = VirtualClock()
+    timer_state = TimerState(clock=clock)
+    night = ClubNight(timer_state, args.seed)
+
+    from src.ui import UI
+    from src.audio import AudioSystem
+    ui = UI(screen)
+    audio = AudioSystem()
+    if not audio.ready:
+        print("audio: sound disabled or mixer unavailable - not exercised")
+
+    recorder = writer = None
+    if args.history:
+        from src.history import HistoryWriter, MatchRecorder
+        db_dir = tempfile.mkdtemp(prefix='soak-')
+        writer = HistoryWriter(os.path.join(db_dir, 'history.db'), flush_interval=0.5)
+        writer.start()
+        recorder = MatchRecorder(writer, 'soak')
+
+    tracemalloc.start(args.trace_depth)
+    total = args.days * 86400
+    warmup = args.warmup_hours * 3600
+    sample_every = args.sample_minutes * 60
+    print(f"Simulating {args.days:g} days at {args.step:g}s per iteration, "
+          f"{int(total / args.step)} iterations, {args.resolution[0]}x{args.resolution[1]}")
+
+    samples = []
+    baseline = None
+    iterations = 0
+    elapsed = 0.0
+    next_sample = warmup
+    started = time.perf_counter()
+    while elapsed < total:
+        clock.advance(args.step)
+        elapsed += args.step
+        night.step()
+        timer_state.update()
+        audio.update(timer_state)
+        ui.draw(timer_state, flip=False)
+        if recorder:
+            recorder.observe(timer_state)
+        iterations += 1
+
+        if elapsed >= next_sample:
+            next_sample += sample_every
+            snapshot = take_snapshot()
+            if baseline is None:
+                baseline = snapshot
+            sample = {
+                'hours': round(elapsed / 3600, 3),
+                'iterations': iterations,
+                'traced_bytes': traced_size(snapshot),
+                'peak_bytes': tracemalloc.get_traced_memory()[1],
+                'rss_bytes': resident_memory(),
+                'frames_started': timer_state.frames_started,
+                'wall_seconds': round(time.perf_counter() - started, 1),
+            }
+            tracemalloc.reset_peak()
+            samples.append(sample)
+            rss = f"{sample['rss_bytes'] / 2**20:7.1f} MB" if sample['rss_bytes'] else '      ?'
+            print(f"{sample['hours']:7.1f} h  {iterations:9d} it  traced {sample['traced_bytes'] / 1024:9.1f} KB"
+                  f"  rss {rss}  frames {timer_state.frames_started}")
+
+    if writer:
+        writer.stop()
+    final = take_snapshot()
+    tracemalloc.stop()
+    pygame.quit()
+    return evaluate(args, samples, baseline, final, iterations, time.perf_counter() - started)
+
+
+def evaluate(args, samples, baseline, final, iterations, wall):
+    failures = []
+    if len(samples) < 3:
+        failures.append("too few samples after warm-up - raise --days or lower --sample-minutes")
+        return {'samples': samples, 'failures': failures, 'top_sites': []}
+
+    first, last = samples[0], samples[-1]
+    traced_growth = last['traced_bytes'] - first['traced_bytes']
+    hours = [s['hours'] for s in samples]
+    traced_trend = slope(hours, [s['traced_bytes'] for s in samples])
+    # Retained bytes per iteration (= per rendered frame) over the whole run
+    per_frame = traced_growth / max(1, last['iterations'] - first['iterations'])
+
+    if traced_growth > args.max_traced_growth * 1024:
+        failures.append(f"Python heap grew {traced_growth / 1024:.1f} KB (limit {args.max_traced_growth} KB)")
+    if traced_trend > args.max_trend * 1024:
+        failures.append(f"Python heap trends upward by {traced_trend / 1024:.2f} KB per simulated hour "
+                        f"(limit {args.max_trend} KB/h)")
+    rss_growth = None
+    if first['rss_bytes'] and last['rss_bytes']:
+        rss_growth = last['rss_bytes'] - first['rss_bytes']
+        if rss_growth > args.max_rss_growth * 2**20:
+            failures.append(f"RSS grew {rss_growth / 2**20:.1f} MB (limit {args.max_rss_growth} MB)")
+
+    print(f"\n{iterations} iterations in {wall:.0f}s wall time ({iterations / wall:.0f}/s)")
+    print(f"Python heap: {traced_growth / 1024:+.1f} KB, trend {traced_trend / 1024:+.3f} KB/h, "
+          f"{per_frame:+.3f} bytes per frame")
+    if rss_growth is not None:
+        print(f"RSS: {rss_growth / 2**20:+.1f} MB")
+
+    sites = top_sites(final, baseline, args.top)
+    if sites:
+        print("\nTop allocation sites since warm-up:")
+        for site in sites:
+            print(f"  {site['size_diff'] / 1024:+9.1f} KB  {site['count_diff']:+7d} blocks  {site['traceback'][-1]}")
+            for frame in reversed(site['traceback'][:-1]):
+                print(f"  {'':29}from {frame}")
+
+    print()
+    for failure in failures:
+        print(f"FAIL: {failure}")
+    if not failures:
+        print("PASS: no memory growth beyond the limits")
+    return {
+        'iterations': iterations,
+        'wall_seconds': round(wall, 1),
+        'traced_growth_bytes': traced_growth,
+        'traced_trend_bytes_per_hour': round(traced_trend, 1),
+        'bytes_per_frame': round(per_frame, 4),
+        'rss_growth_bytes': rss_growth,
+        'samples': samples,
+        'top_sites': sites,
+        'failures': failures,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Headless soak test for memory growth")
+    parser.add_argument('--days', type=float, default=2.0, help="simulated days")
+    parser.add_argument('--step', type=float, default=1.0,
+                        help="virtual seconds per loop iteration (one rendered frame each)")
+    parser.add_argument('--resolution', type=lambda s: tuple(map(int, s.split('x'))), default=(800, 480),
+                        help="display size, e.g. 1920x1080")
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('--history', action='store_true', help="also record to a temporary match history")
+    parser.add_argument('--warmup-hours', type=float, default=1.0, help="simulated hours before the baseline")
+    parser.add_argument('--sample-minutes', type=float, default=60.0, help="simulated minutes between samples")
+    parser.add_argument('--max-traced-growth', type=float, default=256.0,
+                        help="allowed Python heap growth after warm-up in KB")
+    parser.add_argument('--max-trend', type=float, default=4.0,
+                        help="allowed Python heap trend in KB per simulated hour")
+    parser.add_argument('--max-rss-growth', type=float, default=16.0, help="allowed RSS growth in MB")
+    parser.add_argument('--trace-depth', type=int, default=8, help="stack frames stored per allocation")
+    parser.add_argument('--top', type=int, default=10, help="allocation sites to report")
+    parser.add_argument('-o', '--output', help="write samples and the verdict as JSON")
+    args = parser.parse_args()
+
+    report = run(args)
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.output}")
+    return 1 if report['failures'] else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,90 @@
+"""Image asset pipeline: scale once, convert to the display format, cache on disk"""
+import hashlib
+import io
+import logging
+import os
+import pygame
+import config
+
+
+logger = logging.getLogger(__name__)
+
+CACHE_VERSION = 1
+# Byte orders pygame.image.frombytes/tobytes can round-trip without conversion
+BYTE_ORDERS = ('RGBA', 'BGRA', 'ARGB')
+
+
+def cache_dir():
+    """Directory for prescaled images"""
+    return config.ASSET_CACHE_DIR or os.path.join(os.path.expanduser('~'), '.cache', 'snooker-shotclock')
+
+
+def display_byte_order():
+    """Memory byte order of alpha surfaces in the display format (e.g. 'BGRA')
+
+    Returns:
+        str or None if no display mode is set or the format has no byte-order name
+    """
+    try:
+        probe = pygame.Surface((1, 1), pygame.SRCALPHA).convert_alpha()
+    except pygame.error:
+        return None
+    if probe.get_bitsize() != 32:
+        return None
+    # Little-endian: a channel with shift 0 is the first byte in memory
+    channels = sorted(zip(probe.get_shifts(), 'RGBA'))
+    order = ''.join(channel for _, channel in channels)
+    return order if order in BYTE_ORDERS else None
+
+
+def source_digest(source):
+    """Short content hash of a source image, part of every cache key"""
+    return hashlib.sha256(source).hexdigest()[:16]
+
+
+def cache_path(source_path, digest, size, byte_order, directory=None):
+    """Cache file for a source image at a given size and pixel format"""
+    stem = os.path.splitext(os.path.basename(source_path))[0]
+    return os.path.join(
+        directory or cache_dir(),
+        f"{stem}-{size[0]}x{size[1]}-{byte_order}-v{CACHE_VERSION}-{digest}.bin",
+    )
+
+
+def load_image(path, size, directory=None):
+    """Load an image scaled to `size`, ready to blit on the display
+
+    A cache hit skips PNG decoding and smoothscale: the raw pixels are read
+    in the display's byte order, so the final convert_alpha is a plain copy.
+    Without a display mode the scaled, unconverted surface is returned.
+    """
+    with open(path, 'rb') as f:
+        source = f.read()
+    digest = source_digest(source)
+    byte_order = display_byte_order()
+
+    cached = cache_path(path, digest, size, byte_order, directory) if byte_order else None
+    if cached and os.path.exists(cached):
+        try:
+            with open(cached, 'rb') as f:
+                data = f.read()
+            if len(data) == size[0] * size[1] * 4:
+                return pygame.image.frombytes(data, size, byte_order).convert_alpha()
+        except (OSError, ValueError, pygame.error) as e:
+            logger.warning("Ignoring broken asset cache %s: %s", cached, e)
+
+    image = pygame.image.load(io.BytesIO(source), os.path.basename(path))
+    image = pygame.transform.smoothscale(image, size)
+    if not byte_order:
+        return image
+    image = image.convert_alpha()
+    try:
+        os.makedirs(os.path.dirname(cached), exist_ok=True)
+        tmp_path = f"{cached}.{os.getpid()}.tmp"
+        with open(tmp_path, 'wb') as f:
+            f.write(pygame.image.tobytes(image, byte_order))
+        os.replace(tmp_path, cached)
+    except OSError as e:
+        # A read-only cache must never stop the clock from starting
+        logger.warning("Could not write asset cache %s: %s", cached, e)
+    return image
@@ -0,0 +1,195 @@
+"""asyncio driver for the main loop (MAIN_LOOP = 'asyncio')
+
+The synchronous loop polls every subsystem FPS times a second whether
+anything happened or not. Here the sources wake the loop themselves, and a
+pass (input, config, timers, audio, GPIO, render - the MainLoop steps) only
+runs when one did:
+
+- pygame events: SDL has no file descriptor to wait on, so a task drains
+  the event queue every ASYNC_EVENT_INTERVAL (cheap while it is empty)
+- remote and controller commands and GPIO buttons: their threads call
+  wake_threadsafe() through CommandQueue.on_put
+- timer deadlines: the loop sleeps exactly until the next shown digit,
+  tick, zonk or phase change is due (next_change()), so cues are on time
+  without polling
+- network clients: the remote control server runs on this event loop
+  instead of its own thread
+- everything else (config reloads, startup, watchdog, sync packets) at
+  least every ASYNC_IDLE_INTERVAL
+
+A frame is drawn only when what it shows changed, at most FPS times a
+second. While the shot progress bar moves that is every frame; without it
+a running clock draws about twice a second and an idle one not at all.
+"""
+import asyncio
+import logging
+import math
+import time
+import pygame
+import config
+from src.game_state import GameState
+from src.governor import STATIC
+from src.metrics import metrics
+
+
+EPSILON = 0.001  # Wake this long after a boundary, so the new value is already there
+DRAW_SLACK = 0.002  # Timer wake-ups may come this much early, still draw then
+
+# Never used by InputHandler, a touched stick would otherwise wake the loop all the time
+IGNORED_EVENTS = [pygame.JOYAXISMOTION, pygame.JOYBALLMOTION, pygame.JOYHATMOTION]
+
+logger = logging.getLogger(__name__)
+
+
+def next_change(timer_state):
+    """Seconds until a shown digit, a tick, the zonk or the next phase is due
+
+    Returns:
+        float: Time from the timer's last update, None while the clock stands
+    """
+    if timer_state.state != GameState.RUNNING:
+        return None
+    frame = timer_state.frame_time_remaining
+    phase = timer_state.get_phase()  # Also sets up the schedule
+    lower, _ = timer_state.schedule.bounds(phase)
+    # MM:SS rounds down, the shot seconds round up
+    wait = min(frame - math.floor(frame), frame - lower)
+    shot = timer_state.shot_time_remaining
+    if not timer_state.balls_rolling and shot > 0:
+        wait = min(wait, shot - (math.ceil(shot) - 1))
+    return wait + EPSILON
+
+
+class AsyncMainLoop:
+    """Runs the MainLoop steps when something happened instead of every frame"""
+
+    def __init__(self, main_loop):
+        self.main = main_loop
+        self._loop = None
+        self._wake = None
+        self._drawn_key = None
+        self._last_draw = float('-inf')
+        self._events = []  # Taken from the pygame queue, handled in the next pass
+
+    def wake(self):
+        """Run a pass as soon as possible (event loop thread)"""
+        self._wake.set()
+
+    def wake_threadsafe(self):
+        """wake() from another thread"""
+        self._loop.call_soon_threadsafe(self._wake.set)
+
+    async def run(self):
+        main = self.main
+        self._loop = asyncio.get_running_loop()
+        self._wake = asyncio.Event()
+        pygame.event.set_blocked(IGNORED_EVENTS)
+        main.command_queue.on_put = self.wake_threadsafe
+        tasks = [asyncio.create_task(self._poll_events(), name='events')]
+        if main.remote_server:
+            server = asyncio.create_task(main.remote_server.serve(), name='remote-control')
+            server.add_done_callback(self._server_done)
+            tasks.append(server)
+        logger.info("asyncio main loop running")
+        try:
+            await self._passes()
+        finally:
+            pygame.event.set_allowed(IGNORED_EVENTS)
+            main.command_queue.on_put = None
+            if main.remote_server:
+                main.remote_server.stop()
+            tasks[0].cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    def _server_done(self, task):
+        if not task.cancelled() and task.exception():
+            logger.error("Failed to start remote control: %s", task.exception())
+            self.main.remote_server = None
+
+    async def _poll_events(self):
+        """Wake the loop when pygame has events (or the timing process changed something)"""
+        main = self.main
+        discrete = None
+        while True:
+            await asyncio.sleep(config.ASYNC_EVENT_INTERVAL)
+            # get() instead of peek(): peeking loses the attributes of posted events (pygame 2)
+            events = pygame.event.get()
+            if events:
+                self._events.extend(events)
+                self.wake()
+            elif main.timing_process:
+                # Buttons and controllers act on the timing process directly
+                timer_state = main.timer_state
+                timer_state.update()
+                key = (timer_state.state, timer_state.balls_rolling, timer_state.frames_started,
+                       timer_state.shots_started)
+                if key != discrete:
+                    discrete = key
+                    self.wake()
+
+    def _animating(self):
+        """The progress bar or the performance HUD changes every frame"""
+        timer_state = self.main.timer_state
+        governor = self.main.governor
+        if self.main.perf_control.hud:
+            return True
+        return (self.main.ui.shot_progress is not None and timer_state.state == GameState.RUNNING
+                and not timer_state.balls_rolling and timer_state.shot_time_remaining > 0
+                and not (governor and governor.level >= STATIC))
+
+    async def _passes(self):
+        main = self.main
+        timeout = 0.0
+        while True:
+            idle_start = time.monotonic()
+            timer = self._loop.call_later(timeout, self._wake.set) if timeout > 0 else None
+            if timer is None:
+                await asyncio.sleep(0)  # Let the other tasks run between back-to-back passes
+            else:
+                await self._wake.wait()
+                timer.cancel()
+            self._wake.clear()
+            main.mark('sleep')
+            start = time.perf_counter()
+            idle = time.monotonic() - idle_start
+            if main.watchdog:
+                main.watchdog.heartbeat(idle=idle)
+
+            main.begin(idle)
+            events, self._events = self._events, []
+            running = main.handle_input(events)
+            main.apply_config()
+            if not main.update():
+                break
+
+            # Draw when something shown changed, but not more often than FPS
+            now = time.monotonic()
+            frame_budget = 1.0 / config.FPS
+            key = main.ui.content_key(main.timer_state)
+            animating = self._animating()
+            draw_due = None
+            if key != self._drawn_key or animating or main.startup.ready_at is None:
+                draw_due = self._last_draw + frame_budget
+                if now >= draw_due - DRAW_SLACK:
+                    if main.render():
+                        metrics.observe_frame(time.perf_counter() - start)
+                    self._drawn_key = key
+                    # Keep the FPS grid while animating, a late frame does not push back the next
+                    self._last_draw = max(draw_due, now - frame_budget) if animating else now
+                    draw_due = self._last_draw + frame_budget if animating else None
+            main.end(time.perf_counter() - start)
+            if not running:
+                break
+
+            # Sleep until the next draw, timer change or housekeeping, whichever comes first
+            timeout = config.ASYNC_IDLE_INTERVAL
+            if main.startup.ready_at is None:
+                timeout = min(timeout, frame_budget)
+            if draw_due is not None:
+                timeout = min(timeout, draw_due - now)
+            change = next_change(main.timer_state)
+            if change is not None:
+                timeout = min(timeout, change)
+            if main.sync_leader:
+                timeout = min(timeout, main.sync_leader.interval)
+            timeout = max(timeout, 0.0)
@@ -1,93 +1,133 @@
 """Audio system for warnings and notifications"""
+import logging
 import pygame
 import os
 import math
+import threading
+import time
 import config
+from src import phases
+from src.metrics import metrics
+
+
+logger = logging.getLogger(__name__)
 
 
 class AudioSystem:
     """Manages sound effects and voice announcements"""
     
-    def __init__(self):
+    def __init__(self, defer_load=False):
         self.enabled = config.SOUND_ENABLED
-        if self.enabled:
-            pygame.mixer.init()
-            pygame.mixer.music.set_volume(config.SOUND_VOLUME)
-            
-            # Load zonk sound
-            zonk_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'assets', 'sounds', 'zonk.mp3')
-            try:
-                self.zonk_sound = pygame.mixer.Sound(zonk_path)
-                self.zonk_sound.set_volume(config.SOUND_VOLUME)
-                print(f"Zonk sound loaded from {zonk_path}")
-            except Exception as e:
-                print(f"Failed to load zonk sound: {e}")
-                self.zonk_sound = None
-            
-            # Load voice announcement WAV files
-            announcement_15_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), config.ANNOUNCEMENT_15_SECONDS)
-            announcement_10_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), config.ANNOUNCEMENT_10_SECONDS)
-            
-            try:
-                self.announcement_15 = pygame.mixer.Sound(announcement_15_path)
-                self.announcement_15.set_volume(config.SOUND_VOLUME)
-                print(f"15 seconds announcement loaded from {announcement_15_path}")
-            except Exception as e:
-                print(f"Failed to load 15 seconds announcement: {e}")
-                self.announcement_15 = None
-            
-            try:
-                self.announcement_10 = pygame.mixer.Sound(announcement_10_path)
-                self.announcement_10.set_volume(config.SOUND_VOLUME)
-                print(f"10 seconds announcement loaded from {announcement_10_path}")
-            except Exception as e:
-                print(f"Failed to load 10 seconds announcement: {e}")
-                self.announcement_10 = None
-            
+        self.ready = False  # True once the mixer is up and sounds are decoded
+        self.zonk_sound = None
+        self.announcements = {}  # Announcement file of a phase -> Sound
+        self.tick_sound = None
+        
         self.last_second = None  # Track which second we're at for beeps
         self.shot_expired_played = False  # Track if we played the expiry sound
         self.frame_expired_played = False  # Track if we played frame expiry sound
-        self.announced_15s = False  # Track if we announced 15s
-        self.announced_10s = False  # Track if we announced 10s
+        self.announced_phase = None  # Index of the phase whose announcement was played
         
-    def announce_shot_clock(self, seconds):
-        """Announce shot clock time with WAV file"""
+        if not defer_load:
+            self.load()
+        
+    def load(self):
+        """Initialize the mixer and decode all sounds (may run on a background thread)"""
+        if not self.enabled:
+            return
+        pygame.mixer.init()
+        pygame.mixer.music.set_volume(config.SOUND_VOLUME)
+        
+        # Load zonk sound
+        zonk_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'assets', 'sounds', 'zonk.mp3')
+        try:
+            self.zonk_sound = pygame.mixer.Sound(zonk_path)
+            self.zonk_sound.set_volume(config.SOUND_VOLUME)
+            logger.info("Zonk sound loaded from %s", zonk_path)
+        except Exception as e:
+            logger.error("Failed to load zonk sound: %s", e)
+            self.zonk_sound = None
+        
+        self.load_announcements()
+        self.tick_sound = self._make_tick_sound()
+        self.ready = True
+        
+    def load_announcements(self):
+        """Load the voice announcement WAV files of all phases"""
+        announcements = {}
+        for phase in phases.schedule().phases:
+            if not phase.announcement or phase.announcement in announcements:
+                continue
+            path = os.path.join(os.path.dirname(os.path.dirname(__file__)), phase.announcement)
+            try:
+                sound = pygame.mixer.Sound(path)
+                sound.set_volume(config.SOUND_VOLUME)
+                announcements[phase.announcement] = sound
+                logger.info("%s seconds announcement loaded from %s", phase.shot_time, path)
+            except Exception as e:
+                logger.error("Failed to load %s seconds announcement: %s", phase.shot_time, e)
+        # Swapped in one step, the old sounds play until then
+        self.announcements = announcements
+        
+    def apply_config(self, changed):
+        """React to reloaded settings (names of the config values that changed)"""
+        if 'SOUND_ENABLED' in changed:
+            self.enabled = config.SOUND_ENABLED
+            if self.enabled and not self.ready:
+                threading.Thread(target=self.load, name="audio-load", daemon=True).start()
+                return
+        if not self.ready:
+            return
+        if 'SOUND_VOLUME' in changed:
+            # Volume is a property of the loaded sounds - no need to decode anything again
+            pygame.mixer.music.set_volume(config.SOUND_VOLUME)
+            for sound in (self.zonk_sound, *self.announcements.values()):
+                if sound:
+                    sound.set_volume(config.SOUND_VOLUME)
+            if self.tick_sound:
+                self.tick_sound.set_volume(config.SOUND_VOLUME * 0.3)
+        if set(phases.PHASE_SETTINGS) & set(changed):
+            # Decode new files off the render thread, the old sounds play until they are swapped
+            threading.Thread(target=self.load_announcements, name="audio-load", daemon=True).start()
+        
+    def announce_shot_clock(self, phase):
+        """Announce the shot clock time of a phase with its WAV file"""
         if not self.enabled:
             return
             
-        print(f"Announcement: {seconds} seconds shot clock")
+        logger.info("Announcement: %s seconds shot clock", phase.shot_time)
         
-        if seconds == 15 and self.announcement_15:
-            self.announcement_15.play()
-        elif seconds == 10 and self.announcement_10:
-            self.announcement_10.play()
+        sound = self.announcements.get(phase.announcement)
+        if sound:
+            sound.play()
     
     def update(self, timer_state):
         """Update audio based on timer state"""
-        if not self.enabled:
+        if not self.enabled or not self.ready:
             return
             
         # Reset announcement flags when not running
         if timer_state.state.value != "running":
-            self.announced_15s = False
-            self.announced_10s = False
+            # TimerState switches to idle in the update where the frame time runs out
+            if timer_state.frame_time_remaining <= 0:
+                if not self.frame_expired_played:
+                    logger.info("Frame time expired! Playing zonk")
+                    self._play_zonk()
+                    self.frame_expired_played = True
+                return
+            self.announced_phase = None
             self.frame_expired_played = False
             return
         
-        # Check for shot clock announcements at frame start
-        if not self.announced_15s and timer_state.frame_time_remaining > config.FIRST_HALF_DURATION:
-            # First half - 15 seconds
-            self.announce_shot_clock(15)
-            self.announced_15s = True
-        
-        # Announcement at 5 minute mark (switch to 10 seconds)
-        if not self.announced_10s and timer_state.frame_time_remaining <= config.FIRST_HALF_DURATION:
-            self.announce_shot_clock(10)
-            self.announced_10s = True
+        # Announce each phase's shot time when it begins (the first one at frame start)
+        phase = timer_state.get_phase()
+        if phase != self.announced_phase:
+            self.announce_shot_clock(timer_state.schedule.phases[phase])
+            self.announced_phase = phase
         
         # Play ZONK when frame time expires (10 minutes up)
         if timer_state.frame_time_remaining <= 0 and not self.frame_expired_played:
-            print("Frame time expired! Playing zonk")
+            logger.info("Frame time expired! Playing zonk")
             self._play_zonk()
             self.frame_expired_played = True
             return
@@ -103,23 +143,22 @@ class AudioSystem:
         # Play tick sound every second from 5 to 1
         if shot_time <= 5 and shot_time >= 1:
             if self.last_second != shot_time:
-                self._play_tick()
+                # The timer crossed `shot_time` this late before we noticed (up to one frame)
+                self._play_tick(shot_time - timer_state.shot_time_remaining)
                 self.last_second = shot_time
         else:
             self.last_second = None
         
         # Play ZONK when shot timer expires
         if shot_time <= 0 and not self.shot_expired_played:
-            print("Shot time expired! Playing zonk")
+            logger.info("Shot time expired! Playing zonk")
             self._play_zonk()
             self.shot_expired_played = True
         elif shot_time > 0:
             self.shot_expired_played = False
     
-    def _play_tick(self):
-        """Play a tick sound (generated)"""
-        if not self.enabled:
-            return
+    def _make_tick_sound(self):
+        """Generate the tick sound once, so ticks don't allocate while running"""
         try:
             # Generate a short beep sound
             import numpy as np
@@ -142,9 +181,17 @@ class AudioSystem:
             
             sound = pygame.sndarray.make_sound(stereo_wave)
             sound.set_volume(config.SOUND_VOLUME * 0.3)  # Quieter tick
-            sound.play()
+            return sound
         except Exception as e:
-            pass  # Silently fail if numpy not available
+            return None  # Silently fail if numpy not available
+    
+    def _play_tick(self, lateness=0.0):
+        """Play a tick sound (generated)"""
+        if not self.enabled or not self.tick_sound:
+            return
+        started = time.perf_counter()
+        self.tick_sound.play()
+        metrics.audio_latency.observe(lateness + time.perf_counter() - started)
     
     def _play_zonk(self):
         """Play the ZONK sound"""
@@ -152,6 +199,8 @@ class AudioSystem:
             return
         try:
             # Play for 1 second max
+            started = time.perf_counter()
             self.zonk_sound.play(maxtime=1000)
+            metrics.audio_latency.observe(time.perf_counter() - started)
         except Exception as e:
-            print(f"Failed to play zonk: {e}")
+            logger.warning("Failed to play zonk: %s", e)
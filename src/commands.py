@@ -0,0 +1,81 @@
+"""Command dispatch for input sources that run outside the main loop"""
+import queue
+import threading
+from src.metrics import metrics
+
+
+# Command names accepted from remote clients, mapped to TimerState actions
+COMMANDS = {
+    'start': lambda timer_state, args: timer_state.start_frame(),
+    'pause': lambda timer_state, args: timer_state.pause_frame(),
+    'reset-frame': lambda timer_state, args: timer_state.reset_frame(),
+    'reset-shot': lambda timer_state, args: timer_state.reset_shot(),
+    'balls-rolling': lambda timer_state, args: timer_state.set_balls_rolling(bool(args.get('rolling', True))),
+    'undo': lambda timer_state, args: timer_state.undo(),
+    'redo': lambda timer_state, args: timer_state.redo(),
+}
+
+
+def apply_command(timer_state, name, args=None, at=None):
+    """Apply a named command to the timer state
+
+    Args:
+        at: clock() time the input happened, None = now (see TimerState.at)
+    """
+    if at is None:
+        COMMANDS[name](timer_state, args or {})
+    else:
+        with timer_state.at(at):
+            COMMANDS[name](timer_state, args or {})
+
+
+class CommandQueue:
+    """Thread-safe queue that hands commands over to the main loop
+
+    Producers (network and controller threads) only enqueue, so they never
+    wait on the renderer. The main loop drains the queue once per iteration.
+    """
+
+    def __init__(self):
+        self._queue = queue.SimpleQueue()
+        self.on_put = None  # Called after every put (from the producer's thread), wakes the asyncio loop
+        self.queued = 0   # Number of the last queued command
+        self.applied = 0  # Number of the last applied command - commands are applied in order
+        self._lock = threading.Lock()  # Numbers and queue order must match
+
+    def put(self, name, args=None, source='remote', at=None):
+        """Queue a command, raises ValueError for unknown commands
+
+        Args:
+            source: Input source label for the metrics
+            at: Timestamp of the input, applied as of then (see apply_command)
+
+        Returns:
+            int: Number of the command, `applied` reaches it once it took effect
+        """
+        if name not in COMMANDS:
+            raise ValueError(f"Unknown command: {name}")
+        with self._lock:
+            self.queued += 1
+            number = self.queued
+            self._queue.put((number, name, args or {}, source, at))
+        if self.on_put:
+            self.on_put()
+        return number
+
+    def process(self, timer_state):
+        """Apply all pending commands - call this every frame
+
+        Returns:
+            int: Number of commands applied
+        """
+        count = 0
+        while True:
+            try:
+                number, name, args, source, at = self._queue.get_nowait()
+            except queue.Empty:
+                return count
+            apply_command(timer_state, name, args, at)
+            self.applied = number
+            metrics.input_events.inc_label(source)
+            count += 1
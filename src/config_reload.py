@@ -0,0 +1,267 @@
+"""Hot reload of config overrides from an external TOML or JSON file
+
+The override file is watched on a background thread. Parsing and validation
+happen there too; the main loop only calls apply_pending() between frames,
+which swaps the new values into the config module in one step. A file with
+any invalid value is rejected as a whole and the running config is kept.
+"""
+import json
+import logging
+import os
+import queue
+import threading
+import config
+from src import phases
+
+try:
+    import tomllib  # Python 3.11+
+except ImportError:
+    tomllib = None
+
+
+logger = logging.getLogger(__name__)
+
+
+# Numeric limits for values that would break rendering or timing
+RANGES = {
+    'SCREEN_WIDTH': (160, 7680),
+    'SCREEN_HEIGHT': (120, 4320),
+    'FPS': (1, 240),
+    'FRAME_DURATION': (1, 24 * 60 * 60),
+    'FIRST_HALF_DURATION': (0, 24 * 60 * 60),
+    'SHOT_TIME_FIRST_HALF': (1, 600),
+    'SHOT_TIME_SECOND_HALF': (1, 600),
+    'SHOT_WARNING_TIME': (0, 600),
+    'SHOT_CRITICAL_TIME': (0, 600),
+    'SOUND_VOLUME': (0.0, 1.0),
+    'BUTTON_START_PIN': (0, 27),
+    'BUTTON_RESET_PIN': (0, 27),
+    'UNDO_DEPTH': (0, 1000),
+    'TIMING_RATE': (10, 1000),
+    'CONTROLLER_POLL_RATE': (10, 1000),
+    'GOVERNOR_TEMP_HIGH': (30, 110),
+    'GOVERNOR_TEMP_LOW': (30, 110),
+    'GOVERNOR_LATE_RATIO': (0.0, 1.0),
+    'GOVERNOR_REDUCED_FPS': (1, 240),
+    'GOVERNOR_INTERVAL': (0.1, 60),
+    'GOVERNOR_STEP_SECONDS': (0, 3600),
+    'GOVERNOR_RECOVER_SECONDS': (0, 3600),
+    'ASYNC_EVENT_INTERVAL': (0.001, 0.1),
+    'ASYNC_IDLE_INTERVAL': (0.01, 1.0),
+}
+
+# Read once at startup - a change is accepted but only used after a restart
+RESTART_REQUIRED = {
+    'REMOTE_ENABLED', 'REMOTE_HOST', 'REMOTE_PORT',
+    'SPECTATOR_MAX_QUEUE', 'SPECTATOR_EVICT_TIMEOUT', 'SPECTATOR_WRITE_BUFFER',
+    'FRAME_OUTPUT_ENABLED', 'FRAME_OUTPUT_PATH', 'FRAME_OUTPUT_TRANSPARENT',
+    'STATE_FEED_ENABLED', 'STATE_FEED_PATH', 'ASSET_CACHE_DIR',
+    'CONFIG_OVERRIDE_PATH', 'CONFIG_WATCH_INTERVAL', 'METRICS_PORT', 'METRICS_TEXTFILE_PATH',
+    'METRICS_TEXTFILE_INTERVAL',
+    'WATCHDOG_ENABLED', 'WATCHDOG_STALL_SECONDS', 'WATCHDOG_RESTART', 'WATCHDOG_SYSTEMD',
+    'LOG_FILE', 'LOG_MAX_BYTES', 'LOG_BACKUP_COUNT', 'LOG_LEVEL', 'LOG_FORMAT', 'LOG_CONSOLE',
+    'LOG_RATE_LIMIT_SECONDS', 'HISTORY_ENABLED', 'HISTORY_DB_PATH', 'HISTORY_TABLE_ID', 'HISTORY_FLUSH_SECONDS',
+    'SYNC_ROLE', 'SYNC_GROUP', 'SYNC_PORT', 'SYNC_RATE', 'SYNC_INTERFACE', 'SYNC_TIMEOUT',
+    'PROCESS_ISOLATION', 'TIMING_RATE', 'TIMING_CPU', 'RENDER_CPU', 'TIMING_PRIORITY', 'UNDO_DEPTH',
+    'CONTROLLER_ENABLED', 'CONTROLLER_MAPPINGS_FILE', 'GOVERNOR_ENABLED',
+    'MAIN_LOOP',
+}
+
+
+class ConfigError(ValueError):
+    """The override file could not be parsed or contains invalid values"""
+
+
+def override_path(path=None):
+    """Absolute location of the override file (relative paths are relative to the project)"""
+    path = path or config.CONFIG_OVERRIDE_PATH
+    if not path:
+        return None
+    return os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), path)
+
+
+def parse(path):
+    """Read the override file into a dict of setting names to values"""
+    try:
+        with open(path, 'rb') as f:
+            data = f.read()
+        if path.endswith('.json'):
+            values = json.loads(data)
+        elif tomllib:
+            values = tomllib.loads(data.decode('utf-8'))
+        else:
+            raise ConfigError("TOML needs Python 3.11+, use a .json override file")
+    except (OSError, UnicodeDecodeError, ValueError) as e:
+        raise ConfigError(f"{path}: {e}") from e
+    if not isinstance(values, dict):
+        raise ConfigError(f"{path}: expected a table of settings")
+    return values
+
+
+def _check_value(name, value, current):
+    """Convert `value` to the type of the current setting or raise ConfigError"""
+    if name == 'PHASES':
+        if value is None:
+            return None
+        try:
+            return [tuple(phase) for phase in phases.parse_phases(value)]
+        except ValueError as e:
+            raise ConfigError(str(e)) from e
+    if name == 'CONTROLLER_BUTTONS':
+        from src.controller_input import parse_buttons
+        try:
+            parse_buttons(value)
+        except ValueError as e:
+            raise ConfigError(str(e)) from e
+        return dict(value)
+    if isinstance(current, bool):
+        if not isinstance(value, bool):
+            raise ConfigError(f"{name} must be true or false")
+        return value
+    if isinstance(current, (int, float)):
+        if isinstance(value, bool) or not isinstance(value, (int, float)):
+            raise ConfigError(f"{name} must be a number")
+        if isinstance(current, int) and value != int(value):
+            raise ConfigError(f"{name} must be a whole number")
+        value = int(value) if isinstance(current, int) else float(value)
+        if name in RANGES:
+            low, high = RANGES[name]
+            if not low <= value <= high:
+                raise ConfigError(f"{name} must be between {low} and {high}")
+        return value
+    if isinstance(current, tuple):
+        # Colours (r, g, b)
+        if (not isinstance(value, list) or len(value) != 3
+                or not all(isinstance(c, int) and not isinstance(c, bool) and 0 <= c <= 255 for c in value)):
+            raise ConfigError(f"{name} must be a colour [r, g, b] with values 0-255")
+        return tuple(value)
+    if isinstance(current, list):
+        # GPIO pin lists
+        if (not isinstance(value, list)
+                or not all(isinstance(p, int) and not isinstance(p, bool) and 0 <= p <= 27 for p in value)):
+            raise ConfigError(f"{name} must be a list of GPIO pins 0-27")
+        if len(set(value)) != len(value):
+            raise ConfigError(f"{name} contains a pin twice")
+        if name == 'LED_PINS':
+            from src.gpio_control import LED_COUNT
+            if len(value) != LED_COUNT:
+                raise ConfigError(f"LED_PINS must list exactly {LED_COUNT} pins")
+        return list(value)
+    if current is None:
+        # Optional settings (paths, ports) - no type to compare against
+        if isinstance(value, (dict, list)):
+            raise ConfigError(f"{name} must be a single value")
+        return value
+    if isinstance(current, str):
+        if not isinstance(value, str):
+            raise ConfigError(f"{name} must be a string")
+        return value
+    raise ConfigError(f"{name} cannot be changed")
+
+
+def validate(values):
+    """Check all overrides against the current config
+
+    Returns:
+        dict: Converted values that differ from the running config
+
+    Raises:
+        ConfigError: For unknown names or invalid values (nothing is applied then)
+    """
+    checked = {}
+    for name, value in values.items():
+        if not name.isupper() or not hasattr(config, name):
+            raise ConfigError(f"Unknown setting {name}")
+        checked[name] = _check_value(name, value, getattr(config, name))
+
+    # Cross checks on the config as it would look after applying
+    merged = lambda name: checked.get(name, getattr(config, name))
+    if merged('SHOT_CRITICAL_TIME') > merged('SHOT_WARNING_TIME'):
+        raise ConfigError("SHOT_CRITICAL_TIME must not be greater than SHOT_WARNING_TIME")
+    if merged('FIRST_HALF_DURATION') >= merged('FRAME_DURATION'):
+        raise ConfigError("FIRST_HALF_DURATION must be shorter than FRAME_DURATION")
+    if merged('GOVERNOR_TEMP_LOW') >= merged('GOVERNOR_TEMP_HIGH'):
+        raise ConfigError("GOVERNOR_TEMP_LOW must be lower than GOVERNOR_TEMP_HIGH")
+    pins = list(merged('LED_PINS')) + [merged('BUTTON_START_PIN'), merged('BUTTON_RESET_PIN')]
+    if len(set(pins)) != len(pins):
+        raise ConfigError("LED and button pins must all be different")
+
+    return {name: value for name, value in checked.items() if getattr(config, name) != value}
+
+
+class ConfigReloader:
+    """Watches the override file and hands validated changes to the main loop"""
+
+    def __init__(self, path=None, interval=None):
+        self.path = override_path(path)
+        self.interval = config.CONFIG_WATCH_INTERVAL if interval is None else interval
+        self._pending = queue.SimpleQueue()
+        self._stop = threading.Event()
+        self._thread = None
+        self._mtime = None
+
+    def load_now(self):
+        """Apply the override file synchronously (at startup, before components are created)"""
+        self._check()
+        return self.apply_pending()
+
+    def start(self):
+        """Start watching the file on a background thread"""
+        if not self.path:
+            return
+        self._thread = threading.Thread(target=self._watch, name="config-reload", daemon=True)
+        self._thread.start()
+        logger.info("Config: watching %s", self.path)
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=2)
+
+    def _watch(self):
+        while not self._stop.wait(self.interval):
+            self._check()
+
+    def _check(self):
+        """Parse and validate the file if it changed since the last check"""
+        if not self.path:
+            return
+        try:
+            mtime = os.stat(self.path).st_mtime_ns
+        except OSError:
+            mtime = None
+        if mtime == self._mtime:
+            return
+        self._mtime = mtime
+        if mtime is None:
+            # Removing the file keeps the current values, it does not restore defaults
+            return
+        try:
+            changes = validate(parse(self.path))
+        except ConfigError as e:
+            logger.warning("Config: ignoring %s: %s", self.path, e)
+            return
+        if changes:
+            self._pending.put(changes)
+
+    def apply_pending(self):
+        """Swap validated changes into the config module - call this between frames
+
+        Returns:
+            set: Names of the settings that changed (empty if nothing changed)
+        """
+        changed = set()
+        while True:
+            try:
+                changes = self._pending.get_nowait()
+            except queue.Empty:
+                break
+            for name, value in changes.items():
+                setattr(config, name, value)
+            changed.update(changes)
+        if changed:
+            logger.info("Config: reloaded %s", ', '.join(sorted(changed)))
+            later = changed & RESTART_REQUIRED
+            if later:
+                logger.warning("Config: %s take effect after a restart", ', '.join(sorted(later)))
+        return changed
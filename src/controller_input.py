@@ -0,0 +1,171 @@
+"""Game controllers on their own polling thread
+
+Pads from SDL's GameController mapping database (built in, plus
+CONTROLLER_MAPPINGS_FILE for pads SDL does not know) report their buttons
+by position - 'a' is always the bottom face button, whatever index the pad
+uses internally - so CONTROLLER_BUTTONS means the same on every pad. Any
+number of pads can be connected at once; they are opened and closed as
+they come and go (CONTROLLERDEVICEADDED/REMOVED, handled by InputHandler on
+the main thread, which owns the SDL event queue).
+
+The buttons are polled at CONTROLLER_POLL_RATE on a separate thread instead
+of once per rendered frame. Every press is timestamped when it is seen and
+goes through the CommandQueue; the main loop applies it as of that time
+(TimerState.at), so a slow frame delays showing a press, not its effect on
+the clocks. With PROCESS_ISOLATION the presses are sent straight to the
+timing process instead (TimingProcess.put) and don't wait for a frame at all.
+"""
+import logging
+import os
+import threading
+import time
+import pygame
+from pygame._sdl2 import controller
+import config
+from src.commands import COMMANDS
+
+
+logger = logging.getLogger(__name__)
+
+
+# Button names for CONTROLLER_BUTTONS, as in SDL mapping strings
+BUTTONS = {
+    'a': pygame.CONTROLLER_BUTTON_A,
+    'b': pygame.CONTROLLER_BUTTON_B,
+    'x': pygame.CONTROLLER_BUTTON_X,
+    'y': pygame.CONTROLLER_BUTTON_Y,
+    'back': pygame.CONTROLLER_BUTTON_BACK,
+    'guide': pygame.CONTROLLER_BUTTON_GUIDE,
+    'start': pygame.CONTROLLER_BUTTON_START,
+    'leftstick': pygame.CONTROLLER_BUTTON_LEFTSTICK,
+    'rightstick': pygame.CONTROLLER_BUTTON_RIGHTSTICK,
+    'leftshoulder': pygame.CONTROLLER_BUTTON_LEFTSHOULDER,
+    'rightshoulder': pygame.CONTROLLER_BUTTON_RIGHTSHOULDER,
+    'dpup': pygame.CONTROLLER_BUTTON_DPAD_UP,
+    'dpdown': pygame.CONTROLLER_BUTTON_DPAD_DOWN,
+    'dpleft': pygame.CONTROLLER_BUTTON_DPAD_LEFT,
+    'dpright': pygame.CONTROLLER_BUTTON_DPAD_RIGHT,
+}
+
+# Commands that follow the button while it is held: argument set to True on press, False on release
+HOLD_COMMANDS = {'balls-rolling': 'rolling'}
+
+IDLE_INTERVAL = 0.1  # Seconds between checks while no pad is connected
+
+
+def parse_buttons(value):
+    """Check a CONTROLLER_BUTTONS value and convert it to {SDL button: command}
+
+    Raises:
+        ValueError: Not a table of button names to command names
+    """
+    if not isinstance(value, dict):
+        raise ValueError("CONTROLLER_BUTTONS must be a table of button name = command")
+    buttons = {}
+    for name, command in value.items():
+        if name not in BUTTONS:
+            raise ValueError(f"CONTROLLER_BUTTONS: unknown button {name!r} (one of {', '.join(BUTTONS)})")
+        if command not in COMMANDS:
+            raise ValueError(f"CONTROLLER_BUTTONS: unknown command {command!r} for {name}")
+        buttons[BUTTONS[name]] = command
+    return buttons
+
+
+class ControllerInput:
+    """Polls all connected game controllers and queues their presses"""
+
+    def __init__(self, command_queue, clock=time.time):
+        self.command_queue = command_queue  # CommandQueue or TimingProcess
+        self.clock = clock  # Same time source as TimerState, presses are applied as of this time
+        self.buttons = parse_buttons(config.CONTROLLER_BUTTONS)
+        self._pads = {}  # instance id -> (Controller, pressed flags), replaced on hot-plug
+        self._lock = threading.Lock()  # Held while polling, so a pad is never closed mid-read
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        """Initialise the GameController subsystem and start polling - call on the main thread"""
+        if config.CONTROLLER_MAPPINGS_FILE:
+            # Read by SDL when the subsystem starts
+            os.environ['SDL_GAMECONTROLLERCONFIG_FILE'] = os.path.join(
+                os.path.dirname(os.path.dirname(os.path.abspath(__file__))), config.CONTROLLER_MAPPINGS_FILE)
+        controller.init()
+        # The poll thread reads the button state itself, only the hot-plug events are needed
+        pygame.event.set_blocked([pygame.CONTROLLERBUTTONDOWN, pygame.CONTROLLERBUTTONUP,
+                                  pygame.CONTROLLERAXISMOTION])
+        self._thread = threading.Thread(target=self._poll, name="controller-input", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=2)
+        for instance_id in list(self._pads):
+            self._close(instance_id)
+
+    def apply_config(self, changed):
+        """Apply reloaded settings (new button mapping)"""
+        if 'CONTROLLER_BUTTONS' in changed:
+            self.buttons = parse_buttons(config.CONTROLLER_BUTTONS)
+
+    def handle_event(self, event):
+        """Open or close a pad on CONTROLLERDEVICEADDED/REMOVED"""
+        if event.type == pygame.CONTROLLERDEVICEADDED:
+            self._open(event.device_index)
+        elif event.type == pygame.CONTROLLERDEVICEREMOVED:
+            self._close(event.instance_id)
+
+    def _open(self, device_index):
+        try:
+            pad = controller.Controller(device_index)
+            instance_id = pad.as_joystick().get_instance_id()
+        except pygame.error as e:
+            logger.warning("Could not open controller %d: %s", device_index, e)
+            return
+        if instance_id in self._pads:
+            return
+        with self._lock:
+            self._pads = {**self._pads, instance_id: (pad, [False] * pygame.CONTROLLER_BUTTON_MAX)}
+        logger.info("Controller connected: %s (%d connected)", pad.name, len(self._pads))
+
+    def _close(self, instance_id):
+        with self._lock:
+            pads = dict(self._pads)
+            entry = pads.pop(instance_id, None)
+            self._pads = pads
+            if entry:
+                entry[0].quit()
+        if entry:
+            logger.info("Controller disconnected: %s (%d connected)", entry[0].name, len(self._pads))
+
+    def _poll(self):
+        next_poll = time.monotonic()
+        while not self._stop.is_set():
+            if not self._pads:
+                self._stop.wait(IDLE_INTERVAL)
+                next_poll = time.monotonic()
+                continue
+            controller.update()
+            now = self.clock()
+            buttons = self.buttons
+            with self._lock:
+                for pad, pressed in self._pads.values():
+                    for button, command in buttons.items():
+                        down = pad.get_button(button)
+                        if down != pressed[button]:
+                            pressed[button] = down
+                            self._queue(command, down, now)
+            next_poll += 1.0 / config.CONTROLLER_POLL_RATE
+            delay = next_poll - time.monotonic()
+            if delay < 0:
+                next_poll = time.monotonic()  # Fell behind, don't try to catch up
+            self._stop.wait(max(0.0, delay))
+
+    def _queue(self, command, down, now):
+        if command in HOLD_COMMANDS:
+            args = {HOLD_COMMANDS[command]: down}
+        elif down:
+            args = None
+        else:
+            return
+        self.command_queue.put(command, args, source='joystick', at=now)
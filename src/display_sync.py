@@ -0,0 +1,294 @@
+"""Leader/follower sync for a second clock at the same table
+
+The leader (the clock the referee operates) multicasts compact timer state
+packets on the LAN - at SYNC_RATE and immediately on every start, reset or
+pause. Followers are render-only: they estimate the offset between their
+monotonic clock and the leader's NTP-style (ping/pong with four timestamps,
+the sample with the lowest round trip wins) and interpolate the countdown
+to the leader's "now", so both screens change digits at the same instant.
+
+Only depends on the standard library.
+"""
+import collections
+import logging
+import select
+import socket
+import struct
+import threading
+import time
+import config
+from src.game_state import GameState
+
+
+MAGIC = b'SSCY'
+VERSION = 1
+
+KIND_STATE = 1
+KIND_PING = 2
+KIND_PONG = 3
+
+# magic, version, kind, seq, leader timestamp, frame remaining, shot remaining,
+# shot limit, state, balls rolling, phase
+STATE_FORMAT = '<4sBBxxIddddBBBx'
+# magic, version, kind, seq, follower send time
+PING_FORMAT = '<4sBBxxId'
+# magic, version, kind, seq, follower send time, leader receive time, leader send time
+PONG_FORMAT = '<4sBBxxIddd'
+STATE_SIZE = struct.calcsize(STATE_FORMAT)  # 48 bytes
+PING_SIZE = struct.calcsize(PING_FORMAT)
+PONG_SIZE = struct.calcsize(PONG_FORMAT)
+
+STATES = (GameState.IDLE, GameState.RUNNING, GameState.PAUSED)
+STATE_CODES = {state: code for code, state in enumerate(STATES)}
+
+logger = logging.getLogger(__name__)
+
+LeaderState = collections.namedtuple('LeaderState', [
+    'seq', 'timestamp', 'frame_remaining', 'shot_remaining', 'shot_limit',
+    'state', 'balls_rolling', 'phase',
+])
+
+
+def _interface(address):
+    return socket.inet_aton(address or '0.0.0.0')
+
+
+class SyncLeader:
+    """Multicasts the timer state and answers followers' clock pings
+
+    publish() is called from the main loop and only packs and sends one
+    datagram when due; pings are answered on a background thread.
+    """
+
+    def __init__(self, group=None, port=None, rate=None, interface=None, ttl=1, clock=time.monotonic):
+        self.group = group or config.SYNC_GROUP
+        self.port = port or config.SYNC_PORT
+        self.interval = 1.0 / (rate or config.SYNC_RATE)
+        self.interface = interface if interface is not None else config.SYNC_INTERFACE
+        self.ttl = ttl
+        self.clock = clock
+        self.seq = 0
+        self._next_send = 0.0
+        self._last_key = None
+        self._sock = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+        self._sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_TTL, self.ttl)
+        self._sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_LOOP, 1)  # Followers on this host
+        if self.interface:
+            self._sock.setsockopt(socket.IPPROTO_IP, socket.IP_MULTICAST_IF, _interface(self.interface))
+        # Followers reply to the address the state packets come from
+        self._sock.bind((self.interface or '', 0))
+        self._sock.settimeout(0.5)
+        self._thread = threading.Thread(target=self._serve, name="sync-leader", daemon=True)
+        self._thread.start()
+        logger.info("Sync leader: %s:%d, %d packets/s", self.group, self.port, round(1 / self.interval))
+
+    def publish(self, timer_state):
+        """Send the state if the interval passed or something discrete changed"""
+        now = self.clock()
+        key = (timer_state.state, timer_state.balls_rolling, timer_state.frames_started, timer_state.shots_started)
+        if key == self._last_key and now < self._next_send:
+            return
+        self._last_key = key
+        self._next_send = now + self.interval
+
+        frame = timer_state.frame_time_remaining
+        shot = timer_state.shot_time_remaining
+        if timer_state.state == GameState.RUNNING and timer_state.last_update is not None:
+            # Values are as of the last update, bring them to `now`
+            elapsed = max(0.0, timer_state.clock() - timer_state.last_update)
+            frame = max(0.0, frame - elapsed)
+            if not timer_state.balls_rolling:
+                shot = max(0.0, shot - elapsed)
+        self.seq = (self.seq + 1) & 0xFFFFFFFF
+        packet = struct.pack(
+            STATE_FORMAT, MAGIC, VERSION, KIND_STATE, self.seq, now, frame, shot,
+            timer_state.shot_time_limit, STATE_CODES[timer_state.state],
+            1 if timer_state.balls_rolling else 0, timer_state.get_phase(),
+        )
+        try:
+            self._sock.sendto(packet, (self.group, self.port))
+        except OSError as e:
+            logger.warning("Sync packet not sent: %s", e)
+
+    def _serve(self):
+        while not self._stop.is_set():
+            try:
+                data, address = self._sock.recvfrom(64)
+            except socket.timeout:
+                continue
+            except OSError:
+                break
+            received = self.clock()
+            if len(data) != PING_SIZE:
+                continue
+            magic, version, kind, seq, sent = struct.unpack(PING_FORMAT, data)
+            if magic != MAGIC or version != VERSION or kind != KIND_PING:
+                continue
+            reply = struct.pack(PONG_FORMAT, MAGIC, VERSION, KIND_PONG, seq, sent, received, self.clock())
+            try:
+                self._sock.sendto(reply, address)
+            except OSError:
+                pass
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=2)
+        if self._sock:
+            self._sock.close()
+
+
+class SyncFollower:
+    """Receives the leader's state and estimates its clock offset
+
+    A background thread receives state packets and pongs and sends a ping
+    every `ping_interval` (faster until the first samples are in). The main
+    loop calls apply() each frame.
+    """
+
+    def __init__(self, group=None, port=None, interface=None, timeout=None, ping_interval=1.0,
+                 samples=8, clock=time.monotonic):
+        self.group = group or config.SYNC_GROUP
+        self.port = port or config.SYNC_PORT
+        self.interface = interface if interface is not None else config.SYNC_INTERFACE
+        self.timeout = config.SYNC_TIMEOUT if timeout is None else timeout
+        self.ping_interval = ping_interval
+        self.clock = clock
+        self.leader = None          # (address, port) of the current leader
+        self.state = None           # Latest LeaderState
+        self.received_at = None     # Own clock when it arrived
+        self.offset = None          # Leader clock minus own clock
+        self.delay = None           # Round trip of the sample the offset comes from
+        self._samples = collections.deque(maxlen=samples)  # (round trip, offset)
+        self._ping_seq = 0
+        self._lost = False
+        self._sock = None
+        self._ping_sock = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def start(self):
+        self._sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+        self._sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+        if hasattr(socket, 'SO_REUSEPORT'):
+            self._sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEPORT, 1)  # Several followers per host
+        self._sock.bind(('', self.port))
+        membership = socket.inet_aton(self.group) + _interface(self.interface)
+        self._sock.setsockopt(socket.IPPROTO_IP, socket.IP_ADD_MEMBERSHIP, membership)
+        # Pongs need a port of our own - unicast to the shared port reaches only one of the followers on a host
+        self._ping_sock = socket.socket(socket.AF_INET, socket.SOCK_DGRAM, socket.IPPROTO_UDP)
+        self._ping_sock.bind((self.interface or '', 0))
+        self._thread = threading.Thread(target=self._run, name="sync-follower", daemon=True)
+        self._thread.start()
+        logger.info("Sync follower: listening on %s:%d", self.group, self.port)
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=2)
+        for sock in (self._sock, self._ping_sock):
+            if sock:
+                sock.close()
+
+    @property
+    def synced(self):
+        return self.offset is not None and self.state is not None
+
+    def leader_time(self):
+        """The leader's clock right now, as far as we can tell (None until synced)"""
+        offset = self.offset  # Read once, the receive thread resets it when the leader restarts
+        return None if offset is None else self.clock() + offset
+
+    def _run(self):
+        next_ping = self.clock()
+        while not self._stop.is_set():
+            now = self.clock()
+            if self.leader and now >= next_ping:
+                self._send_ping(now)
+                # Collect a few samples quickly, then keep tracking drift
+                fast = len(self._samples) < self._samples.maxlen
+                next_ping = now + (self.ping_interval / 8 if fast else self.ping_interval)
+            timeout = max(0.01, min(0.5, next_ping - now)) if self.leader else 0.5
+            try:
+                readable, _, _ = select.select([self._sock, self._ping_sock], [], [], timeout)
+                for sock in readable:
+                    data, address = sock.recvfrom(64)
+                    received = self.clock()
+                    if sock is self._sock and len(data) == STATE_SIZE:
+                        self._on_state(data, address, received)
+                    elif sock is self._ping_sock and len(data) == PONG_SIZE:
+                        self._on_pong(data, address, received)
+            except (OSError, ValueError):
+                break
+
+    def _send_ping(self, now):
+        self._ping_seq = (self._ping_seq + 1) & 0xFFFFFFFF
+        try:
+            self._ping_sock.sendto(struct.pack(PING_FORMAT, MAGIC, VERSION, KIND_PING, self._ping_seq, now), self.leader)
+        except OSError as e:
+            logger.warning("Sync ping not sent: %s", e)
+
+    def _on_state(self, data, address, received):
+        magic, version, kind, seq, *fields = struct.unpack(STATE_FORMAT, data)
+        if magic != MAGIC or version != VERSION or kind != KIND_STATE:
+            return
+        if address != self.leader:
+            # New or restarted leader - its clock has nothing to do with the old one
+            logger.info("Sync follower: leader is %s:%d", *address)
+            self.leader = address
+            self.state = None
+            self.offset = None
+            self._samples.clear()
+        elif self.state and 0 < (self.state.seq - seq) & 0xFFFFFFFF < 0x80000000:
+            return  # Reordered, older than what we have
+        timestamp, frame, shot, limit, state, rolling, phase = fields
+        self.state = LeaderState(seq, timestamp, frame, shot, limit, STATES[state], bool(rolling), phase)
+        self.received_at = received
+
+    def _on_pong(self, data, address, received):
+        magic, version, kind, seq, sent, leader_received, leader_sent = struct.unpack(PONG_FORMAT, data)
+        if magic != MAGIC or version != VERSION or kind != KIND_PONG or address != self.leader:
+            return
+        round_trip = (received - sent) - (leader_sent - leader_received)
+        offset = ((leader_received - sent) + (leader_sent - received)) / 2
+        self._samples.append((round_trip, offset))
+        # Queueing only ever adds delay, the fastest exchange is the most accurate one
+        self.delay, self.offset = min(self._samples)
+
+    def apply(self, timer_state):
+        """Copy the leader's state into `timer_state`, advanced to the leader's now
+
+        Returns:
+            bool: False until the first state and offset are in, or when the
+            leader went silent for SYNC_TIMEOUT (the display then freezes)
+        """
+        # Read once each, the receive thread resets both when the leader restarts
+        leader = self.state
+        offset = self.offset
+        if leader is None or offset is None:
+            return False
+        lost = self.clock() - self.received_at > self.timeout
+        if lost != self._lost:
+            self._lost = lost
+            if lost:
+                logger.warning("Sync follower: no state from the leader for %.1fs", self.timeout)
+            else:
+                logger.info("Sync follower: leader is back")
+        frame = leader.frame_remaining
+        shot = leader.shot_remaining
+        if leader.state == GameState.RUNNING and not lost:
+            elapsed = max(0.0, self.clock() + offset - leader.timestamp)
+            frame = max(0.0, frame - elapsed)
+            if not leader.balls_rolling:
+                shot = max(0.0, shot - elapsed)
+        timer_state.state = leader.state
+        timer_state.frame_time_remaining = frame
+        timer_state.shot_time_remaining = shot
+        timer_state.shot_time_limit = leader.shot_limit
+        timer_state.balls_rolling = leader.balls_rolling
+        return not lost
@@ -0,0 +1,183 @@
+"""Shared-memory frame output for stream capture and broadcast overlays
+
+The rendered UI is copied into a memory-mapped file that capture or overlay
+processes on the same machine can map and read without any copies through
+the kernel. See docs/FRAME_OUTPUT.md for the buffer layout.
+
+Run `python -m src.frame_output <path>` to stream raw frames to stdout, e.g.
+for `ffmpeg -f rawvideo -pix_fmt bgra -s 1280x800 -r 30 -i - ...`.
+"""
+import logging
+import struct
+import sys
+import time
+import pygame
+import config
+from src.shm import SharedBuffer, default_path
+
+
+MAGIC = b'SSCF'
+VERSION = 1
+PIXEL_FORMAT = b'BGRA'
+FLAG_TRANSPARENT = 0x1
+
+# magic, version, width, height, stride, pixel format, seq, timestamp,
+# dirty x, dirty y, dirty width, dirty height, flags, reserved
+HEADER_FORMAT = '<4sIIII4sQdIIIIII'
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)  # 64 bytes
+SEQ_OFFSET = 24
+TIMESTAMP_OFFSET = 32
+UPDATE_FORMAT = '<dIIII'  # timestamp + dirty rect, written with every frame
+
+logger = logging.getLogger(__name__)
+
+
+class FrameBuffer:
+    """One shared frame: a 64 byte header followed by BGRA pixels"""
+
+    def __init__(self, path, width, height, transparent=False):
+        self.width = width
+        self.height = height
+        self.stride = width * 4
+        self.shared = SharedBuffer(path, HEADER_SIZE + self.stride * height, SEQ_OFFSET)
+        struct.pack_into(
+            HEADER_FORMAT, self.shared.mm, 0,
+            MAGIC, VERSION, width, height, self.stride, PIXEL_FORMAT,
+            self.shared.read_seq(), 0.0, 0, 0, width, height,
+            FLAG_TRANSPARENT if transparent else 0, 0,
+        )
+
+    def write(self, surface, rect):
+        """Copy `rect` of `surface` into the shared buffer"""
+        data = memoryview(pygame.image.tobytes(surface.subsurface(rect), 'BGRA'))
+        view = self.shared.view
+        row = rect.width * 4
+        offset = HEADER_SIZE + rect.y * self.stride + rect.x * 4
+
+        self.shared.begin_write()
+        if rect.width == self.width:
+            # Full-width region is contiguous in the buffer
+            view[offset:offset + len(data)] = data
+        else:
+            for y in range(rect.height):
+                start = offset + y * self.stride
+                view[start:start + row] = data[y * row:(y + 1) * row]
+        struct.pack_into(
+            UPDATE_FORMAT, self.shared.mm, TIMESTAMP_OFFSET,
+            time.monotonic(), rect.x, rect.y, rect.width, rect.height,
+        )
+        self.shared.end_write()
+
+    def close(self):
+        self.shared.close()
+
+
+class FrameOutput:
+    """Publishes rendered frames (opaque and optionally transparent) to shared memory
+
+    Only changed regions are copied, and nothing is written when the caller
+    reports no change.
+    """
+
+    def __init__(self, width, height, path=None, transparent=None, background=None):
+        self.path = path or config.FRAME_OUTPUT_PATH or default_path('snooker-shotclock-frame')
+        self.transparent = config.FRAME_OUTPUT_TRANSPARENT if transparent is None else transparent
+        self.bounds = pygame.Rect(0, 0, width, height)
+        self.buffer = FrameBuffer(self.path, width, height)
+        self.alpha_buffer = None
+        self.frames_written = 0
+        if self.transparent:
+            # Background pixels are keyed out to alpha 0 for overlays
+            self.alpha_buffer = FrameBuffer(self.path + '-alpha', width, height, transparent=True)
+            self._keyed = pygame.Surface((width, height))
+            self._alpha = pygame.Surface((width, height), pygame.SRCALPHA)
+            self.set_background(background or config.COLOR_BACKGROUND)
+        logger.info("Frame output: %dx%d BGRA at %s%s", width, height, self.path, " (+ -alpha)" if self.transparent else "")
+
+    def set_background(self, color):
+        """Colour that is keyed out in the transparent output"""
+        if self.alpha_buffer:
+            self._keyed.set_colorkey(color)
+
+    def publish(self, surface, dirty_rects=None):
+        """Write a rendered frame
+
+        Args:
+            surface: The rendered screen
+            dirty_rects: Regions that changed since the last call, None for the whole frame
+        """
+        if dirty_rects is None:
+            rect = self.bounds.copy()
+        else:
+            if not dirty_rects:
+                return
+            rect = dirty_rects[0].unionall(dirty_rects[1:]).clip(self.bounds)
+            if not rect.width or not rect.height:
+                return
+
+        self.buffer.write(surface, rect)
+        if self.alpha_buffer:
+            self._keyed.blit(surface, rect, rect)
+            self._alpha.fill((0, 0, 0, 0), rect)
+            self._alpha.blit(self._keyed, rect, rect)
+            self.alpha_buffer.write(self._alpha, rect)
+        self.frames_written += 1
+
+    def close(self):
+        self.buffer.close()
+        if self.alpha_buffer:
+            self.alpha_buffer.close()
+
+
+class FrameReader:
+    """Reads frames written by FrameOutput from another process"""
+
+    def __init__(self, path=None):
+        self.path = path or config.FRAME_OUTPUT_PATH or default_path('snooker-shotclock-frame')
+        self.shared = SharedBuffer(self.path, None, SEQ_OFFSET, create=False)
+        magic, version, self.width, self.height, self.stride, pixel_format = struct.unpack_from(
+            '<4sIIII4s', self.shared.mm, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{self.path} is not a shot clock frame buffer")
+        self.pixel_format = pixel_format.decode()
+        self.frame_size = self.stride * self.height
+
+    @property
+    def seq(self):
+        """Sequence number of the last completed frame (even) or a write in progress (odd)"""
+        return self.shared.read_seq()
+
+    def read_frame(self):
+        """Copy the latest complete frame
+
+        Returns:
+            tuple: (sequence number, BGRA pixel bytes) or (None, None) if no stable frame was seen
+        """
+        return self.shared.read_consistent(lambda mm: mm[HEADER_SIZE:HEADER_SIZE + self.frame_size])
+
+    def close(self):
+        self.shared.close()
+
+
+def stream_raw(path, fps):
+    """Write frames to stdout at a constant rate for ffmpeg's rawvideo demuxer"""
+    reader = FrameReader(path)
+    print(f"{reader.width}x{reader.height} {reader.pixel_format} @ {fps} fps", file=sys.stderr)
+    out = sys.stdout.buffer
+    frame = b'\0' * reader.frame_size
+    interval = 1.0 / fps
+    next_frame = time.monotonic()
+    while True:
+        seq, data = reader.read_frame()
+        if data is not None:
+            frame = data
+        out.write(frame)
+        next_frame += interval
+        time.sleep(max(0.0, next_frame - time.monotonic()))
+
+
+if __name__ == "__main__":
+    try:
+        stream_raw(sys.argv[1] if len(sys.argv) > 1 else None, float(sys.argv[2]) if len(sys.argv) > 2 else 30.0)
+    except (KeyboardInterrupt, BrokenPipeError):
+        pass
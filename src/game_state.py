@@ -1,8 +1,15 @@
 """Game state management and timer logic"""
+import contextlib
+import logging
 import time
 import math
 from enum import Enum
 import config
+from src import phases
+from src.undo import UndoHistory
+
+
+logger = logging.getLogger(__name__)
 
 
 class GameState(Enum):
@@ -12,67 +19,187 @@ class GameState(Enum):
     PAUSED = "paused"
 
 
+class VirtualClock:
+    """Time source for TimerState that only moves when advanced (simulations, test harnesses)"""
+    
+    def __init__(self, start=None):
+        self.now = time.time() if start is None else start
+        
+    def __call__(self):
+        return self.now
+        
+    def advance(self, seconds):
+        self.now += seconds
+
+
 class TimerState:
     """Manages the shot clock timer state"""
     
-    def __init__(self):
+    def __init__(self, clock=time.time):
+        self.clock = clock  # Time source, replaceable for simulations
         self.frame_time_remaining = config.FRAME_DURATION
-        self.shot_time_remaining = config.SHOT_TIME_FIRST_HALF
+        self.schedule = None  # Phase schedule and cached index (see _check_phase)
+        self.phase = 0
+        self._phase_bounds = (0.0, 0.0)
+        self.shot_time_remaining = self._get_shot_time_for_current_frame()
+        self.shot_time_limit = self.shot_time_remaining  # Full time of the current shot (progress bar)
         self.state = GameState.IDLE
         self.last_update = None
         self.balls_rolling = False  # True when middle mouse button is held
+        self.frames_started = 0  # Counters for the metrics exporter
+        self.shots_started = 0
+        self.restores = 0  # Undo/redo count, lets observers (match history) notice a restored state
+        self.history = UndoHistory(config.UNDO_DEPTH)  # Snapshots before each command
+        
+    def _remember(self):
+        """Snapshot the state (brought up to now) before a command changes it"""
+        self.update()
+        self.history.push(self, self.clock())
         
     def start_frame(self):
         """Start a new frame"""
+        self._remember()
         self.frame_time_remaining = config.FRAME_DURATION
-        self.shot_time_remaining = config.SHOT_TIME_FIRST_HALF
+        self.shot_time_remaining = self._get_shot_time_for_current_frame()
+        self.shot_time_limit = self.shot_time_remaining
         self.state = GameState.RUNNING
-        self.last_update = time.time()
+        self.last_update = self.clock()
+        self.frames_started += 1
+        self.shots_started += 1
         
     def reset_frame(self):
         """Reset frame to initial state"""
+        if self.state != GameState.IDLE:
+            self._remember()
         self.frame_time_remaining = config.FRAME_DURATION
         self.shot_time_remaining = self._get_shot_time_for_current_frame()
+        self.shot_time_limit = self.shot_time_remaining
         self.state = GameState.IDLE
         self.last_update = None
         
     def pause_frame(self):
         """Pause/unpause the frame timer"""
         if self.state == GameState.RUNNING:
+            self._remember()
             self.state = GameState.PAUSED
         elif self.state == GameState.PAUSED:
+            self._remember()
             self.state = GameState.RUNNING
-            self.last_update = time.time()
+            self.last_update = self.clock()
             
     def reset_shot(self):
         """Reset shot timer (can be called even when timer expired)"""
         if self.state == GameState.RUNNING or self.state == GameState.PAUSED:
+            # Count the time since the last update first, the frame timer must not lose it
+            self._remember()
             self.shot_time_remaining = self._get_shot_time_for_current_frame()
-            # Restart timing if we were running
-            if self.state == GameState.RUNNING:
-                self.last_update = time.time()
+            self.shot_time_limit = self.shot_time_remaining
+            self.shots_started += 1
+            
+    @contextlib.contextmanager
+    def at(self, timestamp):
+        """Apply the commands in this block as of `timestamp` (a clock() time)
+
+        Used for input that was timestamped before the main loop got to it,
+        e.g. a controller button: the command takes effect when it was
+        pressed and the next update() counts the time since then. The time
+        is kept between the last update and now, the timers never go back.
+        """
+        now = self.clock()
+        timestamp = min(timestamp, now)
+        if self.last_update is not None:
+            timestamp = max(timestamp, self.last_update)
+        clock = self.clock
+        self.clock = lambda: timestamp
+        try:
+            yield
+        finally:
+            self.clock = clock
+            
+    def _check_phase(self):
+        """Update the cached phase index when the frame time left the phase (or the schedule changed)"""
+        schedule = phases.schedule()
+        lower, upper = self._phase_bounds
+        if schedule is not self.schedule or not lower < self.frame_time_remaining <= upper:
+            self.schedule = schedule
+            self.phase = schedule.index(self.frame_time_remaining)
+            self._phase_bounds = schedule.bounds(self.phase)
             
     def _get_shot_time_for_current_frame(self):
         """Get correct shot time based on frame time remaining"""
-        if self.frame_time_remaining > config.FIRST_HALF_DURATION:
-            return config.SHOT_TIME_FIRST_HALF
-        else:
-            return config.SHOT_TIME_SECOND_HALF
+        self._check_phase()
+        return self.schedule.phases[self.phase].shot_time
             
+    def get_phase(self):
+        """Get the index of the current shot clock phase (0 = first, e.g. 15s, 1 = second, e.g. 10s)"""
+        self._check_phase()
+        return self.phase
+
     def set_balls_rolling(self, rolling):
         """Set balls rolling state (pauses shot timer, resets it when pressed)"""
+        # Bring both timers up to now while the shot timer still runs (or is still paused)
+        if rolling or self.balls_rolling:
+            self._remember()
+        else:
+            self.update()
         self.balls_rolling = rolling
         if rolling:
             # Reset shot timer when middle button is pressed
             self.shot_time_remaining = self._get_shot_time_for_current_frame()
-            self.last_update = time.time()
+            self.shot_time_limit = self.shot_time_remaining
+            self.shots_started += 1
             
+    def undo(self):
+        """Go back to the state before the last command, as if the time since then had passed
+
+        Returns:
+            bool: False if there was nothing to undo
+        """
+        self.update()
+        saved = self.history.undo(self, self.clock())
+        if saved is None:
+            return False
+        self._restore(saved)
+        logger.info("Undo: back to %s, frame %s, shot %s", self.state.value, self.get_frame_time_str(), self.get_shot_time_str())
+        return True
+        
+    def redo(self):
+        """Repeat the last undone command (its result, advanced to now)
+
+        Returns:
+            bool: False if there was nothing to redo
+        """
+        self.update()
+        saved = self.history.redo(self, self.clock())
+        if saved is None:
+            return False
+        self._restore(saved)
+        logger.info("Redo: %s, frame %s, shot %s", self.state.value, self.get_frame_time_str(), self.get_shot_time_str())
+        return True
+        
+    def _restore(self, saved):
+        """Apply a snapshot from the undo history"""
+        taken_at, frame, shot, limit, state, rolling = saved
+        self.state = GameState(state)
+        self.shot_time_limit = limit
+        self.balls_rolling = rolling
+        self.frame_time_remaining = frame
+        self.shot_time_remaining = shot
+        if self.state == GameState.RUNNING:
+            # The timers kept running while the wrong state was shown
+            self.last_update = taken_at
+            self.update()
+        else:
+            self.last_update = None
+        self._check_phase()
+        self.restores += 1
+        
     def update(self):
         """Update timers - call this every frame"""
         if self.state != GameState.RUNNING or self.last_update is None:
             return
             
-        current_time = time.time()
+        current_time = self.clock()
         delta = current_time - self.last_update
         self.last_update = current_time
         
@@ -81,6 +208,7 @@ class TimerState:
         if self.frame_time_remaining < 0:
             self.frame_time_remaining = 0
             self.state = GameState.IDLE
+        self._check_phase()
             
         # Update shot timer only when balls are NOT rolling
         if not self.balls_rolling:
@@ -109,3 +237,15 @@ class TimerState:
     def is_shot_critical(self):
         """Check if shot time is critical"""
         return 0 < self.shot_time_remaining <= config.SHOT_CRITICAL_TIME
+
+    def snapshot(self):
+        """Get a JSON-serialisable copy of the current timer state"""
+        return {
+            'state': self.state.value,
+            'frame_time_remaining': round(self.frame_time_remaining, 3),
+            'shot_time_remaining': round(self.shot_time_remaining, 3),
+            'balls_rolling': self.balls_rolling,
+            'frame_time': self.get_frame_time_str(),
+            'shot_time': self.get_shot_time_str(),
+            'timestamp': time.time(),
+        }
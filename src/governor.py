@@ -0,0 +1,154 @@
+"""Render governor: trade visual quality for a steady clock on hot or busy Pis
+
+Every GOVERNOR_INTERVAL seconds the governor looks at the CPU temperature
+(PERF_THERMAL_PATH), the firmware throttle flags (GOVERNOR_THROTTLE_PATH)
+and how many loop iterations overran the frame budget. While any of them is
+bad it steps down one quality level at a time:
+
+    full     every loop iteration is drawn
+    reduced  drawn at GOVERNOR_REDUCED_FPS, and whenever the digits,
+             colours or buttons change
+    static   no animations - only drawn when something shown changes
+             (the progress bar moves with the digits), at least once a second
+    minimal  also without the prescaled logo and the translucent overlay
+
+The main loop itself keeps running at FPS, so timer updates, audio cues and
+GPIO never get slower - only drawing and flipping are skipped. A level
+comes back only after temperature and frame times stayed below the lower
+thresholds for GOVERNOR_RECOVER_SECONDS (hysteresis), one level at a time.
+"""
+import logging
+import time
+import config
+from src.perf import read_cpu_temp
+
+
+LEVELS = ('full', 'reduced', 'static', 'minimal')
+REDUCED, STATIC, MINIMAL = 1, 2, 3
+
+# get_throttled bits that describe the current state: ARM frequency capped,
+# throttled, soft temperature limit (bit 0 under-voltage shows up as throttled)
+THROTTLED_NOW = 0x2 | 0x4 | 0x8
+
+STATIC_REFRESH = 1.0  # Seconds between redraws on 'static' and 'minimal' when nothing changed
+
+logger = logging.getLogger(__name__)
+
+
+def read_throttled(path=None):
+    """Raspberry Pi firmware throttle flags, or None where they are not available"""
+    path = path or config.GOVERNOR_THROTTLE_PATH
+    if not path:
+        return None
+    try:
+        with open(path) as f:
+            return int(f.read().strip(), 16)
+    except (OSError, ValueError):
+        return None
+
+
+class RenderGovernor:
+    """Picks the render quality level from temperature, throttling and frame times"""
+
+    def __init__(self, fps=None, clock=time.monotonic):
+        self.clock = clock
+        self.budget = 1.0 / (fps or config.FPS)
+        self.level = 0
+        self.reason = None  # Why the last step down happened
+        self.cpu_temp = None
+        self.throttled = False
+        self._frames = 0
+        self._late = 0
+        now = clock()
+        self._next_check = now + config.GOVERNOR_INTERVAL
+        self._hold_until = now  # No step down before this
+        self._calm_since = None
+        self._last_key = None
+        self._next_draw = 0.0
+
+    @property
+    def name(self):
+        return LEVELS[self.level]
+
+    @property
+    def show_assets(self):
+        """Draw the prescaled logo and translucent overlays"""
+        return self.level < MINIMAL
+
+    def frame(self, work):
+        """Account one loop iteration (`work` = seconds before the frame rate sleep)
+
+        Returns:
+            bool: True if the level changed
+        """
+        self._frames += 1
+        if work > self.budget:
+            self._late += 1
+        now = self.clock()
+        if now < self._next_check:
+            return False
+        self._next_check = now + config.GOVERNOR_INTERVAL
+        return self._check(now)
+
+    def _check(self, now):
+        late_ratio = self._late / self._frames if self._frames else 0.0
+        self._frames = self._late = 0
+        self.cpu_temp = read_cpu_temp()
+        flags = read_throttled()
+        self.throttled = bool(flags is not None and flags & THROTTLED_NOW)
+
+        if self.throttled:
+            reason = 'throttled'
+        elif self.cpu_temp is not None and self.cpu_temp >= config.GOVERNOR_TEMP_HIGH:
+            reason = f'{self.cpu_temp:.1f} C'
+        elif late_ratio > config.GOVERNOR_LATE_RATIO:
+            reason = f'{late_ratio:.0%} slow frames'
+        else:
+            reason = None
+
+        if reason:
+            self._calm_since = None
+            if self.level < len(LEVELS) - 1 and now >= self._hold_until:
+                self.reason = reason
+                self._set(self.level + 1, reason, now)
+                return True
+            return False
+
+        # Between the thresholds the level is kept, recovery needs clearly better values
+        calm = ((self.cpu_temp is None or self.cpu_temp <= config.GOVERNOR_TEMP_LOW)
+                and late_ratio <= config.GOVERNOR_LATE_RATIO / 2)
+        if not calm or not self.level:
+            self._calm_since = None
+            return False
+        if self._calm_since is None:
+            self._calm_since = now
+        elif now - self._calm_since >= config.GOVERNOR_RECOVER_SECONDS:
+            self._calm_since = now  # The next level needs another calm period
+            self._set(self.level - 1, 'recovered', now)
+            return True
+        return False
+
+    def _set(self, level, reason, now):
+        logger.warning("Render quality %s -> %s (%s)", LEVELS[self.level], LEVELS[level], reason)
+        self.level = level
+        self._hold_until = now + config.GOVERNOR_STEP_SECONDS
+        self.invalidate()
+
+    def invalidate(self):
+        """Draw the next frame regardless of the level (after resizes, config changes, ...)"""
+        self._last_key = None
+
+    def should_draw(self, key):
+        """Whether this loop iteration renders
+
+        Args:
+            key: Everything the frame shows except animations (UI.content_key)
+        """
+        if not self.level:
+            return True
+        now = self.clock()
+        if key == self._last_key and now < self._next_draw:
+            return False
+        self._last_key = key
+        self._next_draw = now + (1.0 / config.GOVERNOR_REDUCED_FPS if self.level == REDUCED else STATIC_REFRESH)
+        return True
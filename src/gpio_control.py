@@ -1,60 +1,90 @@
 """GPIO control for LED indicators and buttons on Raspberry Pi"""
+import logging
+import math
+import threading
+import time
 import config
+from src.metrics import metrics
 
-# Try to import GPIO libraries (only available on Raspberry Pi)
-try:
-    if config.USE_GPIO:
-        from gpiozero import LED, Button
-        GPIO_AVAILABLE = True
-    else:
-        GPIO_AVAILABLE = False
-except ImportError:
-    GPIO_AVAILABLE = False
+
+LED_COUNT = 5  # One LED per second of the last five (LED_PINS must list exactly this many)
+
+# Settings that need the pins to be claimed again
+PIN_SETTINGS = {'USE_GPIO', 'LED_PINS', 'BUTTON_START_PIN', 'BUTTON_RESET_PIN'}
+
+logger = logging.getLogger(__name__)
 
 
 class GPIOControl:
     """Controls 5 LED indicators and 2 input buttons via GPIO"""
     
-    def __init__(self, timer_state=None):
-        self.enabled = config.USE_GPIO and GPIO_AVAILABLE
+    def __init__(self, command_queue=None, defer_setup=False):
+        self.enabled = False  # True once pins are claimed
         self.leds = []
         self.button_start = None
         self.button_reset = None
-        self.timer_state = timer_state
+        self.command_queue = command_queue  # Button presses are applied by the loop that owns the TimerState
         
-        if self.enabled:
-            try:
-                # Initialize 5 LEDs (outputs)
-                for pin in config.LED_PINS:
-                    self.leds.append(LED(pin))
-                print(f"GPIO: {len(self.leds)} LEDs initialized on pins {config.LED_PINS}")
-                
-                # Initialize input buttons with pull-up resistors
-                # Buttons connect GPIO pin to GND when pressed
-                self.button_start = Button(config.BUTTON_START_PIN, pull_up=True, bounce_time=0.1)
-                self.button_reset = Button(config.BUTTON_RESET_PIN, pull_up=True, bounce_time=0.1)
-                
-                # Set up button callbacks
-                if self.timer_state:
-                    self.button_start.when_pressed = self._on_start_pressed
-                    self.button_reset.when_pressed = self._on_reset_pressed
-                
-                print(f"GPIO: Input buttons initialized on pins {config.BUTTON_START_PIN} (Start), {config.BUTTON_RESET_PIN} (Reset)")
-            except Exception as e:
-                print(f"Failed to initialize GPIO: {e}")
-                self.enabled = False
+        if not defer_setup:
+            self.setup()
+            
+    def setup(self):
+        """Import gpiozero and claim the pins (may run on a background thread)"""
+        if not config.USE_GPIO:
+            return
+            
+        # GPIO libraries are only available on Raspberry Pi (and slow to import)
+        try:
+            from gpiozero import LED, Button
+        except ImportError:
+            logger.warning("GPIO: gpiozero not available, LEDs and buttons disabled")
+            return
+            
+        try:
+            # Initialize 5 LEDs (outputs)
+            for pin in config.LED_PINS:
+                self.leds.append(LED(pin))
+            logger.info("GPIO: %d LEDs initialized on pins %s", len(self.leds), config.LED_PINS)
+            
+            # Initialize input buttons with pull-up resistors
+            # Buttons connect GPIO pin to GND when pressed
+            self.button_start = Button(config.BUTTON_START_PIN, pull_up=True, bounce_time=0.1)
+            self.button_reset = Button(config.BUTTON_RESET_PIN, pull_up=True, bounce_time=0.1)
+            
+            # Set up button callbacks
+            if self.command_queue:
+                self.button_start.when_pressed = self._on_start_pressed
+                self.button_reset.when_pressed = self._on_reset_pressed
+            
+            logger.info("GPIO: Input buttons initialized on pins %s (Start), %s (Reset)", config.BUTTON_START_PIN, config.BUTTON_RESET_PIN)
+            self.enabled = True
+        except Exception as e:
+            logger.error("Failed to initialize GPIO: %s", e)
+            self.enabled = False
+    
+    def apply_config(self, changed):
+        """React to reloaded settings (names of the config values that changed)"""
+        if PIN_SETTINGS & set(changed):
+            # Releasing and claiming pins is slow-ish, keep it off the render thread
+            threading.Thread(target=self._reconfigure, name="gpio-reconfigure", daemon=True).start()
+            
+    def _reconfigure(self):
+        """Release all pins and set them up again with the current config"""
+        self.cleanup()
+        self.leds = []
+        self.button_start = None
+        self.button_reset = None
+        self.setup()
     
     def _on_start_pressed(self):
-        """Callback when Start button is pressed"""
-        if self.timer_state:
-            print("GPIO: Start button pressed")
-            self.timer_state.start_frame()
+        """Callback when Start button is pressed (gpiozero thread)"""
+        logger.info("GPIO: Start button pressed")
+        self.command_queue.put('start', source='gpio', at=time.time())
     
     def _on_reset_pressed(self):
-        """Callback when Reset button is pressed"""
-        if self.timer_state:
-            print("GPIO: Reset button pressed")
-            self.timer_state.reset_frame()
+        """Callback when Reset button is pressed (gpiozero thread)"""
+        logger.info("GPIO: Reset button pressed")
+        self.command_queue.put('reset-frame', source='gpio', at=time.time())
                 
     def update(self, timer_state):
         """Update LED states based on timer - countdown style"""
@@ -62,34 +92,40 @@ class GPIOControl:
             return
             
         try:
-            shot_time = int(timer_state.shot_time_remaining)
+            # Ceiling like the display: 1 LED while it shows 1
+            shot_time = math.ceil(timer_state.shot_time_remaining)
             
             if timer_state.state.value != "running":
                 # All LEDs off when not running
                 self.all_off()
             else:
                 # Light up LEDs based on remaining seconds (max 5)
-                leds_lit = min(5, max(0, shot_time))
+                leds_lit = min(LED_COUNT, max(0, shot_time))
                 
-                for i in range(5):
+                for i, led in enumerate(self.leds):
                     if i < leds_lit:
-                        self.leds[i].on()
+                        led.on()
                     else:
-                        self.leds[i].off()
+                        led.off()
+                metrics.gpio_writes.inc(len(self.leds))
                     
         except Exception as e:
-            print(f"GPIO update failed: {e}")
+            logger.error("GPIO update failed: %s", e)
             
     def all_off(self):
         """Turn all LEDs off"""
         if self.enabled:
             for led in self.leds:
                 led.off()
+            metrics.gpio_writes.inc(len(self.leds))
                 
     def cleanup(self):
         """Cleanup GPIO resources"""
         if self.enabled:
-            self.all_off()
+            # Stop update() from touching the pins while they are released
+            self.enabled = False
+            for led in self.leds:
+                led.off()
             for led in self.leds:
                 led.close()
             if self.button_start:
@@ -0,0 +1,329 @@
+"""Match history: frames and shots recorded to SQLite
+
+MatchRecorder watches TimerState once per loop iteration and turns its
+transitions (frame started/ended, shot clock reset, shot expired) into rows.
+HistoryWriter batches the rows on a background thread and writes them in
+one transaction per batch to a WAL-mode database, so the render loop only
+ever appends to a queue.
+
+Per-night and per-season stats are read from the frames table, which keeps
+shot totals per frame - queries stay fast however many shots are stored.
+See match_history.py for the query and CSV export commands.
+"""
+import csv
+import datetime
+import logging
+import os
+import queue
+import socket
+import sqlite3
+import threading
+import time
+import config
+from src.game_state import GameState
+
+
+logger = logging.getLogger(__name__)
+
+SCHEMA_VERSION = 1
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS frames (
+    id INTEGER PRIMARY KEY,          -- start time in microseconds, unique per table
+    table_id TEXT NOT NULL,
+    season TEXT NOT NULL,
+    night TEXT NOT NULL,             -- YYYY-MM-DD, frames after midnight count to the evening before
+    started_at REAL NOT NULL,        -- Unix time
+    ended_at REAL,                   -- NULL while the frame runs (or if the clock was stopped)
+    duration REAL,                   -- Frame clock used in seconds
+    expired INTEGER NOT NULL DEFAULT 0,
+    shots INTEGER NOT NULL DEFAULT 0,
+    shot_expiries INTEGER NOT NULL DEFAULT 0,
+    shot_time_used REAL NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS frames_night ON frames (night, table_id);
+CREATE INDEX IF NOT EXISTS frames_season ON frames (season, table_id);
+CREATE INDEX IF NOT EXISTS frames_table ON frames (table_id, started_at);
+
+CREATE TABLE IF NOT EXISTS shots (
+    id INTEGER PRIMARY KEY,
+    frame_id INTEGER NOT NULL,
+    table_id TEXT NOT NULL,
+    night TEXT NOT NULL,
+    started_at REAL NOT NULL,
+    phase INTEGER NOT NULL,          -- Index into the phase schedule (src/phases.py)
+    allowed REAL NOT NULL,           -- Shot clock at the start of the shot
+    used REAL NOT NULL,              -- Seconds of shot clock used
+    expired INTEGER NOT NULL,
+    ended_by TEXT NOT NULL           -- 'reset', 'balls_rolling' or 'frame_end'
+);
+CREATE INDEX IF NOT EXISTS shots_frame ON shots (frame_id);
+CREATE INDEX IF NOT EXISTS shots_night ON shots (night, table_id);
+"""
+
+FRAME_COLUMNS = ('id', 'table_id', 'season', 'night', 'started_at', 'ended_at', 'duration',
+                 'expired', 'shots', 'shot_expiries', 'shot_time_used')
+SHOT_COLUMNS = ('frame_id', 'table_id', 'night', 'started_at', 'phase', 'allowed', 'used',
+                'expired', 'ended_by')
+
+UPSERT_FRAME = f"INSERT OR REPLACE INTO frames ({', '.join(FRAME_COLUMNS)}) VALUES ({', '.join('?' * len(FRAME_COLUMNS))})"
+INSERT_SHOT = f"INSERT INTO shots ({', '.join(SHOT_COLUMNS)}) VALUES ({', '.join('?' * len(SHOT_COLUMNS))})"
+
+
+def database_path(path=None):
+    """History database location (relative paths are relative to the project)"""
+    path = path or config.HISTORY_DB_PATH
+    return os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), path)
+
+
+def night_of(timestamp):
+    """League night of a Unix time - frames after midnight count to the evening before"""
+    local = datetime.datetime.fromtimestamp(timestamp) - datetime.timedelta(hours=config.HISTORY_NIGHT_ROLLOVER_HOUR)
+    return local.date().isoformat()
+
+
+def season_of(timestamp):
+    """Season name, e.g. '2026/27' for a season running from July to June"""
+    if config.HISTORY_SEASON:
+        return config.HISTORY_SEASON
+    date = datetime.date.fromtimestamp(timestamp)
+    first_year = date.year if date.month >= 7 else date.year - 1
+    return f"{first_year}/{(first_year + 1) % 100:02d}"
+
+
+def connect(path=None, readonly=False):
+    """Open the history database (creating the schema unless read-only)"""
+    path = database_path(path)
+    if readonly:
+        return sqlite3.connect(f"file:{path}?mode=ro", uri=True)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    conn = sqlite3.connect(path)
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")  # WAL stays consistent, only the last batch can be lost on power loss
+    conn.executescript(SCHEMA)
+    conn.execute(f"PRAGMA user_version={SCHEMA_VERSION}")
+    return conn
+
+
+class HistoryWriter:
+    """Writes queued rows in batches on a background thread"""
+
+    def __init__(self, path=None, flush_interval=None, batch_size=500):
+        self.path = database_path(path)
+        self.flush_interval = config.HISTORY_FLUSH_SECONDS if flush_interval is None else flush_interval
+        self.batch_size = batch_size
+        self.rows_written = 0
+        self._queue = queue.SimpleQueue()
+        self._thread = None
+
+    def start(self):
+        connect(self.path).close()  # Create the schema before the first frame, errors surface here
+        self._thread = threading.Thread(target=self._run, name="history-writer", daemon=True)
+        self._thread.start()
+        logger.info("History: recording to %s", self.path)
+
+    def put_frame(self, row):
+        self._queue.put((UPSERT_FRAME, row))
+
+    def put_shot(self, row):
+        self._queue.put((INSERT_SHOT, row))
+
+    def stop(self):
+        """Write everything still queued"""
+        if self._thread:
+            self._queue.put(None)
+            self._thread.join(timeout=10)
+            self._thread = None
+
+    def _run(self):
+        conn = connect(self.path)
+        running = True
+        while running:
+            batch = []
+            deadline = time.monotonic() + self.flush_interval
+            while len(batch) < self.batch_size:
+                try:
+                    item = self._queue.get(timeout=max(0.0, deadline - time.monotonic()))
+                except queue.Empty:
+                    break
+                if item is None:
+                    running = False
+                    break
+                batch.append(item)
+            if batch:
+                self._write(conn, batch)
+        conn.close()
+
+    def _write(self, conn, batch):
+        try:
+            with conn:
+                for statement, row in batch:
+                    conn.execute(statement, row)
+            self.rows_written += len(batch)
+        except sqlite3.Error as e:
+            logger.error("History: could not write %d rows: %s", len(batch), e)
+
+
+class MatchRecorder:
+    """Turns TimerState transitions into frame and shot rows - call observe() every frame"""
+
+    def __init__(self, writer, table_id=None):
+        self.writer = writer
+        self.table_id = table_id or config.HISTORY_TABLE_ID or socket.gethostname()
+        self.frame = None  # Row values of the running frame
+        self.shot = None   # Row values of the running shot
+        self._frames_started = None
+        self._shots_started = None
+        self._restores = None
+        self._closed = None  # Row values of the last ended frame, reopened if an undo brings it back
+        self._frame_remaining = 0.0  # Values from the previous observe(), before a reset overwrote them
+        self._shot_remaining = 0.0
+
+    def observe(self, timer_state):
+        now = timer_state.clock()
+        if self._frames_started is None:
+            self._frames_started = timer_state.frames_started
+            self._shots_started = timer_state.shots_started
+            self._restores = timer_state.restores
+
+        if timer_state.restores != self._restores:
+            self._restores = timer_state.restores
+            if not self.frame and self._closed and timer_state.state != GameState.IDLE:
+                # Undo of a reset: the frame goes on in the same row
+                self._reopen_frame(timer_state, now)
+        if timer_state.frames_started != self._frames_started:
+            if self.frame:
+                self._end_frame(now, expired=False)
+            self._start_frame(timer_state, now)
+        elif timer_state.shots_started != self._shots_started and self.frame:
+            self._end_shot('balls_rolling' if timer_state.balls_rolling else 'reset')
+            self._start_shot(timer_state, now)
+        self._frames_started = timer_state.frames_started
+        self._shots_started = timer_state.shots_started
+
+        if not self.frame:
+            return
+        if timer_state.state == GameState.IDLE:
+            # Reset, or the frame clock ran out
+            expired = timer_state.frame_time_remaining <= 0
+            if expired:
+                self._frame_remaining = 0.0
+                self._shot_remaining = timer_state.shot_time_remaining
+            self._end_frame(now, expired)
+            return
+        if timer_state.shot_time_remaining <= 0 and not self.shot['expired']:
+            self.shot['expired'] = 1
+            self.frame['shot_expiries'] += 1
+        self._frame_remaining = timer_state.frame_time_remaining
+        self._shot_remaining = timer_state.shot_time_remaining
+
+    def _start_frame(self, timer_state, now):
+        self._closed = None
+        self.frame = {
+            'id': int(now * 1_000_000), 'table_id': self.table_id, 'season': season_of(now),
+            'night': night_of(now), 'started_at': now, 'ended_at': None, 'duration': None,
+            'expired': 0, 'shots': 0, 'shot_expiries': 0, 'shot_time_used': 0.0,
+        }
+        self.writer.put_frame(tuple(self.frame[c] for c in FRAME_COLUMNS))
+        self._frame_remaining = timer_state.frame_time_remaining
+        self._start_shot(timer_state, now)
+
+    def _reopen_frame(self, timer_state, now):
+        frame = self.frame = self._closed
+        self._closed = None
+        frame['ended_at'] = frame['duration'] = None
+        frame['expired'] = 0
+        self.writer.put_frame(tuple(frame[c] for c in FRAME_COLUMNS))
+        self._frame_remaining = timer_state.frame_time_remaining
+        self._start_shot(timer_state, now)
+
+    def _start_shot(self, timer_state, now):
+        self.shot = {
+            'frame_id': self.frame['id'], 'table_id': self.table_id, 'night': self.frame['night'],
+            'started_at': now, 'phase': timer_state.get_phase(),
+            'allowed': timer_state.shot_time_remaining, 'used': 0.0, 'expired': 0, 'ended_by': None,
+        }
+        self._shot_remaining = timer_state.shot_time_remaining
+
+    def _end_shot(self, ended_by):
+        shot = self.shot
+        shot['used'] = round(max(0.0, shot['allowed'] - self._shot_remaining), 3)
+        shot['ended_by'] = ended_by
+        self.frame['shots'] += 1
+        self.frame['shot_time_used'] += shot['used']
+        self.writer.put_shot(tuple(shot[c] for c in SHOT_COLUMNS))
+        self.shot = None
+
+    def _end_frame(self, now, expired):
+        self._end_shot('frame_end')
+        frame = self.frame
+        frame['ended_at'] = now
+        frame['duration'] = round(config.FRAME_DURATION - self._frame_remaining, 3)
+        frame['expired'] = 1 if expired else 0
+        frame['shot_time_used'] = round(frame['shot_time_used'], 3)
+        self.writer.put_frame(tuple(frame[c] for c in FRAME_COLUMNS))
+        self._closed = frame
+        self.frame = None
+
+
+def _filters(night=None, season=None, table=None, since=None, until=None):
+    clauses, params = [], []
+    for column, op, value in (('night', '=', night), ('season', '=', season), ('table_id', '=', table),
+                              ('night', '>=', since), ('night', '<=', until)):
+        if value is not None:
+            clauses.append(f"{column} {op} ?")
+            params.append(value)
+    return (' WHERE ' + ' AND '.join(clauses) if clauses else ''), params
+
+
+STATS_COLUMNS = ('frames', 'avg_frame_seconds', 'frames_expired', 'shots', 'avg_shot_seconds', 'shot_expiries')
+STATS_SELECT = """
+    COUNT(*), ROUND(AVG(duration), 1), SUM(expired), SUM(shots),
+    ROUND(SUM(shot_time_used) / NULLIF(SUM(shots), 0), 2), SUM(shot_expiries)
+"""
+
+
+def night_stats(conn, **filters):
+    """Per night and table: frames, average frame length, shots, average shot time, expiries"""
+    where, params = _filters(**filters)
+    rows = conn.execute(
+        f"SELECT night, table_id, {STATS_SELECT} FROM frames{where} GROUP BY night, table_id "
+        "ORDER BY night DESC, table_id", params)
+    return ('night', 'table_id') + STATS_COLUMNS, rows
+
+
+def season_stats(conn, **filters):
+    """Per season and table, same columns as night_stats"""
+    where, params = _filters(**filters)
+    rows = conn.execute(
+        f"SELECT season, table_id, {STATS_SELECT} FROM frames{where} GROUP BY season, table_id "
+        "ORDER BY season DESC, table_id", params)
+    return ('season', 'table_id') + STATS_COLUMNS, rows
+
+
+def export_csv(conn, what, out, **filters):
+    """Stream frames or shots as CSV to a file object
+
+    Returns:
+        int: Rows written
+    """
+    if what == 'frames':
+        where, params = _filters(**filters)
+        columns = FRAME_COLUMNS
+        cursor = conn.execute(f"SELECT {', '.join(columns)} FROM frames{where} ORDER BY id", params)
+    else:
+        # Shots carry night and table, the season lives on the frame
+        season = filters.pop('season', None)
+        where, params = _filters(**filters)
+        columns = ('id',) + SHOT_COLUMNS
+        if season is not None:
+            where += (' AND ' if where else ' WHERE ') + "frame_id IN (SELECT id FROM frames WHERE season = ?)"
+            params.append(season)
+        cursor = conn.execute(f"SELECT {', '.join(columns)} FROM shots{where} ORDER BY id", params)
+    writer = csv.writer(out)
+    writer.writerow(columns)
+    count = 0
+    for row in cursor:
+        writer.writerow(row)
+        count += 1
+    return count
@@ -1,5 +1,10 @@
 """Input handling for mouse, keyboard, and HID devices"""
+import logging
 import pygame
+from src.metrics import metrics
+
+
+logger = logging.getLogger(__name__)
 
 
 class InputHandler:
@@ -8,19 +13,51 @@ class InputHandler:
     def __init__(self, ui, timer_state):
         self.ui = ui
         self.timer_state = timer_state
+        self.joysticks = {}  # Instance id -> joystick; keep references, pygame closes unreferenced joysticks
+        self.controllers = None  # ControllerInput for mapped pads (see src/controller_input.py)
+        self.key_actions = {}  # Extra keys handled outside the timer, e.g. {pygame.K_F3: toggle}
+        
+    def init_joysticks(self):
+        """Initialize joystick support for Bluetooth controllers
+        
+        Devices are opened as they are plugged in (JOYDEVICEADDED, also sent
+        for the ones already connected). Pads SDL has a mapping for go to
+        self.controllers, any other joystick is read by raw button index.
+        """
+        pygame.joystick.init()
+        if self.controllers:
+            try:
+                self.controllers.start()
+            except pygame.error as e:
+                logger.error("Failed to start controller input: %s", e)
+                self.controllers = None
+            
+    def _add_joystick(self, device_index):
+        """Open a hot-plugged joystick unless it is handled as a mapped controller"""
+        if self.controllers:
+            from pygame._sdl2 import controller
+            if controller.is_controller(device_index):
+                return
+        joystick = pygame.joystick.Joystick(device_index)
+        self.joysticks[joystick.get_instance_id()] = joystick
+        logger.info("Joystick detected: %s", joystick.get_name())
         
-    def handle_events(self):
+    def handle_events(self, events=None):
         """Process all pygame events
         
+        Args:
+            events: Events already taken from the queue (asyncio loop), None = get them now
+            
         Returns:
             bool: False if quit event received, True otherwise
         """
-        for event in pygame.event.get():
+        for event in pygame.event.get() if events is None else events:
             if event.type == pygame.QUIT:
                 return False
                 
             # Keyboard shortcuts
             if event.type == pygame.KEYDOWN:
+                metrics.input_events.inc_label('keyboard')
                 if event.key == pygame.K_ESCAPE or event.key == pygame.K_q:
                     return False
                 elif event.key == pygame.K_SPACE:
@@ -35,9 +72,18 @@ class InputHandler:
                 elif event.key == pygame.K_s:
                     # S = Reset Shot
                     self.timer_state.reset_shot()
+                elif event.key == pygame.K_u:
+                    # U = Undo the last command, Shift+U = Redo
+                    if event.mod & pygame.KMOD_SHIFT:
+                        self.timer_state.redo()
+                    else:
+                        self.timer_state.undo()
+                elif event.key in self.key_actions:
+                    self.key_actions[event.key]()
                     
             # Mouse clicks
             if event.type == pygame.MOUSEBUTTONDOWN:
+                metrics.input_events.inc_label('mouse')
                 pos = pygame.mouse.get_pos()
                 # Middle mouse button (button 2) = balls rolling (hold to pause)
                 if event.button == 2:
@@ -51,8 +97,20 @@ class InputHandler:
                 if event.button == 2:
                     self.timer_state.set_balls_rolling(False)
                 
-            # Support for joystick/gamepad buttons (Bluetooth controllers)
-            if event.type == pygame.JOYBUTTONDOWN:
+            # Controllers coming and going
+            if event.type == pygame.JOYDEVICEADDED:
+                self._add_joystick(event.device_index)
+            elif event.type == pygame.JOYDEVICEREMOVED:
+                joystick = self.joysticks.pop(event.instance_id, None)
+                if joystick:
+                    logger.info("Joystick disconnected: %s", joystick.get_name())
+            elif event.type in (pygame.CONTROLLERDEVICEADDED, pygame.CONTROLLERDEVICEREMOVED):
+                if self.controllers:
+                    self.controllers.handle_event(event)
+                
+            # Support for joystick/gamepad buttons of unmapped controllers (mapped ones are polled)
+            if event.type == pygame.JOYBUTTONDOWN and event.instance_id in self.joysticks:
+                metrics.input_events.inc_label('joystick')
                 self._handle_joystick_button(event.button)
                 
         return True
@@ -80,12 +138,13 @@ class InputHandler:
             self.timer_state.reset_shot()
             
     def _handle_joystick_button(self, button):
-        """Handle joystick/gamepad button press"""
+        """Handle joystick/gamepad button press (raw index, for pads without a mapping)"""
         # Map common button indices
         # Button 0 (A/X) = Start Frame
         # Button 1 (B/Circle) = Reset Shot
         # Button 2 (X/Square) = Pause Frame
         # Button 3 (Y/Triangle) = Reset Frame
+        # Button 4 (LB/L1) = Undo, Button 5 (RB/R1) = Redo
         
         if button == 0:
             self.timer_state.start_frame()
@@ -95,3 +154,7 @@ class InputHandler:
             self.timer_state.pause_frame()
         elif button == 3:
             self.timer_state.reset_frame()
+        elif button == 4:
+            self.timer_state.undo()
+        elif button == 5:
+            self.timer_state.redo()
@@ -0,0 +1,224 @@
+"""Non-blocking, rate-limited, structured logging
+
+Every log call only creates a record and puts it on a queue; a background
+listener thread does all formatting of the output and all file writes
+(rotating log file, optional console). The same warning or error repeated
+within LOG_RATE_LIMIT_SECONDS is counted instead of written, and a summary
+line ("repeated 3600 times") follows when the window ends.
+
+Log file lines are logfmt (or JSON lines) with timestamp, host and logger,
+so logs from several clocks can be merged and grepped.
+"""
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import socket
+import sys
+import threading
+import time
+import config
+
+
+HOSTNAME = socket.gethostname()
+
+# Never rate-limited: every stall report and its stack dump is the diagnostic
+UNLIMITED_LOGGERS = {'src.watchdog'}
+
+_system = None
+
+
+class RateLimitFilter(logging.Filter):
+    """Lets each warning or error through at most once per `interval` seconds
+
+    Messages are keyed by logger, level and the unformatted message, so
+    "GPIO update failed: %s" is one message whatever the exception says.
+    Info and debug records are events (button presses, controllers
+    connecting) and always pass, as do the UNLIMITED_LOGGERS.
+    """
+
+    def __init__(self, interval, max_keys=1000):
+        super().__init__()
+        self.interval = interval
+        self.max_keys = max_keys
+        self._windows = {}  # key -> [window end, suppressed count, last suppressed record]
+        self._lock = threading.Lock()  # Records come from several threads
+
+    def filter(self, record):
+        if self.interval <= 0 or record.levelno < logging.WARNING or record.name in UNLIMITED_LOGGERS:
+            return True
+        key = (record.name, record.levelno, record.msg)
+        now = time.monotonic()
+        with self._lock:
+            window = self._windows.get(key)
+            if window is not None and now < window[0]:
+                window[1] += 1
+                window[2] = record
+                return False
+            if window is not None and window[1]:
+                # Window ended with suppressed copies that the summary thread did not see yet
+                record.repeated = window[1]
+            if len(self._windows) >= self.max_keys:
+                self._prune(now)
+            self._windows[key] = [now + self.interval, 0, None]
+        return True
+
+    def _prune(self, now):
+        for key in [key for key, window in self._windows.items() if window[0] <= now and not window[1]]:
+            del self._windows[key]
+
+    def expired_summaries(self, force=False):
+        """Records summarising suppressed copies of messages whose window has ended"""
+        now = time.monotonic()
+        summaries = []
+        with self._lock:
+            for window in self._windows.values():
+                if window[1] and (force or now >= window[0]):
+                    record = window[2]
+                    record.repeated = window[1]
+                    summaries.append(record)
+                    window[1] = 0
+                    window[2] = None
+        return summaries
+
+
+class StructuredFormatter(logging.Formatter):
+    """One line per record, logfmt (key=value) or JSON"""
+
+    def __init__(self, style='logfmt'):
+        super().__init__()
+        self.json = style == 'json'
+
+    def format(self, record):
+        fields = {
+            'ts': self.formatTime(record, '%Y-%m-%dT%H:%M:%S') + f".{int(record.msecs):03d}",
+            'host': HOSTNAME,
+            'level': record.levelname.lower(),
+            'logger': record.name,
+            'thread': record.threadName,
+            'msg': record.getMessage(),
+        }
+        if getattr(record, 'repeated', 0):
+            fields['repeated'] = record.repeated
+        if self.json:
+            return json.dumps(fields, ensure_ascii=False)
+        return ' '.join(f"{key}={self._quote(value)}" for key, value in fields.items())
+
+    @staticmethod
+    def _quote(value):
+        text = str(value)
+        if text and not any(c in text for c in ' ="\n\\'):
+            return text
+        return '"' + text.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') + '"'
+
+
+class ConsoleFormatter(logging.Formatter):
+    """Plain messages for the terminal, like the print() output before"""
+
+    def format(self, record):
+        text = record.getMessage()
+        if getattr(record, 'repeated', 0):
+            text += f" (repeated {record.repeated} times)"
+        return text
+
+
+class LogSystem:
+    """Queue handler, background writer and the summary thread"""
+
+    def __init__(self, handlers, rate_limit, level):
+        self._queue = queue.SimpleQueue()
+        self.rate_limit = RateLimitFilter(rate_limit)
+        self.queue_handler = logging.handlers.QueueHandler(self._queue)
+        self.queue_handler.addFilter(self.rate_limit)
+        self.listener = logging.handlers.QueueListener(self._queue, *handlers, respect_handler_level=True)
+
+        root = logging.getLogger()
+        root.handlers = [self.queue_handler]
+        root.setLevel(level)
+
+        self._stop = threading.Event()
+        self._summary_thread = threading.Thread(target=self._summarise, name="log-summary", daemon=True)
+
+    def start(self):
+        self.listener.start()
+        self._summary_thread.start()
+
+    def _summarise(self):
+        interval = max(1.0, self.rate_limit.interval / 4)
+        while not self._stop.wait(interval):
+            self._emit_summaries()
+
+    def _emit_summaries(self, force=False):
+        for record in self.rate_limit.expired_summaries(force):
+            # Skip the filter, the summary is what the filter held back
+            self.queue_handler.emit(record)
+
+    def stop(self):
+        """Write pending summaries and everything still queued"""
+        self._stop.set()
+        self._emit_summaries(force=True)
+        self.listener.stop()
+        for handler in self.listener.handlers:
+            handler.close()
+
+
+def setup_logging():
+    """Route all logging through the background writer - call once at startup"""
+    global _system
+    handlers = []
+    if config.LOG_FILE:
+        path = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), config.LOG_FILE)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        file_handler = logging.handlers.RotatingFileHandler(
+            path, maxBytes=config.LOG_MAX_BYTES, backupCount=config.LOG_BACKUP_COUNT, encoding='utf-8')
+        file_handler.setFormatter(StructuredFormatter(config.LOG_FORMAT))
+        handlers.append(file_handler)
+    if config.LOG_CONSOLE:
+        console = logging.StreamHandler(sys.stdout)
+        console.setFormatter(ConsoleFormatter())
+        handlers.append(console)
+    _system = LogSystem(handlers, config.LOG_RATE_LIMIT_SECONDS, config.LOG_LEVEL)
+    _system.start()
+    return _system
+
+
+class _Dispatch(logging.Handler):
+    """Hands a record from another process to the logger of the same name here"""
+
+    def emit(self, record):
+        logging.getLogger(record.name).handle(record)
+
+
+class ChildLogs:
+    """Collects log records of child processes into this process's log system
+
+    Children call forward_to() with `queue`; their records then go through
+    the same rate limit, file and console as the parent's own.
+    """
+
+    def __init__(self, context):
+        self.queue = context.Queue()
+        self.listener = logging.handlers.QueueListener(self.queue, _Dispatch())
+
+    def start(self):
+        self.listener.start()
+
+    def stop(self):
+        self.listener.stop()
+        self.queue.close()
+
+
+def forward_to(log_queue):
+    """Send all records of this (child) process to the parent's ChildLogs"""
+    root = logging.getLogger()
+    root.handlers = [logging.handlers.QueueHandler(log_queue)]
+    root.setLevel(config.LOG_LEVEL)
+
+
+def shutdown():
+    """Flush and stop the background writer (before exit or exec)"""
+    global _system
+    if _system:
+        _system.stop()
+        _system = None
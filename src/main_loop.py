@@ -0,0 +1,218 @@
+"""The steps of one main loop pass, and the classic synchronous driver
+
+MainLoop holds the components main.py sets up. handle_input(),
+apply_config(), update() and render() are the steps of one pass; run()
+calls them once per frame and sleeps until the next (MAIN_LOOP = 'sync').
+src/async_loop.py drives the same steps from asyncio.
+"""
+import logging
+import time
+import pygame
+import config
+from src.metrics import metrics
+
+
+# Changing these needs a new display surface
+DISPLAY_SETTINGS = {'SCREEN_WIDTH', 'SCREEN_HEIGHT', 'FULLSCREEN'}
+
+logger = logging.getLogger(__name__)
+
+
+def create_display():
+    """Open the window (or fullscreen mode) with the configured size"""
+    if config.FULLSCREEN:
+        return pygame.display.set_mode((config.SCREEN_WIDTH, config.SCREEN_HEIGHT), pygame.FULLSCREEN)
+    return pygame.display.set_mode((config.SCREEN_WIDTH, config.SCREEN_HEIGHT))
+
+
+def create_frame_output(screen):
+    """Optional shared-memory frame output for stream capture"""
+    if not config.FRAME_OUTPUT_ENABLED:
+        return None
+    try:
+        from src.frame_output import FrameOutput
+        return FrameOutput(screen.get_width(), screen.get_height())
+    except Exception as e:
+        logger.error("Failed to initialize frame output: %s", e)
+        return None
+
+
+class MainLoop:
+    """Components of the running shot clock and the steps of one loop pass"""
+
+    def __init__(self, screen, ui, timer_state, input_handler, command_queue, config_reloader, perf_control,
+                 startup, background, frame_output=None, audio_system=None, gpio_control=None,
+                 timing_process=None, remote_server=None, state_feed=None, sync_leader=None,
+                 match_recorder=None, governor=None, watchdog=None):
+        self.screen = screen
+        self.ui = ui
+        self.timer_state = timer_state
+        self.input_handler = input_handler
+        self.command_queue = command_queue
+        self.config_reloader = config_reloader
+        self.perf_control = perf_control
+        self.startup = startup
+        self.background = background
+        self.frame_output = frame_output
+        self.audio_system = audio_system
+        self.gpio_control = gpio_control
+        self.timing_process = timing_process
+        self.remote_server = remote_server
+        self.state_feed = state_feed
+        self.sync_leader = sync_leader
+        self.match_recorder = match_recorder
+        self.governor = governor
+        self.watchdog = watchdog
+        self.perf = None  # Profiler of the current pass, None = no instrumentation
+
+    def mark(self, section):
+        if self.perf:
+            self.perf.mark(section)
+
+    def begin(self, idle=0.0):
+        """Start a pass: pick up the profiler if F3/F4 switched it on
+
+        `idle` is how long the loop deliberately waited for this pass (asyncio)
+        """
+        self.perf = self.perf_control.profiler
+        if self.perf:
+            self.perf.begin(idle)
+
+    def handle_input(self, events=None):
+        """Process pygame events, then the commands from remote clients and controllers
+
+        Args:
+            events: Events already taken from the queue, None = get them now
+
+        Returns:
+            bool: False if quit was requested
+        """
+        running = self.input_handler.handle_events(events)
+        self.mark('events')
+        self.command_queue.process(self.timer_state)
+        return running
+
+    def apply_config(self):
+        """Apply reloaded config between frames (the timers keep running)
+
+        Returns:
+            set: Names of the settings that changed
+        """
+        changed = self.config_reloader.apply_pending()
+        if changed:
+            if changed & DISPLAY_SETTINGS:
+                self.screen = create_display()
+                if self.frame_output:
+                    self.frame_output.close()
+                self.frame_output = create_frame_output(self.screen)
+                self.ui.frame_output = self.frame_output
+                self.ui.resize(self.screen)
+                self.perf_control.scale = self.ui.scale
+            if self.frame_output and 'COLOR_BACKGROUND' in changed:
+                self.frame_output.set_background(config.COLOR_BACKGROUND)
+            self.ui.apply_config(changed)
+            if self.governor:
+                self.governor.invalidate()
+            if self.input_handler.controllers:
+                self.input_handler.controllers.apply_config(changed)
+            if self.timing_process:
+                self.timing_process.apply_config(changed)
+            else:
+                self.audio_system.apply_config(changed)
+                self.gpio_control.apply_config(changed)
+        self.mark('other')
+        return changed
+
+    def update(self):
+        """Advance the timers and hand the state to everything that follows it
+
+        Returns:
+            bool: False if the timing process died
+        """
+        timer_state = self.timer_state
+        if self.timing_process and not self.timing_process.alive:
+            logger.error("Timing process exited (code %s), stopping", self.timing_process.process.exitcode)
+            return False
+        timer_state.update()
+        self.mark('update')
+
+        # Record frame/shot transitions
+        if self.match_recorder:
+            self.match_recorder.observe(timer_state)
+
+        # Share state with remote clients
+        if self.remote_server:
+            self.remote_server.publish(timer_state)
+        if self.state_feed:
+            self.state_feed.publish(timer_state)
+        if self.sync_leader:
+            self.sync_leader.publish(timer_state)
+        self.mark('other')
+
+        if self.audio_system:
+            self.audio_system.update(timer_state)
+        self.mark('audio')
+        if self.gpio_control:
+            self.gpio_control.update(timer_state)
+        self.mark('gpio')
+        return True
+
+    def render(self):
+        """Draw and flip - on lower governor levels only when something shown changed or the refresh is due
+
+        Returns:
+            bool: True if a frame was drawn
+        """
+        drawn = False
+        governor = self.governor
+        if not governor or self.perf_control.hud or governor.should_draw(self.ui.content_key(self.timer_state)):
+            self.ui.draw(self.timer_state, flip=False)
+            if self.perf_control.hud:
+                self.perf_control.hud.draw(self.screen)
+            self.mark('draw')
+            pygame.display.flip()
+            drawn = True
+        self.mark('flip')
+
+        startup = self.startup
+        if startup.ready_at is None:
+            if startup.first_frame_at is None:
+                startup.first_frame()
+                # Joysticks are set up on the main thread (SDL event handling), after the clock is visible
+                with startup.phase('joystick'):
+                    self.input_handler.init_joysticks()
+            if self.background.poll():
+                startup.ready()
+        self.mark('other')
+        return drawn
+
+    def end(self, work):
+        """Finish a pass that took `work` seconds: step the render quality"""
+        if self.governor and self.governor.frame(work):
+            self.ui.show_assets = self.governor.show_assets
+            self.ui.invalidate_frame()
+
+    def run(self):
+        """Classic loop: poll everything once per frame, then sleep until the next"""
+        clock = pygame.time.Clock()
+        last_frame = None
+        running = True
+        while running:
+            if self.watchdog:
+                self.watchdog.heartbeat()
+            frame_start = time.perf_counter()
+            if last_frame is not None:
+                metrics.observe_frame(frame_start - last_frame)
+            last_frame = frame_start
+
+            self.begin()
+            running = self.handle_input()
+            self.apply_config()
+            if not self.update():
+                break
+            self.render()
+            self.end(time.perf_counter() - frame_start)
+
+            # Maintain frame rate
+            clock.tick(config.FPS)
+            self.mark('sleep')
@@ -0,0 +1,246 @@
+"""Operational metrics in Prometheus text format
+
+Counters and histograms are plain Python numbers updated on the hot path.
+Most have a single writer thread (the main loop) and take no lock; a scrape
+only reads them, so at worst it sees a value one update old. Labelled
+counters are also written from other threads (input events from the
+controller thread in process isolation), so inc_label() takes a lock and
+render() works on a copy of the labels. Formatting happens only when the
+/metrics endpoint is scraped or the textfile is written.
+
+With PROCESS_ISOLATION audio, LEDs and GPIO buttons run in the timing
+process. Their counters are recorded there, published in its shared state
+buffer and added to this process's values at render time.
+
+Exposed either on http://<pi>:METRICS_PORT/metrics or as a file for the
+node_exporter textfile collector (METRICS_TEXTFILE_PATH).
+"""
+import bisect
+import http.server
+import logging
+import os
+import threading
+import time
+import config
+
+
+# Loop period buckets around the 16.7 ms budget at 60 FPS
+FRAME_BUCKETS = (0.005, 0.010, 0.0167, 0.020, 0.025, 0.033, 0.050, 0.100, 0.250, 1.0)
+AUDIO_BUCKETS = (0.001, 0.005, 0.010, 0.020, 0.050, 0.100, 0.250)
+STALL_BUCKETS = (1.0, 2.0, 5.0, 10.0, 30.0, 60.0, 300.0)
+INPUT_SOURCES = ('keyboard', 'mouse', 'joystick', 'gpio', 'remote')
+
+logger = logging.getLogger(__name__)
+
+
+def _format_value(value):
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic counter, optionally split by one label"""
+
+    def __init__(self, name, help, label=None, values=()):
+        self.name = name
+        self.help = help
+        self.label = label
+        self.value = 0
+        self.values = dict.fromkeys(values, 0)
+        self._lock = threading.Lock()  # Labels are counted from several threads
+
+    def inc(self, amount=1):
+        self.value += amount
+
+    def inc_label(self, label_value, amount=1):
+        with self._lock:
+            self.values[label_value] = self.values.get(label_value, 0) + amount
+
+    def render(self, extra=None):
+        """`extra`: counts from another process to add (per label value if labelled)"""
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} counter"]
+        if self.label:
+            with self._lock:
+                values = dict(self.values)  # A new label must not change the dict mid-scrape
+            for label_value, value in (extra or {}).items():
+                values[label_value] = values.get(label_value, 0) + value
+            for label_value, value in values.items():
+                lines.append(f'{self.name}{{{self.label}="{label_value}"}} {_format_value(value)}')
+        else:
+            lines.append(f"{self.name} {_format_value(self.value + (extra or 0))}")
+        return lines
+
+
+class Gauge:
+    """Value read from a callback at scrape time (`kind` 'counter' for totals kept elsewhere)"""
+
+    def __init__(self, name, help, read, kind='gauge'):
+        self.name = name
+        self.help = help
+        self.read = read
+        self.kind = kind
+
+    def render(self):
+        value = self.read()
+        if value is None:
+            return []
+        return [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} {self.kind}",
+                f"{self.name} {_format_value(value)}"]
+
+
+class Histogram:
+    """Fixed-bucket histogram - observe() is a bisect and two additions"""
+
+    def __init__(self, name, help, buckets):
+        self.name = name
+        self.help = help
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self.sum = 0.0
+
+    def observe(self, value):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+
+    def render(self, extra=None):
+        """`extra`: (bucket counts, sum) from another process to add"""
+        lines = [f"# HELP {self.name} {self.help}", f"# TYPE {self.name} histogram"]
+        counts = list(self.counts)  # Cumulative counts must come from one copy
+        value_sum = self.sum
+        if extra:
+            counts = [count + other for count, other in zip(counts, extra[0])]
+            value_sum += extra[1]
+        total = 0
+        for bound, count in zip(self.buckets + (float('inf'),), counts):
+            total += count
+            le = '+Inf' if bound == float('inf') else repr(bound)
+            lines.append(f'{self.name}_bucket{{le="{le}"}} {total}')
+        lines.append(f"{self.name}_sum {value_sum!r}")
+        lines.append(f"{self.name}_count {total}")
+        return lines
+
+
+def resident_memory():
+    """Resident set size of this process in bytes (Linux), None elsewhere"""
+    try:
+        with open('/proc/self/statm') as f:
+            return int(f.read().split()[1]) * os.sysconf('SC_PAGE_SIZE')
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+class Metrics:
+    """All metrics of the shot clock - one shared instance, `metrics` below"""
+
+    def __init__(self):
+        self.started = time.monotonic()
+        self.timer_state = None
+        self.governor = None
+        self.timing = None  # TimingProcess with PROCESS_ISOLATION, its counters are added
+        self.frame_seconds = Histogram(
+            'shotclock_frame_seconds', 'Main loop period including the frame rate sleep', FRAME_BUCKETS)
+        self.frames_dropped = Counter(
+            'shotclock_frames_dropped_total', 'Loop iterations that took longer than 1.5 frame budgets')
+        self.audio_latency = Histogram(
+            'shotclock_audio_play_latency_seconds', 'Time from the timer crossing a cue to play() returning',
+            AUDIO_BUCKETS)
+        self.loop_stalls = Counter('shotclock_loop_stalls_total', 'Main loop stalls detected by the watchdog')
+        self.loop_stall_seconds = Histogram(
+            'shotclock_loop_stall_seconds', 'Duration of recovered main loop stalls', STALL_BUCKETS)
+        self.gpio_writes = Counter('shotclock_gpio_writes_total', 'LED pin writes')
+        self.input_events = Counter(
+            'shotclock_input_events_total', 'Handled input events by source', 'source', INPUT_SOURCES)
+        self._metrics = [
+            self.frame_seconds, self.frames_dropped, self.loop_stalls, self.loop_stall_seconds,
+            self.audio_latency, self.gpio_writes, self.input_events,
+            Gauge('shotclock_uptime_seconds', 'Seconds since start', lambda: round(time.monotonic() - self.started, 3)),
+            Gauge('process_resident_memory_bytes', 'Resident memory size in bytes', resident_memory),
+            Gauge('shotclock_frames_started_total', 'Frames started since launch',
+                  lambda: self.timer_state.frames_started if self.timer_state else None, 'counter'),
+            Gauge('shotclock_shots_total', 'Shot clocks started since launch',
+                  lambda: self.timer_state.shots_started if self.timer_state else None, 'counter'),
+            Gauge('shotclock_render_quality_level', 'Render governor level (0 full ... 3 minimal)',
+                  lambda: self.governor.level if self.governor else None),
+        ]
+
+    def observe_frame(self, period):
+        """Record one main-loop period in seconds"""
+        self.frame_seconds.observe(period)
+        if period > 1.5 / config.FPS:
+            self.frames_dropped.inc()
+
+    def render(self):
+        """Prometheus text exposition format"""
+        lines = []
+        extra = self.timing.read_metrics() if self.timing else {}
+        for metric in self._metrics:
+            lines.extend(metric.render(extra[metric.name]) if metric.name in extra else metric.render())
+        return '\n'.join(lines) + '\n'
+
+
+metrics = Metrics()
+
+
+class _MetricsHandler(http.server.BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(404)
+            return
+        body = metrics.render().encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4; charset=utf-8')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, format, *args):
+        pass  # Scrapes every few seconds would flood the log
+
+
+class MetricsExporter:
+    """Serves /metrics over HTTP and/or writes a textfile-collector file"""
+
+    def __init__(self, port=None, textfile=None, interval=None):
+        self.port = config.METRICS_PORT if port is None else port
+        self.textfile = textfile or config.METRICS_TEXTFILE_PATH
+        self.interval = config.METRICS_TEXTFILE_INTERVAL if interval is None else interval
+        self.server = None
+        self._stop = threading.Event()
+        self._threads = []
+
+    def start(self):
+        if self.port is not None:
+            self.server = http.server.ThreadingHTTPServer(('', self.port), _MetricsHandler)
+            self.server.daemon_threads = True
+            self.port = self.server.server_address[1]
+            self._spawn(self.server.serve_forever, 'metrics-http')
+            logger.info("Metrics: http://0.0.0.0:%d/metrics", self.port)
+        if self.textfile:
+            self._spawn(self._write_loop, 'metrics-textfile')
+            logger.info("Metrics: writing %s every %ss", self.textfile, self.interval)
+
+    def _spawn(self, target, name):
+        thread = threading.Thread(target=target, name=name, daemon=True)
+        thread.start()
+        self._threads.append(thread)
+
+    def _write_loop(self):
+        while not self._stop.wait(self.interval):
+            self.write_textfile()
+
+    def write_textfile(self):
+        """Atomically replace the textfile (the collector must never see half a file)"""
+        tmp_path = f"{self.textfile}.{os.getpid()}.tmp"
+        try:
+            with open(tmp_path, 'w') as f:
+                f.write(metrics.render())
+            os.replace(tmp_path, self.textfile)
+        except OSError as e:
+            logger.warning("Metrics: could not write %s: %s", self.textfile, e)
+
+    def stop(self):
+        self._stop.set()
+        if self.server:
+            self.server.shutdown()
+            self.server.server_close()
+        if self.textfile:
+            self.write_textfile()
@@ -0,0 +1,235 @@
+"""Frame profiler with on-screen HUD and CSV export
+
+Times each section of the main loop with two perf_counter() calls per
+section (a few microseconds per frame). Percentiles are only computed when
+the HUD refreshes, and with both HUD and CSV off the profiler is dropped
+entirely, so the loop runs without any instrumentation.
+"""
+import array
+import logging
+import os
+import time
+import pygame
+import pygame.freetype
+import config
+
+
+SECTIONS = ('events', 'update', 'audio', 'gpio', 'draw', 'flip', 'sleep', 'other')
+HUD_REFRESH = 0.5       # Seconds between HUD text updates
+TEMP_REFRESH = 2.0      # Seconds between CPU temperature reads
+MISSED_FACTOR = 1.5     # A frame slower than 1.5x the budget skipped at least one refresh
+
+logger = logging.getLogger(__name__)
+
+
+def read_cpu_temp(path=None):
+    """CPU temperature in °C, or None where the thermal zone is not available"""
+    try:
+        with open(path or config.PERF_THERMAL_PATH) as f:
+            return int(f.read().strip()) / 1000
+    except (OSError, ValueError):
+        return None
+
+
+def percentile(sorted_values, p):
+    """Nearest-rank percentile of an already sorted sequence"""
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(len(sorted_values) * p / 100))
+    return sorted_values[index]
+
+
+class FrameProfiler:
+    """Rolling per-section timings of the last `window` frames (in seconds)"""
+
+    def __init__(self, window=None, fps=None):
+        self.window = window or config.PERF_WINDOW
+        self.budget = 1.0 / (fps or config.FPS)
+        self.samples = {name: array.array('d', bytes(8 * self.window)) for name in SECTIONS}
+        self.work = array.array('d', bytes(8 * self.window))   # frame time without sleep
+        self.period = array.array('d', bytes(8 * self.window))  # start to start of the next frame
+        self.index = 0
+        self.count = 0
+        self.frames = 0
+        self.missed = 0
+        self.cpu_temp = None
+        self._current = dict.fromkeys(SECTIONS, 0.0)
+        self._frame_start = None
+        self._last = None
+        self._next_temp = 0.0
+        self._csv = None
+        self.csv_path = None
+
+    def begin(self, idle=0.0):
+        """Call at the top of every loop iteration
+
+        `idle` is how long the loop deliberately waited before this iteration
+        (the asyncio loop sleeping until something happens). It stays in the
+        sleep section and the period but does not make the frame a missed one.
+        """
+        now = time.perf_counter()
+        if self._frame_start is not None:
+            self._finish(now, idle)
+        self._frame_start = self._last = now
+
+    def mark(self, section):
+        """Attribute the time since the previous mark to `section`"""
+        now = time.perf_counter()
+        self._current[section] += now - self._last
+        self._last = now
+
+    def _finish(self, now, idle):
+        current = self._current
+        i = self.index
+        for name in SECTIONS:
+            self.samples[name][i] = current[name]
+            current[name] = 0.0
+        period = now - self._frame_start
+        work = period - self.samples['sleep'][i]
+        self.work[i] = work
+        self.period[i] = period
+        self.index = (i + 1) % self.window
+        self.count = min(self.count + 1, self.window)
+        self.frames += 1
+        missed = period - idle > self.budget * MISSED_FACTOR
+        if missed:
+            self.missed += 1
+
+        if now >= self._next_temp:
+            self.cpu_temp = read_cpu_temp()
+            self._next_temp = now + TEMP_REFRESH
+        if self._csv:
+            row = ','.join(f"{self.samples[name][i] * 1000:.3f}" for name in SECTIONS)
+            temp = '' if self.cpu_temp is None else f"{self.cpu_temp:.1f}"
+            self._csv.write(f"{self.frames},{time.time():.3f},{row},{work * 1000:.3f},"
+                            f"{period * 1000:.3f},{int(missed)},{temp}\n")
+
+    def _recent(self, values):
+        if self.count < self.window:
+            return sorted(values[:self.count])
+        return sorted(values)
+
+    def stats(self):
+        """p50/p95/p99 in milliseconds for every section plus work and period"""
+        result = {}
+        series = dict(self.samples, work=self.work, period=self.period)
+        for name, values in series.items():
+            ordered = self._recent(values)
+            result[name] = tuple(percentile(ordered, p) * 1000 for p in (50, 95, 99))
+        return result
+
+    def start_csv(self, directory=None):
+        """Write one row per frame to a new CSV file"""
+        directory = directory or config.PERF_CSV_DIR or os.getcwd()
+        os.makedirs(directory, exist_ok=True)
+        self.csv_path = os.path.join(directory, time.strftime('perf-%Y%m%d-%H%M%S.csv'))
+        self._csv = open(self.csv_path, 'w', buffering=64 * 1024)
+        self._csv.write('frame,timestamp,' + ','.join(f"{name}_ms" for name in SECTIONS)
+                        + ',work_ms,period_ms,missed,cpu_temp\n')
+        logger.info("Perf: recording to %s", self.csv_path)
+
+    def stop_csv(self):
+        if self._csv:
+            self._csv.close()
+            self._csv = None
+            logger.info("Perf: wrote %s", self.csv_path)
+
+    @property
+    def recording(self):
+        return self._csv is not None
+
+
+class PerfHUD:
+    """Semi-transparent table of the profiler's percentiles, top right"""
+
+    def __init__(self, profiler, scale=1.0):
+        self.profiler = profiler
+        self.font = pygame.freetype.Font(None, max(12, int(26 * scale)))
+        self.padding = max(4, int(12 * scale))
+        self.panel = None
+        self._next_refresh = 0.0
+
+    def _render(self):
+        stats = self.profiler.stats()
+        temp = self.profiler.cpu_temp
+        rows = [('ms', 'p50', 'p95', 'p99')]
+        for name in SECTIONS + ('work', 'period'):
+            rows.append((name,) + tuple(f"{value:.2f}" for value in stats[name]))
+        footer = [f"missed {self.profiler.missed}/{self.profiler.frames}",
+                  f"cpu {temp:.1f} C" if temp is not None else "cpu temp n/a"]
+        if self.profiler.recording:
+            footer.append("REC csv")
+
+        # The default font is proportional - right-align numbers in fixed columns
+        line_height = self.font.get_sized_height()
+        name_width = max(self.font.get_rect(row[0]).width for row in rows)
+        column = self.font.get_rect("000.00").width + self.padding
+        width = max(name_width + column * 3, max(self.font.get_rect(line).width for line in footer))
+        height = line_height * (len(rows) + len(footer))
+        panel = pygame.Surface((width + self.padding * 2, height + self.padding * 2))
+        panel.set_alpha(200)
+        panel.fill((0, 0, 0))
+        color = (200, 255, 200)
+        for i, row in enumerate(rows):
+            y = self.padding + i * line_height
+            self.font.render_to(panel, (self.padding, y), row[0], color)
+            for c, text in enumerate(row[1:], 1):
+                right = self.padding + name_width + column * c
+                self.font.render_to(panel, (right - self.font.get_rect(text).width, y), text, color)
+        for i, line in enumerate(footer, len(rows)):
+            self.font.render_to(panel, (self.padding, self.padding + i * line_height), line, color)
+        self.panel = panel
+
+    def draw(self, screen):
+        """Blit the table (text is re-rendered at most every HUD_REFRESH seconds)"""
+        now = time.perf_counter()
+        if self.panel is None or now >= self._next_refresh:
+            self._render()
+            self._next_refresh = now + HUD_REFRESH
+        screen.blit(self.panel, (screen.get_width() - self.panel.get_width() - self.padding, self.padding))
+
+
+class PerfControl:
+    """Switches profiling on and off at runtime (F3 = HUD, F4 = CSV)
+
+    `profiler` is None while neither HUD nor CSV is active, the main loop
+    then skips every measurement.
+    """
+
+    def __init__(self, scale=1.0):
+        self.scale = scale
+        self.profiler = None
+        self.hud = None
+        if config.PERF_HUD_ENABLED:
+            self.toggle_hud()
+
+    def _ensure_profiler(self):
+        if self.profiler is None:
+            self.profiler = FrameProfiler()
+
+    def _drop_if_idle(self):
+        if self.hud is None and self.profiler and not self.profiler.recording:
+            self.profiler = None
+
+    def toggle_hud(self):
+        if self.hud:
+            self.hud = None
+        else:
+            self._ensure_profiler()
+            self.hud = PerfHUD(self.profiler, self.scale)
+        self._drop_if_idle()
+
+    def toggle_csv(self):
+        if self.profiler and self.profiler.recording:
+            self.profiler.stop_csv()
+        else:
+            self._ensure_profiler()
+            try:
+                self.profiler.start_csv()
+            except OSError as e:
+                logger.warning("Perf: could not start CSV export: %s", e)
+        self._drop_if_idle()
+
+    def close(self):
+        if self.profiler:
+            self.profiler.stop_csv()
@@ -0,0 +1,108 @@
+"""Phase schedule: which shot time and announcement apply at which frame time
+
+A schedule is an ordered list of phases, each starting when the remaining
+frame time reaches its threshold:
+
+    PHASES = [
+        (600, 15, 'assets/sounds/15_seconds.wav'),  # from the start of the frame
+        (300, 10, 'assets/sounds/10_seconds.wav'),  # from 5:00 remaining
+    ]
+
+config.PHASES = None keeps the classic two halves from FIRST_HALF_DURATION,
+SHOT_TIME_FIRST_HALF/SECOND_HALF and the two ANNOUNCEMENT_* files.
+
+The thresholds are precomputed into a sorted table; lookups are a binary
+search. TimerState caches the current index and only looks it up again when
+the frame time leaves the current phase.
+"""
+import bisect
+import collections
+import config
+
+
+Phase = collections.namedtuple('Phase', ['threshold', 'shot_time', 'announcement'])
+
+# Settings the schedule is built from
+PHASE_SETTINGS = ('PHASES', 'FRAME_DURATION', 'FIRST_HALF_DURATION', 'SHOT_TIME_FIRST_HALF',
+                  'SHOT_TIME_SECOND_HALF', 'ANNOUNCEMENT_15_SECONDS', 'ANNOUNCEMENT_10_SECONDS')
+
+_cache = (None, None)  # (settings, schedule)
+
+
+def parse_phases(value):
+    """Check a PHASES value and convert it to a list of Phase
+
+    Raises:
+        ValueError: Not a list of (threshold, shot time, announcement) with
+        falling thresholds
+    """
+    if not isinstance(value, (list, tuple)) or not value:
+        raise ValueError("PHASES must be a non-empty list of [threshold, shot time, announcement]")
+    phases = []
+    for entry in value:
+        if not isinstance(entry, (list, tuple)) or len(entry) not in (2, 3):
+            raise ValueError(f"PHASES entry {entry!r} must be [threshold, shot time, announcement]")
+        threshold, shot_time = entry[0], entry[1]
+        announcement = entry[2] if len(entry) == 3 else None
+        for number in (threshold, shot_time):
+            if isinstance(number, bool) or not isinstance(number, (int, float)):
+                raise ValueError(f"PHASES entry {entry!r}: threshold and shot time must be numbers")
+        if threshold < 0 or not 1 <= shot_time <= 600:
+            raise ValueError(f"PHASES entry {entry!r}: threshold must be >= 0, shot time 1-600")
+        if announcement is not None and not isinstance(announcement, str):
+            raise ValueError(f"PHASES entry {entry!r}: announcement must be a file path")
+        phases.append(Phase(threshold, shot_time, announcement or None))
+    thresholds = [phase.threshold for phase in phases]
+    if any(a <= b for a, b in zip(thresholds, thresholds[1:])):
+        raise ValueError("PHASES thresholds must fall from phase to phase")
+    return phases
+
+
+class PhaseSchedule:
+    """Precomputed phase table"""
+
+    def __init__(self, phases):
+        self.phases = tuple(phases)
+        # Negated thresholds of the phases after the first, ascending for bisect
+        self._keys = [-phase.threshold for phase in self.phases[1:]]
+
+    def __len__(self):
+        return len(self.phases)
+
+    def index(self, frame_remaining):
+        """Index of the phase for the remaining frame time
+
+        A phase applies from its threshold (inclusive) down to the next one,
+        the first phase also above its threshold.
+        """
+        return bisect.bisect_right(self._keys, -frame_remaining)
+
+    def bounds(self, index):
+        """(lower, upper) frame time of a phase: it applies while lower < remaining <= upper"""
+        upper = self.phases[index].threshold if index else float('inf')
+        lower = self.phases[index + 1].threshold if index + 1 < len(self.phases) else float('-inf')
+        return lower, upper
+
+    def shot_time(self, frame_remaining):
+        return self.phases[self.index(frame_remaining)].shot_time
+
+
+def from_config():
+    """The schedule described by the current config"""
+    if config.PHASES is not None:
+        return PhaseSchedule(parse_phases(config.PHASES))
+    # A config without announcements must still start the clock
+    return PhaseSchedule([
+        Phase(config.FRAME_DURATION, config.SHOT_TIME_FIRST_HALF, getattr(config, 'ANNOUNCEMENT_15_SECONDS', None)),
+        Phase(config.FIRST_HALF_DURATION, config.SHOT_TIME_SECOND_HALF,
+              getattr(config, 'ANNOUNCEMENT_10_SECONDS', None)),
+    ])
+
+
+def schedule():
+    """Shared schedule for all consumers, rebuilt only when one of its settings changed"""
+    global _cache
+    settings = tuple(getattr(config, name, None) for name in PHASE_SETTINGS)
+    if settings != _cache[0]:
+        _cache = (settings, from_config())
+    return _cache[1]
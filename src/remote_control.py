@@ -0,0 +1,308 @@
+"""Local HTTP/WebSocket control API for phones and tablets at the table"""
+import asyncio
+import json
+import logging
+import threading
+import time
+import config
+from src.commands import COMMANDS
+from src.spectator import SpectatorHub, SPECTATOR_PAGE
+from src.websocket import (
+    OPCODE_CLOSE, OPCODE_PING, OPCODE_PONG, OPCODE_TEXT,
+    websocket_accept_key, websocket_frame, read_websocket_frame,
+)
+
+
+logger = logging.getLogger(__name__)
+
+MAX_HEADER_LINES = 100
+MAX_BODY_SIZE = 64 * 1024
+
+STATUS_TEXT = {
+    200: 'OK',
+    202: 'Accepted',
+    204: 'No Content',
+    400: 'Bad Request',
+    404: 'Not Found',
+    405: 'Method Not Allowed',
+    413: 'Payload Too Large',
+}
+
+# Minimal referee page served on "/" - talks to the same API as any other client
+CONTROL_PAGE = """<!doctype html>
+<html><head><meta charset="utf-8"><meta name="viewport" content="width=device-width, initial-scale=1">
+<title>Snooker Shot Clock</title>
+<style>
+body{font-family:sans-serif;background:#374b50;color:#fff;text-align:center;margin:0;padding:1em}
+#clock{font-size:3em;margin:.5em 0}
+button{font-size:1.4em;width:45%;margin:2%;padding:1em 0;border:3px solid #fff;border-radius:12px;background:#374b50;color:#fff}
+</style></head><body>
+<div id="clock">--:-- / --</div>
+<button data-cmd="start">Start Frame</button><button data-cmd="pause">Pause</button>
+<button data-cmd="reset-shot">Reset Shot</button><button data-cmd="reset-frame">Reset Frame</button>
+<button id="rolling">Balls Rolling</button><button data-cmd="undo">Undo</button>
+<script>
+const ws = new WebSocket(`ws://${location.host}/ws`);
+const send = (msg) => ws.readyState === 1 && ws.send(JSON.stringify(msg));
+document.querySelectorAll('[data-cmd]').forEach(b => b.onclick = () => send({command: b.dataset.cmd}));
+const rolling = document.getElementById('rolling');
+rolling.onpointerdown = () => send({command: 'balls-rolling', rolling: true});
+rolling.onpointerup = rolling.onpointerleave = () => send({command: 'balls-rolling', rolling: false});
+ws.onmessage = (e) => { const m = JSON.parse(e.data); if (m.state)
+  document.getElementById('clock').textContent = `${m.state.frame_time} / ${m.state.shot_time}`; };
+setInterval(() => send({command: 'state'}), 250);
+</script></body></html>
+"""
+
+
+class HTTPError(Exception):
+    """Raised for malformed requests, carries the HTTP status to answer with"""
+
+    def __init__(self, status, message):
+        super().__init__(message)
+        self.status = status
+
+
+async def read_http_request(reader):
+    """Read one HTTP/1.1 request
+
+    Returns:
+        tuple: (method, path, headers, body) or None if the client closed the connection
+    """
+    request_line = await reader.readline()
+    if not request_line:
+        return None
+    try:
+        method, path, _ = request_line.decode('latin-1').split(' ', 2)
+    except ValueError:
+        raise HTTPError(400, "Malformed request line")
+
+    headers = {}
+    for _ in range(MAX_HEADER_LINES):
+        line = await reader.readline()
+        if line in (b'\r\n', b'\n', b''):
+            break
+        name, _, value = line.decode('latin-1').partition(':')
+        headers[name.strip().lower()] = value.strip()
+    else:
+        raise HTTPError(400, "Too many headers")
+
+    length = int(headers.get('content-length', 0) or 0)
+    if length > MAX_BODY_SIZE:
+        raise HTTPError(413, "Request body too large")
+    body = await reader.readexactly(length) if length else b''
+    return method.upper(), path.split('?', 1)[0], headers, body
+
+
+def http_response(status, body=b'', content_type='application/json', keep_alive=True):
+    """Build a complete HTTP response"""
+    if isinstance(body, (dict, list)):
+        body = json.dumps(body).encode()
+    elif isinstance(body, str):
+        body = body.encode()
+    head = (
+        f"HTTP/1.1 {status} {STATUS_TEXT.get(status, '')}\r\n"
+        f"Content-Type: {content_type}\r\n"
+        f"Content-Length: {len(body)}\r\n"
+        "Access-Control-Allow-Origin: *\r\n"
+        "Access-Control-Allow-Methods: GET, POST, OPTIONS\r\n"
+        "Access-Control-Allow-Headers: Content-Type\r\n"
+        "Cache-Control: no-store\r\n"
+        f"Connection: {'keep-alive' if keep_alive else 'close'}\r\n\r\n"
+    )
+    return head.encode('latin-1') + body
+
+
+class RemoteControlServer:
+    """Embedded asyncio server running on a background thread (or on the main loop, see serve())
+
+    Commands are only queued here; the main loop applies them between frames
+    via the CommandQueue, so network clients never block rendering.
+    """
+
+    def __init__(self, command_queue, host=None, port=None):
+        self.command_queue = command_queue
+        self.spectators = SpectatorHub()
+        self.host = host if host is not None else config.REMOTE_HOST
+        self.port = port if port is not None else config.REMOTE_PORT
+        self.loop = None
+        self._thread = None
+        self._server = None
+        self._stop_future = None
+        self._ready = threading.Event()
+        self._snapshot = {}
+        self._clients = set()
+
+    def start(self):
+        """Start the server thread and wait until the socket is listening"""
+        self._thread = threading.Thread(target=self._run, name="remote-control", daemon=True)
+        self._thread.start()
+        self._ready.wait(timeout=5)
+        if self._server is None:
+            raise RuntimeError(f"Remote control server failed to start on {self.host}:{self.port}")
+
+    async def serve(self):
+        """Serve on the running event loop instead of a thread (MAIN_LOOP = 'asyncio')"""
+        self.loop = asyncio.get_running_loop()
+        await self._serve()
+
+    def stop(self):
+        """Stop the server and close all client connections"""
+        if self.loop and self._stop_future and not self.loop.is_closed():
+            self.loop.call_soon_threadsafe(self._finish)
+        if self._thread:
+            self._thread.join(timeout=2)
+            self._thread = None
+
+    def _finish(self):
+        if not self._stop_future.done():
+            self._stop_future.set_result(None)
+
+    def publish(self, timer_state):
+        """Publish the current timer state - call this every frame"""
+        # Swapping a reference is atomic, readers always see a complete snapshot
+        self._snapshot = dict(timer_state.snapshot(), applied=self.command_queue.applied)
+        self.spectators.publish(timer_state)
+
+    def _run(self):
+        self.loop = asyncio.new_event_loop()
+        asyncio.set_event_loop(self.loop)
+        try:
+            self.loop.run_until_complete(self._serve())
+        except Exception as e:
+            logger.error("Remote control server stopped: %s", e)
+        finally:
+            self._ready.set()
+            self.loop.close()
+
+    async def _serve(self):
+        self._stop_future = self.loop.create_future()
+        self._server = await asyncio.start_server(self._handle_client, self.host, self.port)
+        # Pick up the real port when an ephemeral one (0) was requested
+        self.port = self._server.sockets[0].getsockname()[1]
+        self.spectators.attach(self.loop)
+        logger.info("Remote control listening on http://%s:%d/", self.host, self.port)
+        self._ready.set()
+        async with self._server:
+            await self._stop_future
+            tasks = list(self._clients)
+            for task in tasks:
+                task.cancel()
+            await asyncio.gather(*tasks, return_exceptions=True)
+
+    async def _handle_client(self, reader, writer):
+        task = asyncio.current_task()
+        self._clients.add(task)
+        try:
+            while True:
+                try:
+                    request = await read_http_request(reader)
+                except HTTPError as e:
+                    writer.write(http_response(e.status, {'ok': False, 'error': str(e)}, keep_alive=False))
+                    await writer.drain()
+                    return
+                if request is None:
+                    return
+                method, path, headers, body = request
+                if path in ('/ws', '/stream') and headers.get('upgrade', '').lower() == 'websocket':
+                    if await self._accept_websocket(writer, headers):
+                        if path == '/ws':
+                            await self._handle_websocket(reader, writer)
+                        else:
+                            await self.spectators.serve(reader, writer)
+                    return
+                keep_alive = headers.get('connection', '').lower() != 'close'
+                writer.write(self._handle_http(method, path, body, keep_alive))
+                await writer.drain()
+                if not keep_alive:
+                    return
+        except (asyncio.IncompleteReadError, ConnectionError, ValueError):
+            pass
+        except asyncio.CancelledError:
+            # Server shutdown - end quietly instead of propagating the cancellation
+            pass
+        finally:
+            self._clients.discard(task)
+            writer.close()
+
+    def _handle_http(self, method, path, body, keep_alive):
+        """Route a plain HTTP request"""
+        if method == 'OPTIONS':
+            return http_response(204, keep_alive=keep_alive)
+        if path == '/' and method == 'GET':
+            return http_response(200, CONTROL_PAGE, 'text/html; charset=utf-8', keep_alive)
+        if path == '/spectator' and method == 'GET':
+            return http_response(200, SPECTATOR_PAGE, 'text/html; charset=utf-8', keep_alive)
+        if path == '/api/state' and method == 'GET':
+            return http_response(200, {'ok': True, 'state': self._snapshot}, keep_alive=keep_alive)
+        if path.startswith('/api/'):
+            if method != 'POST':
+                return http_response(405, {'ok': False, 'error': "Use POST for commands"}, keep_alive=keep_alive)
+            try:
+                args = json.loads(body) if body else {}
+            except ValueError:
+                return http_response(400, {'ok': False, 'error': "Invalid JSON body"}, keep_alive=keep_alive)
+            status, result = self._execute(path[len('/api/'):], args)
+            return http_response(status, result, keep_alive=keep_alive)
+        return http_response(404, {'ok': False, 'error': "Not found"}, keep_alive=keep_alive)
+
+    async def _accept_websocket(self, writer, headers):
+        """Answer the WebSocket upgrade handshake
+
+        Returns:
+            bool: True if the connection was upgraded
+        """
+        key = headers.get('sec-websocket-key')
+        if not key:
+            writer.write(http_response(400, {'ok': False, 'error': "Missing Sec-WebSocket-Key"}, keep_alive=False))
+            await writer.drain()
+            return False
+        writer.write((
+            "HTTP/1.1 101 Switching Protocols\r\n"
+            "Upgrade: websocket\r\n"
+            "Connection: Upgrade\r\n"
+            f"Sec-WebSocket-Accept: {websocket_accept_key(key)}\r\n\r\n"
+        ).encode('latin-1'))
+        await writer.drain()
+        return True
+
+    async def _handle_websocket(self, reader, writer):
+        """Serve JSON commands over WebSocket until the client leaves"""
+        while True:
+            opcode, payload = await read_websocket_frame(reader)
+            if opcode == OPCODE_CLOSE:
+                writer.write(websocket_frame(payload[:2], opcode=OPCODE_CLOSE))
+                await writer.drain()
+                return
+            if opcode == OPCODE_PING:
+                writer.write(websocket_frame(payload, opcode=OPCODE_PONG))
+            elif opcode == OPCODE_TEXT:
+                try:
+                    message = json.loads(payload)
+                    name = message.pop('command')
+                except (ValueError, KeyError, AttributeError, TypeError):
+                    response = {'ok': False, 'error': "Expected {\"command\": ...}"}
+                else:
+                    request_id = message.pop('id', None)
+                    if name == 'state':
+                        response = {'ok': True, 'state': self._snapshot}
+                    else:
+                        _, response = self._execute(name, message)
+                    if request_id is not None:
+                        response['id'] = request_id
+                writer.write(websocket_frame(json.dumps(response)))
+            await writer.drain()
+
+    def _execute(self, name, args):
+        """Queue a command for the main loop
+
+        Returns:
+            tuple: (HTTP status, response body)
+        """
+        if name not in COMMANDS:
+            return 404, {'ok': False, 'error': f"Unknown command: {name}"}
+        if not isinstance(args, dict):
+            return 400, {'ok': False, 'error': "Arguments must be a JSON object"}
+        # Applied as of its arrival, not of the next loop pass
+        number = self.command_queue.put(name, args, at=time.time())
+        return 202, {'ok': True, 'command': name, 'queued': number}
@@ -0,0 +1,177 @@
+"""Spectator fan-out: push timer state to many read-only viewers"""
+import asyncio
+import collections
+import json
+import logging
+import math
+import socket
+import config
+from src.websocket import (
+    OPCODE_CLOSE, OPCODE_PING, OPCODE_PONG,
+    websocket_frame, read_websocket_frame,
+)
+
+
+logger = logging.getLogger(__name__)
+
+# Read-only page for scoreboards, stream overlays and the bar TV.
+# Digits are interpolated locally between updates, the server only pushes transitions.
+SPECTATOR_PAGE = """<!doctype html>
+<html><head><meta charset="utf-8"><meta name="viewport" content="width=device-width, initial-scale=1">
+<title>Snooker Shot Clock</title>
+<style>
+body{font-family:sans-serif;background:#374b50;color:#fff;margin:0;display:flex;height:100vh;align-items:center;justify-content:space-around}
+#frame{font-size:18vw}#shot{font-size:30vw}.warning{color:#ff6400}.critical{color:#f00}
+</style></head><body><div id="frame">--:--</div><div id="shot">--</div>
+<script>
+let state = null, received = 0;
+function connect() {
+  const ws = new WebSocket(`ws://${location.host}/stream`);
+  ws.onmessage = (e) => {
+    const m = JSON.parse(e.data);
+    state = m.type === 'snapshot' ? m.state : Object.assign(state || {}, m.changes);
+    received = performance.now();
+  };
+  ws.onclose = () => setTimeout(connect, 1000);
+}
+function render() {
+  if (state) {
+    const ticking = state.state === 'running';
+    const elapsed = ticking ? (performance.now() - received) / 1000 : 0;
+    const frame = Math.max(0, state.frame_time_remaining - elapsed);
+    const shot = Math.max(0, state.shot_time_remaining - (state.balls_rolling ? 0 : elapsed));
+    const pad = (n) => String(Math.floor(n)).padStart(2, '0');
+    document.getElementById('frame').textContent = `${pad(frame / 60)}:${pad(frame % 60)}`;
+    const el = document.getElementById('shot');
+    el.textContent = Math.ceil(shot);
+    el.className = shot > 0 && shot <= state.critical_time ? 'critical' : shot > 0 && shot <= state.warning_time ? 'warning' : '';
+  }
+  requestAnimationFrame(render);
+}
+connect(); render();
+</script></body></html>
+"""
+
+
+class Subscriber:
+    """One connected viewer with its own bounded outgoing queue"""
+
+    __slots__ = ('writer', 'queue', 'wakeup', 'resync')
+
+    def __init__(self, writer, max_queue):
+        self.writer = writer
+        self.queue = collections.deque(maxlen=max_queue)
+        self.wakeup = asyncio.Event()
+        self.resync = True  # Every subscriber starts with a full snapshot
+
+
+class SpectatorHub:
+    """Delta-encoded state stream shared by all spectators
+
+    The main loop only checks whether a visible transition happened (second
+    changed, state changed, balls rolling). Encoding and fan-out run on the
+    server's event loop, and every message is encoded once for all viewers.
+    """
+
+    def __init__(self, max_queue=None, evict_timeout=None, write_buffer=None):
+        self.max_queue = max_queue or config.SPECTATOR_MAX_QUEUE
+        self.evict_timeout = evict_timeout or config.SPECTATOR_EVICT_TIMEOUT
+        self.write_buffer = write_buffer or config.SPECTATOR_WRITE_BUFFER
+        self.loop = None
+        self.subscribers = set()
+        self.evicted = 0
+        self._last_key = None
+        self._last_state = None
+        self._snapshot_frame = None
+        self._seq = 0
+
+    def attach(self, loop):
+        """Bind the hub to the event loop that owns the client connections"""
+        self.loop = loop
+
+    def publish(self, timer_state):
+        """Push a delta when a visible transition happened - call this every frame"""
+        key = (
+            timer_state.state,
+            int(timer_state.frame_time_remaining),
+            math.ceil(timer_state.shot_time_remaining),
+            timer_state.balls_rolling,
+        )
+        if key == self._last_key or self.loop is None:
+            return
+        self._last_key = key
+        state = timer_state.snapshot()
+        state['warning_time'] = config.SHOT_WARNING_TIME
+        state['critical_time'] = config.SHOT_CRITICAL_TIME
+        self.loop.call_soon_threadsafe(self._broadcast, state)
+
+    def _broadcast(self, state):
+        """Encode one transition and queue it for every subscriber"""
+        self._seq += 1
+        if self._last_state is None:
+            changes = state
+        else:
+            changes = {k: v for k, v in state.items() if self._last_state.get(k) != v}
+        self._last_state = state
+        delta = websocket_frame(json.dumps({'type': 'delta', 'seq': self._seq, 'changes': changes}))
+        self._snapshot_frame = websocket_frame(json.dumps({'type': 'snapshot', 'seq': self._seq, 'state': state}))
+
+        for subscriber in self.subscribers:
+            if not subscriber.resync:
+                if len(subscriber.queue) == self.max_queue:
+                    # Too far behind for deltas - drop them and catch up with one snapshot
+                    subscriber.queue.clear()
+                    subscriber.resync = True
+                else:
+                    subscriber.queue.append(delta)
+            subscriber.wakeup.set()
+
+    async def serve(self, reader, writer):
+        """Stream updates to an upgraded WebSocket connection until it closes"""
+        # Bound both the user-space and the kernel buffer of every viewer
+        writer.transport.set_write_buffer_limits(high=self.write_buffer)
+        sock = writer.get_extra_info('socket')
+        if sock is not None:
+            sock.setsockopt(socket.SOL_SOCKET, socket.SO_SNDBUF, self.write_buffer)
+        subscriber = Subscriber(writer, self.max_queue)
+        if self._snapshot_frame is not None:
+            subscriber.wakeup.set()
+        self.subscribers.add(subscriber)
+        pump = asyncio.ensure_future(self._pump(subscriber))
+        try:
+            # Viewers don't send commands, but we must read to notice close/ping
+            while not pump.done():
+                opcode, payload = await read_websocket_frame(reader)
+                if opcode == OPCODE_CLOSE:
+                    return
+                if opcode == OPCODE_PING:
+                    writer.write(websocket_frame(payload, opcode=OPCODE_PONG))
+        finally:
+            self.subscribers.discard(subscriber)
+            pump.cancel()
+
+    async def _pump(self, subscriber):
+        """Write queued messages, evicting the viewer if it stops reading"""
+        writer = subscriber.writer
+        try:
+            while True:
+                await subscriber.wakeup.wait()
+                subscriber.wakeup.clear()
+                if subscriber.resync:
+                    if self._snapshot_frame is None:
+                        continue
+                    subscriber.resync = False
+                    subscriber.queue.clear()
+                    writer.write(self._snapshot_frame)
+                else:
+                    writer.write(b''.join(subscriber.queue))
+                    subscriber.queue.clear()
+                if writer.transport.get_write_buffer_size() > self.write_buffer:
+                    await asyncio.wait_for(writer.drain(), self.evict_timeout)
+        except asyncio.TimeoutError:
+            self.evicted += 1
+            logger.warning("Spectator evicted after %ss without reading (%d left)", self.evict_timeout, len(self.subscribers) - 1)
+            self.subscribers.discard(subscriber)
+            writer.transport.abort()
+        except ConnectionError:
+            self.subscribers.discard(subscriber)
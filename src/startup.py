@@ -0,0 +1,100 @@
+"""Startup phase timing and parallel background initialisation"""
+import contextlib
+import logging
+import queue
+import threading
+import time
+
+
+logger = logging.getLogger(__name__)
+
+
+class StartupTimer:
+    """Records how long each startup phase took
+
+    Reports time-to-first-frame (clock visible) and time-to-fully-ready
+    (audio, GPIO, controllers and assets attached), both measured from `start`.
+    """
+
+    def __init__(self, start=None):
+        self.start = start if start is not None else time.perf_counter()
+        self.phases = []  # (name, started, duration) relative to start
+        self.first_frame_at = None
+        self.ready_at = None
+        self._lock = threading.Lock()
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        """Time a block of startup work (safe to use from several threads)"""
+        started = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.record(name, started, time.perf_counter())
+
+    def record(self, name, started, ended):
+        """Record a phase from two time.perf_counter() values"""
+        with self._lock:
+            self.phases.append((name, started - self.start, ended - started))
+
+    def first_frame(self):
+        """Call once the first frame has been presented"""
+        if self.first_frame_at is None:
+            self.first_frame_at = time.perf_counter() - self.start
+            logger.info("Startup: time to first frame %.0f ms", self.first_frame_at * 1000)
+
+    def ready(self):
+        """Call once all background initialisation has finished"""
+        if self.ready_at is not None:
+            return
+        self.ready_at = time.perf_counter() - self.start
+        with self._lock:
+            phases = sorted(self.phases, key=lambda p: p[1])
+        table = ''.join(f"\n  {name:<12} +{started * 1000:6.0f} ms  {duration * 1000:6.0f} ms"
+                        for name, started, duration in phases)
+        logger.info("Startup: time to fully ready %.0f ms%s", self.ready_at * 1000, table)
+
+
+class BackgroundInit:
+    """Runs slow initialisation steps on their own threads
+
+    Each step attaches itself when done (e.g. AudioSystem.load sets `ready`),
+    so the main loop can keep rendering while they run and only polls for
+    completion to report errors and the fully-ready time.
+    """
+
+    def __init__(self, timer):
+        self.timer = timer
+        self.pending = set()
+        self._done = queue.SimpleQueue()
+
+    def start(self, name, func):
+        """Run `func` in a daemon thread, timed as phase `name`"""
+        self.pending.add(name)
+        thread = threading.Thread(target=self._run, args=(name, func), name=f"init-{name}", daemon=True)
+        thread.start()
+
+    def _run(self, name, func):
+        error = None
+        try:
+            with self.timer.phase(name):
+                func()
+        except Exception as e:
+            error = e
+        self._done.put((name, error))
+
+    def poll(self):
+        """Collect finished steps - call this every frame
+
+        Returns:
+            bool: True once every step has finished
+        """
+        while True:
+            try:
+                name, error = self._done.get_nowait()
+            except queue.Empty:
+                break
+            self.pending.discard(name)
+            if error:
+                logger.error("Startup: %s failed: %s", name, error)
+        return not self.pending
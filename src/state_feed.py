@@ -0,0 +1,142 @@
+"""Shared-memory timer state feed for local hardware drivers
+
+Mirrors TimerState into a small fixed-layout struct in a memory-mapped file.
+External processes (7-segment display, lighting controller) poll it without
+sockets or syscalls; a seqlock keeps every read consistent.
+
+Only depends on the standard library, so drivers can copy src/shm.py and
+this file next to their own code (then `from state_feed import ...`).
+Run `python -m src.state_feed` to watch it.
+"""
+import collections
+import logging
+import math
+import struct
+import sys
+import time
+try:
+    from src.shm import SharedBuffer, default_path
+except ImportError:
+    from shm import SharedBuffer, default_path  # Copied next to a driver without the src package
+
+
+MAGIC = b'SSCS'
+VERSION = 1
+
+# magic, version, seq, timestamp, frame remaining, shot remaining,
+# state, balls rolling, phase, shot seconds shown, reserved
+STATE_FORMAT = '<4sIQdddIIIII'
+STATE_SIZE = struct.calcsize(STATE_FORMAT)  # 64 bytes
+SEQ_OFFSET = 8
+PAYLOAD_FORMAT = '<dddIIII'  # everything after the sequence counter that changes
+PAYLOAD_OFFSET = 16
+
+STATE_IDLE = 0
+STATE_RUNNING = 1
+STATE_PAUSED = 2
+STATE_CODES = {'idle': STATE_IDLE, 'running': STATE_RUNNING, 'paused': STATE_PAUSED}
+
+logger = logging.getLogger(__name__)
+
+FeedState = collections.namedtuple('FeedState', [
+    'seq', 'timestamp', 'frame_remaining', 'shot_remaining',
+    'state', 'balls_rolling', 'phase', 'shot_seconds',
+])
+
+
+def feed_path(path=None):
+    """Default location of the state feed"""
+    return path or default_path('snooker-shotclock-state')
+
+
+class StateFeedWriter:
+    """Writes the timer state into the shared struct - call publish() every frame"""
+
+    def __init__(self, path=None):
+        self.path = feed_path(path)
+        self.shared = SharedBuffer(self.path, STATE_SIZE, SEQ_OFFSET)
+        struct.pack_into('<4sI', self.shared.mm, 0, MAGIC, VERSION)
+        logger.info("State feed: %s", self.path)
+
+    def publish(self, timer_state):
+        """Mirror the current timer state"""
+        shot_seconds = int(timer_state.get_shot_time_str())
+        self.shared.begin_write()
+        struct.pack_into(
+            PAYLOAD_FORMAT, self.shared.mm, PAYLOAD_OFFSET,
+            time.monotonic(),
+            timer_state.frame_time_remaining,
+            timer_state.shot_time_remaining,
+            STATE_CODES[timer_state.state.value],
+            1 if timer_state.balls_rolling else 0,
+            timer_state.get_phase(),
+            shot_seconds,
+        )
+        self.shared.end_write()
+
+    def close(self):
+        self.shared.close()
+
+
+class StateFeedReader:
+    """Lock-free reader for the state feed, any number may run at once"""
+
+    def __init__(self, path=None):
+        self.path = feed_path(path)
+        self.shared = SharedBuffer(self.path, STATE_SIZE, SEQ_OFFSET, create=False)
+        magic, version = struct.unpack_from('<4sI', self.shared.mm, 0)
+        if magic != MAGIC or version != VERSION:
+            raise ValueError(f"{self.path} is not a shot clock state feed")
+
+    def read(self):
+        """Read a consistent copy of the state
+
+        Returns:
+            FeedState or None if the writer kept the struct busy
+        """
+        seq, payload = self.shared.read_consistent(
+            lambda mm: struct.unpack_from(PAYLOAD_FORMAT, mm, PAYLOAD_OFFSET))
+        if seq is None:
+            return None
+        timestamp, frame, shot, state, rolling, phase, shot_seconds = payload
+        return FeedState(seq, timestamp, frame, shot, state, bool(rolling), phase, shot_seconds)
+
+    def read_interpolated(self):
+        """Read the state and advance the timers (and shot_seconds) to now
+
+        The writer updates once per main loop pass - with MAIN_LOOP = 'asyncio'
+        only when something changed; readers polling faster can use this to
+        get sub-frame values. time.monotonic() is system-wide, so the writer's
+        timestamp is directly comparable.
+        """
+        state = self.read()
+        if state is None or state.state != STATE_RUNNING:
+            return state
+        elapsed = max(0.0, time.monotonic() - state.timestamp)
+        frame = max(0.0, state.frame_remaining - elapsed)
+        shot = state.shot_remaining if state.balls_rolling else max(0.0, state.shot_remaining - elapsed)
+        # Rounded up like the display, so a 7-segment driver shows the same digit as the screen
+        return state._replace(frame_remaining=frame, shot_remaining=shot, shot_seconds=math.ceil(shot))
+
+    def close(self):
+        self.shared.close()
+
+
+def watch(path=None, interval=0.1):
+    """Print the feed continuously (for checking wiring of external drivers)"""
+    reader = StateFeedReader(path)
+    names = {v: k for k, v in STATE_CODES.items()}
+    while True:
+        state = reader.read_interpolated()
+        if state:
+            print(f"\rseq {state.seq:>10}  {names.get(state.state, '?'):<8} "
+                  f"frame {state.frame_remaining:7.2f}  shot {state.shot_remaining:6.2f} "
+                  f"phase {state.phase} {'ROLLING' if state.balls_rolling else '       '}", end='', flush=True)
+        time.sleep(interval)
+
+
+if __name__ == "__main__":
+    try:
+        watch(sys.argv[1] if len(sys.argv) > 1 else None)
+    except KeyboardInterrupt:
+        print()
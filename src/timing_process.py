@@ -0,0 +1,319 @@
+"""Timing authority in its own process (PROCESS_ISOLATION)
+
+The timing process owns the real TimerState and everything that has to
+happen on time: audio cues, GPIO LEDs and buttons, and the match history.
+It updates at TIMING_RATE and publishes the state into a small shared
+buffer (seqlock, see src/shm.py), together with the metrics only it records.
+The render process only reads that buffer and sends commands (the names
+from src/commands.py) over a pipe, so a slow draw or flip can neither move
+the clock nor delay a zonk.
+
+Both sides can be pinned to their own CPU core, the timing process can run
+with realtime priority.
+"""
+import contextlib
+import logging
+import multiprocessing
+import os
+import struct
+import threading
+import time
+import config
+from src import logs
+from src.commands import COMMANDS, CommandQueue, apply_command
+from src.game_state import GameState, TimerState
+from src.metrics import AUDIO_BUCKETS, metrics
+from src.shm import SharedBuffer, default_path
+
+
+# seq, timestamp, frame remaining, shot remaining, shot limit,
+# state, balls rolling, frames started, shots started
+SEQ_OFFSET = 0
+PAYLOAD_FORMAT = '<ddddIIII'
+PAYLOAD_OFFSET = 8
+# Counters of the timing process for the render process's exporter:
+# GPIO button presses, LED pin writes, audio latency sum and bucket counts
+METRICS_FORMAT = '<QQd' + 'I' * (len(AUDIO_BUCKETS) + 1)
+METRICS_OFFSET = 56
+STATE_SIZE = 128
+
+STATES = (GameState.IDLE, GameState.RUNNING, GameState.PAUSED)
+STATE_CODES = {state: code for code, state in enumerate(STATES)}
+
+logger = logging.getLogger(__name__)
+
+
+def tune_process(cpu=None, priority=None):
+    """Pin this process to one CPU core and/or give it realtime priority
+
+    Args:
+        cpu: Core number, None = leave the affinity alone
+        priority: SCHED_FIFO priority (1-99), None = normal scheduling
+    """
+    if cpu is not None:
+        try:
+            os.sched_setaffinity(0, {cpu})
+            logger.info("Process %d pinned to CPU %d", os.getpid(), cpu)
+        except (AttributeError, OSError) as e:
+            logger.warning("Could not pin process to CPU %d: %s", cpu, e)
+    if priority is not None:
+        try:
+            os.sched_setscheduler(0, os.SCHED_FIFO, os.sched_param(priority))
+            logger.info("Process %d runs with realtime priority %d", os.getpid(), priority)
+        except (AttributeError, OSError) as e:
+            # Needs root or CAP_SYS_NICE (LimitRTPRIO= in the systemd unit)
+            logger.warning("Could not set realtime priority %d: %s", priority, e)
+
+
+def publish(shared, timer_state, counters=None):
+    """Write the timer state (and the values of `counters()`) into the shared buffer"""
+    shared.begin_write()
+    struct.pack_into(
+        PAYLOAD_FORMAT, shared.mm, PAYLOAD_OFFSET,
+        time.monotonic(),
+        timer_state.frame_time_remaining,
+        timer_state.shot_time_remaining,
+        timer_state.shot_time_limit,
+        STATE_CODES[timer_state.state],
+        1 if timer_state.balls_rolling else 0,
+        timer_state.frames_started,
+        timer_state.shots_started,
+    )
+    if counters:
+        struct.pack_into(METRICS_FORMAT, shared.mm, METRICS_OFFSET, *counters)
+    shared.end_write()
+
+
+def counters():
+    """The metrics recorded in this process, in METRICS_FORMAT order"""
+    audio = metrics.audio_latency
+    return (metrics.input_events.values.get('gpio', 0), metrics.gpio_writes.value, audio.sum, *audio.counts)
+
+
+def read(shared):
+    """Consistent copy of the published payload, None if the writer kept it busy"""
+    seq, payload = shared.read_consistent(lambda mm: struct.unpack_from(PAYLOAD_FORMAT, mm, PAYLOAD_OFFSET))
+    return payload
+
+
+def run(conn, path, log_queue):
+    """Entry point of the timing process"""
+    logs.forward_to(log_queue)
+    threading.current_thread().name = 'timing'
+    # Same overrides as the render process, later changes arrive as 'config' messages
+    from src.config_reload import ConfigReloader
+    ConfigReloader().load_now()
+    tune_process(config.TIMING_CPU, config.TIMING_PRIORITY)
+
+    from src.audio import AudioSystem
+    from src.gpio_control import GPIOControl
+    timer_state = TimerState()
+    shared = SharedBuffer(path, STATE_SIZE, SEQ_OFFSET)
+    audio_system = AudioSystem(defer_load=True)
+    buttons = CommandQueue()  # GPIO presses from the gpiozero thread, applied in this loop
+    gpio_control = GPIOControl(buttons, defer_setup=True)
+    threading.Thread(target=audio_system.load, name="audio-load", daemon=True).start()
+    threading.Thread(target=gpio_control.setup, name="gpio-setup", daemon=True).start()
+
+    history_writer = None
+    match_recorder = None
+    if config.HISTORY_ENABLED:
+        try:
+            from src.history import HistoryWriter, MatchRecorder
+            history_writer = HistoryWriter()
+            history_writer.start()
+            match_recorder = MatchRecorder(history_writer)
+        except Exception as e:
+            logger.error("Failed to start match history: %s", e)
+            history_writer = None
+
+    logger.info("Timing process %d started, %d updates/s", os.getpid(), config.TIMING_RATE)
+    interval = 1.0 / config.TIMING_RATE
+    next_tick = time.monotonic()
+    try:
+        while True:
+            # Wake up for the next tick or as soon as a command arrives
+            if conn.poll(max(0.0, next_tick - time.monotonic())):
+                name, args = conn.recv()
+                if name == 'quit':
+                    break
+                if name == 'config':
+                    for key, value in args.items():
+                        setattr(config, key, value)
+                    audio_system.apply_config(args)
+                    gpio_control.apply_config(args)
+                else:
+                    apply_command(timer_state, name, args, args.pop('at', None))
+            buttons.process(timer_state)
+            now = time.monotonic()
+            if now >= next_tick:
+                next_tick += interval
+                if next_tick < now:
+                    next_tick = now + interval  # Fell behind, don't try to catch up
+
+            timer_state.update()
+            if match_recorder:
+                match_recorder.observe(timer_state)
+            publish(shared, timer_state, counters())
+            audio_system.update(timer_state)
+            gpio_control.update(timer_state)
+    except (EOFError, KeyboardInterrupt):
+        pass  # Render process gone
+    finally:
+        gpio_control.cleanup()
+        if history_writer:
+            history_writer.stop()
+        shared.close()
+        logger.info("Timing process stopped")
+
+
+class TimingProcess:
+    """Render-side handle: starts the timing process, sends commands, reads the state"""
+
+    def __init__(self, path=None):
+        self.path = path or default_path(f'snooker-shotclock-timing-{os.getpid()}')
+        self.shared = SharedBuffer(self.path, STATE_SIZE, SEQ_OFFSET)
+        publish(self.shared, TimerState())  # Idle state until the process is up
+        # Spawn, not fork: this process already has threads and (soon) a display
+        context = multiprocessing.get_context('spawn')
+        self.child_logs = logs.ChildLogs(context)
+        self._conn, child_conn = context.Pipe()
+        self.process = context.Process(target=run, args=(child_conn, self.path, self.child_logs.queue),
+                                       name='timing', daemon=True)
+        self._child_conn = child_conn
+        self._send_lock = threading.Lock()  # The controller thread sends too
+
+    def start(self):
+        self.child_logs.start()
+        self.process.start()
+        self._child_conn.close()
+
+    @property
+    def alive(self):
+        return self.process.is_alive()
+
+    def send(self, name, args=None):
+        """Queue a command for the timing process (never blocks on it)"""
+        try:
+            with self._send_lock:
+                self._conn.send((name, args or {}))
+        except OSError as e:
+            logger.error("Command %s not sent to the timing process: %s", name, e)
+
+    def put(self, name, args=None, source='remote', at=None):
+        """CommandQueue.put() straight to the timing process
+
+        For input threads (controllers) whose commands should not wait for
+        the next rendered frame.
+        """
+        if name not in COMMANDS:
+            raise ValueError(f"Unknown command: {name}")
+        args = dict(args or {})
+        if at is not None:
+            args['at'] = at
+        self.send(name, args)
+        metrics.input_events.inc_label(source)
+
+    def apply_config(self, changed):
+        """Forward reloaded config values"""
+        self.send('config', {name: getattr(config, name) for name in changed})
+
+    def read(self):
+        return read(self.shared)
+
+    def read_metrics(self):
+        """Metrics recorded in the timing process by name, for Metrics.render()"""
+        seq, values = self.shared.read_consistent(
+            lambda mm: struct.unpack_from(METRICS_FORMAT, mm, METRICS_OFFSET))
+        if values is None:
+            return {}
+        gpio_inputs, gpio_writes, audio_sum, *audio_counts = values
+        return {
+            metrics.input_events.name: {'gpio': gpio_inputs},
+            metrics.gpio_writes.name: gpio_writes,
+            metrics.audio_latency.name: (audio_counts, audio_sum),
+        }
+
+    def stop(self):
+        if self.process.is_alive():
+            self.send('quit')
+            self.process.join(timeout=2)
+            if self.process.is_alive():
+                self.process.terminate()
+        self._conn.close()
+        self.child_logs.stop()
+        self.shared.close()
+        try:
+            os.unlink(self.path)
+        except OSError:
+            pass
+
+
+class RemoteTimerState(TimerState):
+    """TimerState of the render process
+
+    update() mirrors the timing process (advanced to now between its ticks),
+    the actions are sent to it. Input handlers, remote commands and the UI
+    use it like the local TimerState.
+    """
+
+    def __init__(self, timing):
+        super().__init__()
+        self.timing = timing
+        self._at = None  # Input timestamp inside at()
+
+    @contextlib.contextmanager
+    def at(self, timestamp):
+        """Send the commands in this block with the input timestamp, the timing process applies them as of then"""
+        self._at = timestamp
+        try:
+            yield
+        finally:
+            self._at = None
+
+    def _send(self, name, args=None):
+        if self._at is not None:
+            args = dict(args or {}, at=self._at)
+        self.timing.send(name, args)
+
+    def start_frame(self):
+        self._send('start')
+
+    def pause_frame(self):
+        self._send('pause')
+
+    def reset_frame(self):
+        self._send('reset-frame')
+
+    def reset_shot(self):
+        self._send('reset-shot')
+
+    def set_balls_rolling(self, rolling):
+        self._send('balls-rolling', {'rolling': rolling})
+
+    def undo(self):
+        self._send('undo')
+
+    def redo(self):
+        self._send('redo')
+
+    def update(self):
+        payload = self.timing.read()
+        if payload is None:
+            return
+        timestamp, frame, shot, limit, state, rolling, frames_started, shots_started = payload
+        self.state = STATES[state]
+        if self.state == GameState.RUNNING:
+            elapsed = max(0.0, time.monotonic() - timestamp)
+            frame = max(0.0, frame - elapsed)
+            if not rolling:
+                shot = max(0.0, shot - elapsed)
+            self.last_update = self.clock()
+        else:
+            self.last_update = None
+        self.frame_time_remaining = frame
+        self.shot_time_remaining = shot
+        self.shot_time_limit = limit
+        self.balls_rolling = bool(rolling)
+        self.frames_started = frames_started
+        self.shots_started = shots_started
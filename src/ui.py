@@ -1,9 +1,24 @@
 """UI rendering for the shot clock"""
+import logging
 import pygame
 import pygame.freetype
 import os
 import math
 import config
+from src.assets import load_image
+from src.game_state import GameState
+
+
+LOGO_PATH = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'assets', 'SFW-Logo.png')
+LOGO_BASE_SIZE = 280  # Logo size at the 1920x1080 reference
+ROLLING_TEXT = "BALLS ROLLING - Timer Paused"
+
+logger = logging.getLogger(__name__)
+
+
+def scale_factor(width, height):
+    """How much to scale relative to the 1920x1080 reference"""
+    return min(width / 1920, height / 1080)
 
 
 class Button:
@@ -49,43 +64,116 @@ class Button:
         return self.rect.collidepoint(pos)
 
 
+class ShotProgressBar:
+    """Shrinking bar under the shot timer, pre-rendered so each frame is one blit
+    
+    The sprite sheet has one row per colour (normal, warning, critical) and
+    sub-pixel step. Each row holds the full bar, one blended edge pixel and
+    the empty track, so showing x filled pixels is a bar-wide window
+    starting at `width - x`.
+    """
+    
+    SUBSTEPS = 4  # Edge pixel shades - 4 steps per pixel keep slow movement smooth
+    
+    def __init__(self, rect):
+        self.rect = rect
+        width, height = rect.size
+        track = blend(config.COLOR_BACKGROUND, config.COLOR_TEXT, 0.2)
+        colors = (config.COLOR_TEXT, config.COLOR_WARNING, config.COLOR_CRITICAL)
+        self.sheet = pygame.Surface((2 * width + 1, len(colors) * self.SUBSTEPS * height)).convert()
+        for level, color in enumerate(colors):
+            for substep in range(self.SUBSTEPS):
+                y = (level * self.SUBSTEPS + substep) * height
+                self.sheet.fill(color, (0, y, width, height))
+                self.sheet.fill(blend(track, color, substep / self.SUBSTEPS), (width, y, 1, height))
+                self.sheet.fill(track, (width + 1, y, width, height))
+        self._window = pygame.Rect(0, 0, width, height)
+        
+    def draw(self, screen, fraction, level):
+        """Draw the bar `fraction` full in colour `level` (0 normal, 1 warning, 2 critical)
+        
+        Returns:
+            tuple: (filled pixels, edge shade, level) - changes exactly when the bar does
+        """
+        width, height = self.rect.size
+        steps = int(min(1.0, max(0.0, fraction)) * width * self.SUBSTEPS)
+        filled, substep = divmod(steps, self.SUBSTEPS)
+        self._window.x = width - filled
+        self._window.y = (level * self.SUBSTEPS + substep) * height
+        screen.blit(self.sheet, self.rect, self._window)
+        return filled, substep, level
+
+
+def blend(background, color, amount):
+    """Mix `amount` (0..1) of `color` into `background`"""
+    return tuple(int(b + (c - b) * amount) for b, c in zip(background, color))
+
+
 class UI:
     """Main UI renderer with responsive layout"""
     
-    def __init__(self, screen):
+    def __init__(self, screen, frame_output=None, defer_assets=False):
+        # Optional shared-memory output for streaming (see src/frame_output.py)
+        self.frame_output = frame_output
+        self._last_frame_key = None
+        self._last_dynamic_rects = []
+        
+        # Initialize fonts using freetype (more stable)
+        pygame.freetype.init()
+        
+        self.logo = None
+        self.logo_loading = True
+        self.show_assets = True  # Logo and translucent overlay, off on the governor's 'minimal' level
+        self._build_layout(screen)
+        if not defer_assets:
+            self.load_logo()
+            
+    def resize(self, screen):
+        """Switch to a new display surface - rebuilds fonts, layout and the logo"""
+        self._build_layout(screen)
+        self.load_logo()
+        
+    def _build_layout(self, screen):
+        """Create fonts and button/logo positions for the screen size"""
         self.screen = screen
         self.width = screen.get_width()
         self.height = screen.get_height()
         
         # Calculate responsive sizes based on screen dimensions
         # Scale factor: how much to scale relative to 1920x1080 reference
-        self.scale = min(self.width / 1920, self.height / 1080)
-        
-        print(f"Screen: {self.width}x{self.height}, Scale factor: {self.scale:.2f}")
+        self.scale = scale_factor(self.width, self.height)
         
-        # Initialize fonts using freetype (more stable)
-        pygame.freetype.init()
+        logger.info("Screen: %dx%d, Scale factor: %.2f", self.width, self.height, self.scale)
         
         # Font sizes scale with screen size (based on 1920x1080 reference)
         # These are the base sizes at 1920x1080, they will scale down/up automatically
-        self.font_frame_timer = pygame.freetype.SysFont(None, int(380 * self.scale))
-        self.font_shot_timer = pygame.freetype.SysFont(None, int(700 * self.scale))
-        self.font_button = pygame.freetype.SysFont(None, int(70 * self.scale))
-        self.font_hint = pygame.freetype.SysFont(None, int(45 * self.scale))
-        
-        print(f"Font sizes - Frame: {int(380 * self.scale)}, Shot: {int(700 * self.scale)}, Button: {int(70 * self.scale)}")
-        
-        # Load logo first to calculate layout
-        logo_path = os.path.join(os.path.dirname(os.path.dirname(__file__)), 'assets', 'SFW-Logo.png')
-        self.logo_size = int(280 * self.scale)  # Responsive logo size
-        try:
-            self.logo = pygame.image.load(logo_path)
-            # Scale logo to match button size
-            self.logo = pygame.transform.smoothscale(self.logo, (self.logo_size, self.logo_size))
-            print(f"Logo loaded from {logo_path}, size: {self.logo_size}x{self.logo_size}")
-        except Exception as e:
-            print(f"Failed to load logo: {e}")
-            self.logo = None
+        # Font(None) is the bundled default font - same as SysFont(None), but skips the system font scan
+        self.font_frame_timer = pygame.freetype.Font(None, int(380 * self.scale))
+        self.font_shot_timer = pygame.freetype.Font(None, int(700 * self.scale))
+        self.font_button = pygame.freetype.Font(None, int(70 * self.scale))
+        self.font_hint = pygame.freetype.Font(None, int(45 * self.scale))
+        self.font_rolling = pygame.freetype.Font(None, int(50 * self.scale))
+        self.font_logo = pygame.freetype.Font(None, int(60 * self.scale))
+        
+        # "Balls rolling" overlay background, the text never changes
+        # (fonts and surfaces created per frame add up over a 12 hour day)
+        padding = int(30 * self.scale)
+        rolling_rect = self.font_rolling.get_rect(ROLLING_TEXT)
+        self.rolling_overlay = pygame.Surface((rolling_rect.width + padding * 2, rolling_rect.height + padding))
+        self.rolling_overlay.set_alpha(220)
+        self.rolling_overlay.fill((40, 40, 40))
+        
+        logger.debug("Font sizes - Frame: %d, Shot: %d, Button: %d", int(380 * self.scale), int(700 * self.scale), int(70 * self.scale))
+        
+        # Progress bar under the shot timer (pre-rendered for the current colours)
+        self.shot_progress = None
+        if config.SHOW_SHOT_PROGRESS:
+            bar = pygame.Rect(0, 0, int(self.width * 0.32), max(4, int(18 * self.scale)))
+            bar.midtop = (int(self.width * 0.80), self.height // 2 + int(290 * self.scale))
+            self.shot_progress = ShotProgressBar(bar)
+        
+        # Logo size is needed for the layout, the image itself may load later
+        self.logo_size = int(LOGO_BASE_SIZE * self.scale)  # Responsive logo size
         
         # Create buttons with responsive layout: [Start] [Logo] [Reset] - LEFT ALIGNED
         # All sizes are relative to screen dimensions for perfect scaling
@@ -94,7 +182,7 @@ class UI:
         button_margin = int(self.width * 0.015)  # ~1.5% margin from edges
         spacing = int(self.width * 0.02)         # ~2% spacing between elements
         
-        print(f"Button size: {button_width}x{button_height}, margin: {button_margin}, spacing: {spacing}")
+        logger.debug("Button size: %dx%d, margin: %d, spacing: %d", button_width, button_height, button_margin, spacing)
         
         # Left-aligned layout (not centered)
         start_x = button_margin
@@ -118,6 +206,29 @@ class UI:
             scale=self.scale
         )
         
+    def load_logo(self):
+        """Load the club logo scaled and in display format (may run on a background thread)"""
+        try:
+            # Scale logo to match button size (prescaled copies come from the asset cache)
+            self.logo = load_image(LOGO_PATH, (self.logo_size, self.logo_size))
+            logger.info("Logo loaded from %s, size: %dx%d", LOGO_PATH, self.logo_size, self.logo_size)
+        except Exception as e:
+            logger.error("Failed to load logo: %s", e)
+            self.logo = None
+        self.logo_loading = False
+        # Logo area changed - send the next shared-memory frame in full
+        self.invalidate_frame()
+        
+    def apply_config(self, changed):
+        """Rebuild what depends on reloaded config values"""
+        if changed & {'SHOW_SHOT_PROGRESS', 'COLOR_BACKGROUND', 'COLOR_TEXT', 'COLOR_WARNING', 'COLOR_CRITICAL'}:
+            self._build_layout(self.screen)
+        self.invalidate_frame()
+        
+    def invalidate_frame(self):
+        """Send the next shared-memory frame in full (e.g. after colours changed)"""
+        self._last_frame_key = None
+        
     def draw_logo(self):
         """Draw the club logo between the buttons"""
         # Position logo at calculated position (same y as buttons)
@@ -128,16 +239,18 @@ class UI:
             # Draw the actual logo
             logo_rect = self.logo.get_rect(center=(center_x, center_y))
             self.screen.blit(self.logo, logo_rect)
+        elif self.logo_loading:
+            # Leave the area empty until the background load attaches the logo
+            return
         else:
             # Fallback to placeholder circle
             radius = self.logo_size // 2
             pygame.draw.circle(self.screen, (100, 150, 200), (center_x, center_y), radius)
             pygame.draw.circle(self.screen, config.COLOR_TEXT, (center_x, center_y), radius, 4)
             
-            logo_font = pygame.freetype.SysFont(None, int(60 * self.scale))
-            text_rect = logo_font.get_rect("LOGO")
+            text_rect = self.font_logo.get_rect("LOGO")
             text_rect.center = (center_x, center_y)
-            logo_font.render_to(self.screen, text_rect, "LOGO", config.COLOR_TEXT)
+            self.font_logo.render_to(self.screen, text_rect, "LOGO", config.COLOR_TEXT)
     
     def draw_led_indicators(self, timer_state):
         """Draw 5 LED circles for countdown visualization"""
@@ -151,6 +264,9 @@ class UI:
         shot_time = math.ceil(timer_state.shot_time_remaining)
         leds_lit = min(5, max(0, shot_time))  # 5s=5 LEDs, 4s=4 LEDs, ..., 0s=0 LEDs
         
+        # Area covered by the LEDs (returned for dirty-region tracking)
+        area = pygame.Rect(start_x, start_y - led_size // 2, 5 * (led_size + led_spacing), led_size + 1)
+        
         # Draw 5 LEDs
         for i in range(5):
             x = start_x + i * (led_size + led_spacing)
@@ -175,8 +291,25 @@ class UI:
             border_width = max(1, int(2 * self.scale))
             pygame.draw.circle(self.screen, (255, 255, 255), (x + led_size//2, y), led_size//2, border_width)
         
-    def draw(self, timer_state):
-        """Draw the entire UI"""
+        return area
+        
+    def content_key(self, timer_state):
+        """Everything a frame shows except the progress bar - equal keys draw the same digits, colours and buttons"""
+        mouse_pos = pygame.mouse.get_pos()
+        return (
+            timer_state.get_frame_time_str(), timer_state.get_shot_time_str(),
+            timer_state.is_shot_warning(), timer_state.is_shot_critical(),
+            timer_state.state, timer_state.balls_rolling, self.button_start.rect.collidepoint(mouse_pos),
+            self.button_reset.rect.collidepoint(mouse_pos), self.logo is not None, self.logo_loading,
+        )
+        
+    def draw(self, timer_state, flip=True):
+        """Draw the entire UI
+        
+        Args:
+            timer_state: Current timer state
+            flip: Present the frame right away (False if the caller draws on top and flips itself)
+        """
         # Clear screen
         self.screen.fill(config.COLOR_BACKGROUND)
         
@@ -189,11 +322,15 @@ class UI:
         self.button_reset.draw(self.screen, self.font_button)
         
         # Draw logo
-        self.draw_logo()
+        if self.show_assets:
+            self.draw_logo()
+        
+        # Regions that can change between frames
+        dynamic_rects = [self.button_start.rect, self.button_reset.rect]
         
         # Draw LED countdown indicators (5 circles, top right) - optional
         if config.SHOW_LED_INDICATORS:
-            self.draw_led_indicators(timer_state)
+            dynamic_rects.append(self.draw_led_indicators(timer_state))
         
         # Draw hint text - only middle mouse button hint
         hint_middle = "Hold middle mouse button while balls rolling"
@@ -230,23 +367,46 @@ class UI:
         shot_x = int(self.width * 0.80)
         shot_rect.center = (shot_x, self.height // 2)
         self.font_shot_timer.render_to(self.screen, shot_rect, shot_time_text, shot_color)
+        dynamic_rects += [frame_rect, shot_rect]
+        
+        # Shot progress bar, same colours as the digits
+        progress = None
+        if self.shot_progress and timer_state.state != GameState.IDLE:
+            level = 2 if timer_state.is_shot_critical() else 1 if timer_state.is_shot_warning() else 0
+            fraction = timer_state.shot_time_remaining / timer_state.shot_time_limit if timer_state.shot_time_limit else 0.0
+            progress = self.shot_progress.draw(self.screen, fraction, level)
+            dynamic_rects.append(self.shot_progress.rect)
         
         # Draw "Balls Rolling" indicator when middle mouse is held
         if timer_state.balls_rolling:
-            rolling_text = "BALLS ROLLING - Timer Paused"
-            rolling_font = pygame.freetype.SysFont(None, int(50 * self.scale))
-            rolling_rect = rolling_font.get_rect(rolling_text)
+            rolling_rect = self.font_rolling.get_rect(ROLLING_TEXT)
             rolling_rect.center = (self.width // 2, int(self.height // 2 + (200 * self.scale)))
             
             # Draw semi-transparent background
-            padding = int(30 * self.scale)
-            overlay = pygame.Surface((rolling_rect.width + padding * 2, rolling_rect.height + padding))
-            overlay.set_alpha(220)
-            overlay.fill((40, 40, 40))
-            overlay_rect = overlay.get_rect(center=rolling_rect.center)
-            self.screen.blit(overlay, overlay_rect)
+            overlay_rect = self.rolling_overlay.get_rect(center=rolling_rect.center)
+            if self.show_assets:
+                self.screen.blit(self.rolling_overlay, overlay_rect)
+            dynamic_rects.append(overlay_rect)
             
             # Draw text
-            rolling_font.render_to(self.screen, rolling_rect, rolling_text, (255, 200, 0))
-        
-        pygame.display.flip()
+            self.font_rolling.render_to(self.screen, rolling_rect, ROLLING_TEXT, (255, 200, 0))
+        
+        if self.frame_output:
+            frame_key = (
+                frame_time_text, shot_time_text, shot_color, timer_state.balls_rolling,
+                self.button_start.is_hovered, self.button_reset.is_hovered, progress,
+            )
+            self._publish_frame(frame_key, dynamic_rects)
+        
+        if flip:
+            pygame.display.flip()
+        
+    def _publish_frame(self, frame_key, dynamic_rects):
+        """Copy the frame to the shared-memory output, but only if it changed"""
+        if frame_key == self._last_frame_key:
+            return
+        # First frame goes out in full, afterwards only the old and new dynamic regions
+        dirty = None if self._last_frame_key is None else dynamic_rects + self._last_dynamic_rects
+        self.frame_output.publish(self.screen, dirty)
+        self._last_frame_key = frame_key
+        self._last_dynamic_rects = dynamic_rects
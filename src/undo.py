@@ -0,0 +1,87 @@
+"""Undo/redo history for TimerState
+
+Every state-changing command first packs the current timer state into a
+fixed-size ring buffer (one preallocated bytearray, struct.pack_into), so
+taking a snapshot is O(1) and allocates nothing. Undo and redo swap the
+current state with a stored one; TimerState then advances the restored
+timers by the time that passed since the snapshot.
+"""
+import struct
+
+
+# taken at, frame remaining, shot remaining, shot limit, state, balls rolling
+SNAPSHOT = struct.Struct('<ddddBB')
+STATE_CODES = {'idle': 0, 'running': 1, 'paused': 2}
+STATE_VALUES = {code: value for value, code in STATE_CODES.items()}
+
+
+class UndoHistory:
+    """Ring of packed snapshots
+
+    Slots before `_head` can be undone, slots from `_head` on redone. Undo
+    and redo swap the current state with the one in the slot, so the slot
+    then holds what the other direction needs. A new push drops the redo
+    side; when the ring is full the oldest snapshot is overwritten.
+    """
+
+    __slots__ = ('capacity', '_buffer', '_head', '_undo', '_redo')
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self._buffer = bytearray(SNAPSHOT.size * capacity)
+        self._head = 0
+        self._undo = 0  # Snapshots that can be undone
+        self._redo = 0  # ... and redone
+
+    def __len__(self):
+        return self._undo
+
+    @property
+    def can_redo(self):
+        return self._redo > 0
+
+    def _pack(self, slot, timer_state, now):
+        SNAPSHOT.pack_into(
+            self._buffer, slot * SNAPSHOT.size, now,
+            timer_state.frame_time_remaining, timer_state.shot_time_remaining, timer_state.shot_time_limit,
+            STATE_CODES[timer_state.state.value], timer_state.balls_rolling,
+        )
+
+    def _swap(self, slot, timer_state, now):
+        saved = SNAPSHOT.unpack_from(self._buffer, slot * SNAPSHOT.size)
+        self._pack(slot, timer_state, now)
+        taken_at, frame, shot, limit, state, rolling = saved
+        return taken_at, frame, shot, limit, STATE_VALUES[state], bool(rolling)
+
+    def push(self, timer_state, now):
+        """Remember the state before a command"""
+        if not self.capacity:
+            return
+        self._pack(self._head, timer_state, now)
+        self._head = (self._head + 1) % self.capacity
+        self._undo = min(self._undo + 1, self.capacity)
+        self._redo = 0
+
+    def undo(self, timer_state, now):
+        """Swap in the state before the last command
+
+        Returns:
+            tuple: (taken at, frame remaining, shot remaining, shot limit,
+            state value, balls rolling) or None if there is nothing to undo
+        """
+        if not self._undo:
+            return None
+        self._head = (self._head - 1) % self.capacity
+        self._undo -= 1
+        self._redo += 1
+        return self._swap(self._head, timer_state, now)
+
+    def redo(self, timer_state, now):
+        """Swap back the state an undo replaced, same result as undo()"""
+        if not self._redo:
+            return None
+        saved = self._swap(self._head, timer_state, now)
+        self._head = (self._head + 1) % self.capacity
+        self._redo -= 1
+        self._undo += 1
+        return saved
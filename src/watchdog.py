@@ -0,0 +1,180 @@
+"""Main loop watchdog
+
+The main loop calls heartbeat() once per iteration. A background thread
+checks that heartbeats keep coming; when the loop stalls longer than the
+threshold (blocked audio device, stuck joystick read, ...) it dumps the
+stacks of all threads, and optionally exits for a restart (run.sh under
+systemd with Restart=on-failure starts it again). When the loop recovers,
+the stall duration is logged.
+
+Under systemd (Type=notify, WatchdogSec=...) the thread also sends
+WATCHDOG=1 keep-alives, but only while the loop is healthy.
+"""
+import logging
+import os
+import socket
+import sys
+import threading
+import time
+import traceback
+import config
+from src import logs
+from src.metrics import metrics
+
+
+RESTART_EXIT_CODE = 1       # Non-zero, so Restart=on-failure starts the process again
+RESTART_CLEANUP_SECONDS = 5.0  # Longest wait for on_restart, it may hang on the same device as the loop
+
+logger = logging.getLogger(__name__)
+
+
+def systemd_notify(message):
+    """Send a notification to systemd if started as a notify service
+
+    Returns:
+        bool: True if a NOTIFY_SOCKET was set and the message was sent
+    """
+    address = os.environ.get('NOTIFY_SOCKET')
+    if not address:
+        return False
+    if address.startswith('@'):
+        address = '\0' + address[1:]  # Abstract namespace socket
+    try:
+        with socket.socket(socket.AF_UNIX, socket.SOCK_DGRAM) as sock:
+            sock.sendto(message.encode(), address)
+        return True
+    except OSError:
+        return False
+
+
+def format_thread_stacks():
+    """Stack traces of all other running threads"""
+    names = {thread.ident: thread.name for thread in threading.enumerate()}
+    lines = []
+    for ident, frame in sys._current_frames().items():
+        if ident == threading.get_ident():
+            continue
+        lines.append(f"--- Thread {names.get(ident, '?')} ({ident}) ---")
+        lines.extend(line.rstrip('\n') for line in traceback.format_stack(frame))
+    return '\n'.join(lines)
+
+
+class LoopWatchdog:
+    """Detects main loop stalls and counts frame-budget overruns
+
+    heartbeat() only stores a timestamp and updates two counters, all
+    reporting happens on the watchdog thread.
+    """
+
+    def __init__(self, stall_threshold=None, restart=None, systemd=None, report_interval=60.0):
+        self.stall_threshold = config.WATCHDOG_STALL_SECONDS if stall_threshold is None else stall_threshold
+        self.restart = config.WATCHDOG_RESTART if restart is None else restart
+        self.systemd = config.WATCHDOG_SYSTEMD if systemd is None else systemd
+        self.report_interval = report_interval
+        self.budget = 1.0 / config.FPS
+        self.last_beat = None
+        self.overruns = 0        # Iterations over 1.5x the frame budget but below the stall threshold
+        self.worst_overrun = 0.0
+        self.stalls = 0
+        self.stall_durations = []
+        self.on_restart = None   # Cleanup before exiting for a restart (runs on the watchdog thread)
+        self._last_long_gap = 0.0
+        self._stalled_since = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    def heartbeat(self, idle=0.0):
+        """Call once per main loop iteration
+
+        Args:
+            idle: Seconds of the gap the loop deliberately waited for (asyncio
+                loop), not counted as an overrun
+        """
+        now = time.monotonic()
+        last = self.last_beat
+        self.last_beat = now
+        if last is None:
+            return
+        gap = now - last - idle
+        if self.budget * 1.5 < gap < self.stall_threshold:
+            self.overruns += 1
+            if gap > self.worst_overrun:
+                self.worst_overrun = gap
+        elif gap >= self.stall_threshold:
+            self._last_long_gap = gap  # Exact stall duration for the watchdog thread
+
+    def start(self):
+        self.last_beat = time.monotonic()
+        self._thread = threading.Thread(target=self._watch, name="watchdog", daemon=True)
+        self._thread.start()
+        if self.systemd:
+            systemd_notify('READY=1')
+        logger.info("Watchdog: stall threshold %.1fs%s", self.stall_threshold,
+                    ", restart on stall" if self.restart else "")
+
+    def stop(self):
+        self._stop.set()
+        if self._thread:
+            self._thread.join(timeout=2)
+        if self.systemd:
+            systemd_notify('STOPPING=1')
+        logger.info("Watchdog: %d stalls, %d frame overruns", self.stalls, self.overruns)
+
+    def _watch(self):
+        interval = min(1.0, self.stall_threshold / 4)
+        next_report = time.monotonic() + self.report_interval
+        reported_overruns = 0
+        while not self._stop.wait(interval):
+            now = time.monotonic()
+            last = self.last_beat
+            gap = now - last
+
+            if self._stalled_since is None:
+                if gap > self.stall_threshold:
+                    self._on_stall(last, gap)
+                elif self.systemd:
+                    systemd_notify('WATCHDOG=1')
+            elif last != self._stalled_since:
+                # Heartbeats are back
+                self._on_recover(self._last_long_gap)
+
+            if now >= next_report:
+                if self.overruns != reported_overruns:
+                    logger.warning("Watchdog: %d frame overruns in the last %.0fs (worst %.0f ms)",
+                                   self.overruns - reported_overruns, self.report_interval,
+                                   self.worst_overrun * 1000)
+                    reported_overruns = self.overruns
+                    self.worst_overrun = 0.0
+                next_report = now + self.report_interval
+
+    def _on_stall(self, last, gap):
+        self._stalled_since = last
+        self.stalls += 1
+        metrics.loop_stalls.inc()
+        logger.error("Watchdog: main loop stalled for %.1fs, thread stacks:\n%s", gap, format_thread_stacks())
+        if self.restart:
+            logger.error("Watchdog: exiting for a restart")
+            if self.on_restart:
+                # The stuck main loop never reaches its own cleanup: release pins, flush the
+                # history and unlink shared memory here, so the new process starts clean
+                cleanup = threading.Thread(target=self._cleanup, name="watchdog-cleanup", daemon=True)
+                cleanup.start()
+                cleanup.join(RESTART_CLEANUP_SECONDS)
+                if cleanup.is_alive():
+                    logger.error("Watchdog: cleanup did not finish within %.0fs", RESTART_CLEANUP_SECONDS)
+            logs.shutdown()
+            sys.stdout.flush()
+            sys.stderr.flush()
+            os._exit(RESTART_EXIT_CODE)
+
+    def _cleanup(self):
+        try:
+            self.on_restart()
+        except Exception as e:
+            logger.error("Watchdog: cleanup failed: %s", e)
+
+    def _on_recover(self, duration):
+        self._stalled_since = None
+        self.stall_durations.append(duration)
+        metrics.loop_stall_seconds.observe(duration)
+        logger.warning("Watchdog: main loop recovered after %.1fs", duration)
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Leader/follower sync check on one machine
+Runs a leader and several followers as separate processes on localhost. Each
+follower gets an artificial clock offset, so the offset estimation has to do
+real work; all processes record when the shot digits change on the shared
+monotonic clock, and the flip times are compared against the leader's
+
+Usage:
+    python sync_check.py                           # 3 followers, 20 seconds
+    python sync_check.py --followers 5 --duration 60 --max-skew 5
+"""
+
+import argparse
+import multiprocessing
+import random
+import statistics
+import sys
+import time
+
+import config
+from src.display_sync import SyncFollower, SyncLeader
+from src.game_state import TimerState
+
+POLL = 0.0005  # How often every process looks at its digits
+
+
+def run_leader(args, results, ready):
+    """A running frame with a shot reset every few seconds"""
+    timer_state = TimerState(clock=time.monotonic)
+    leader = SyncLeader(args.group, args.port, interface='127.0.0.1')
+    leader.start()
+    ready.wait()
+    flips = []
+    timer_state.start_frame()
+    last_reset = time.monotonic()
+    shown = None
+    end = last_reset + args.duration
+    while time.monotonic() < end:
+        now = time.monotonic()
+        if now - last_reset >= args.reset_every:
+            timer_state.reset_shot()
+            last_reset = now
+        timer_state.update()
+        leader.publish(timer_state)
+        digits = timer_state.get_shot_time_str()
+        if digits != shown:
+            flips.append((time.monotonic(), digits))
+            shown = digits
+        time.sleep(POLL)
+    leader.stop()
+    results.put(('leader', flips, None))
+
+
+def run_follower(index, skew, args, results, started):
+    """Display loop without the display, recording digit changes"""
+    follower = SyncFollower(args.group, args.port, interface='127.0.0.1',
+                            clock=lambda: time.monotonic() + skew)
+    follower.start()
+    started.release()
+    timer_state = TimerState()
+    flips = []
+    shown = None
+    end = time.monotonic() + args.duration + 1.0
+    while time.monotonic() < end:
+        if follower.apply(timer_state):
+            digits = timer_state.get_shot_time_str()
+            if digits != shown:
+                flips.append((time.monotonic(), digits))
+                shown = digits
+        time.sleep(POLL)
+    follower.stop()
+    results.put((index, flips, {'skew': skew, 'offset': follower.offset, 'delay': follower.delay}))
+
+
+def match_flips(leader_flips, flips, settle):
+    """Time differences of follower flips to the same leader flip, in ms"""
+    start = leader_flips[0][0] + settle
+    differences = []
+    for at, digits in flips:
+        if at < start:
+            continue
+        candidates = [t for t, d in leader_flips if d == digits and abs(t - at) < 0.5]
+        if candidates:
+            nearest = min(candidates, key=lambda t: abs(t - at))
+            differences.append((at - nearest) * 1000)
+    return differences
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Leader/follower sync check on localhost")
+    parser.add_argument('--followers', type=int, default=3)
+    parser.add_argument('--duration', type=float, default=20.0, help="seconds of running frame")
+    parser.add_argument('--reset-every', type=float, default=7.3, help="seconds between shot resets")
+    parser.add_argument('--settle', type=float, default=2.0, help="seconds ignored while followers sync")
+    parser.add_argument('--max-skew', type=float, default=5.0, help="allowed flip difference in ms")
+    parser.add_argument('--group', default=config.SYNC_GROUP)
+    parser.add_argument('--port', type=int, default=random.randint(20000, 40000))
+    args = parser.parse_args()
+
+    results = multiprocessing.Queue()
+    ready = multiprocessing.Event()
+    started = multiprocessing.Semaphore(0)
+    rng = random.Random(1)
+    processes = [multiprocessing.Process(target=run_leader, args=(args, results, ready))]
+    for index in range(args.followers):
+        skew = rng.uniform(-5000, 5000)  # Seconds - unrelated boot times, like separate Pis
+        processes.append(multiprocessing.Process(target=run_follower, args=(index, skew, args, results, started)))
+    for process in processes:
+        process.start()
+    for _ in range(args.followers):
+        started.acquire()
+    ready.set()
+
+    collected = {}
+    for _ in processes:
+        name, flips, info = results.get(timeout=args.duration + 30)
+        collected[name] = (flips, info)
+    for process in processes:
+        process.join()
+
+    leader_flips = collected.pop('leader')[0]
+    print(f"Leader: {len(leader_flips)} digit changes in {args.duration:g}s")
+    print(f"{'follower':<9} {'offset err':>11} {'rtt':>8} {'flips':>6} {'median':>8} {'p95':>8} {'max':>8}")
+    failed = False
+    for index in sorted(collected):
+        flips, info = collected[index]
+        differences = match_flips(leader_flips, flips, args.settle)
+        if info['offset'] is None or not differences:
+            print(f"{index:<9} never synced ({len(flips)} flips, offset {info['offset']})")
+            failed = True
+            continue
+        offset_error = (info['offset'] + info['skew']) * 1e6  # True offset is -skew
+        absolute = sorted(abs(d) for d in differences)
+        p95 = absolute[min(len(absolute) - 1, int(len(absolute) * 0.95))]
+        print(f"{index:<9} {offset_error:9.0f}us {info['delay'] * 1e6:6.0f}us {len(differences):6d} "
+              f"{statistics.median(differences):+7.2f}ms {p95:7.2f}ms {absolute[-1]:7.2f}ms")
+        if absolute[-1] > args.max_skew:
+            failed = True
+
+    if failed:
+        print(f"\nFAIL: followers flip more than {args.max_skew:g} ms apart from the leader")
+        return 1
+    print(f"\nPASS: all followers flip within {args.max_skew:g} ms of the leader")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -7,6 +7,17 @@ Shows actual screen resolution and calculated scale factor
 import pygame
 import sys
 
+# Displays the clock is deployed on (also used by prewarm_assets.py)
+COMMON_RESOLUTIONS = [
+    (800, 480),    # Official 7" Raspberry Pi touchscreen
+    (1024, 600),   # Cheap 7" HDMI panels
+    (1280, 720),   # 720p TVs
+    (1280, 800),   # 10" HDMI panels (config.py default)
+    (1920, 1080),  # Full HD TVs (layout reference)
+    (2560, 1440),
+    (3840, 2160),  # 4K TVs
+]
+
 def test_resolution():
     """Test and display screen resolution"""
     pygame.init()
@@ -44,6 +55,14 @@ def test_resolution():
     print(f"Logo Size:        {logo_size} x {logo_size} px (base: 280)")
     print()
     
+    # Show sizes for the other common displays
+    print("COMMON RESOLUTIONS:")
+    print("-" * 60)
+    for width, height in COMMON_RESOLUTIONS:
+        common_scale = min(width / 1920, height / 1080)
+        print(f"{width:>5} x {height:<5} scale {common_scale:.3f}  logo {int(280 * common_scale)} px")
+    print()
+    
     # Create test window
     print("=" * 60)
     print("Creating test window...")
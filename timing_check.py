@@ -0,0 +1,323 @@
+#!/usr/bin/env python3
+"""
+Timing accuracy check
+Plays a full frame headless against a controllable clock and records when
+things actually happen: shot and frame digit changes (taken from the
+rendered screen), tick and zonk triggers from AudioSystem and LED writes from
+GPIOControl. Compares every channel with the ideal timeline and reports
+error, jitter and drift, failing if any event is off by more than the
+tolerance
+
+Usage:
+    python timing_check.py                        # one 10 minute frame at config.FPS
+    python timing_check.py --fps 60 --jitter-ms 8 # loop stutters up to 8 ms per frame
+    python timing_check.py --stall-ms 400 -o timing.json
+"""
+
+import argparse
+import json
+import math
+import os
+import random
+import statistics
+import sys
+
+# Headless drivers, must be set before pygame initialises
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+
+import pygame
+import config
+from src.game_state import GameState, TimerState, VirtualClock
+
+CHANNELS = ('shot digits', 'frame digits', 'tick', 'zonk', 'leds')
+
+
+class RecordingLED:
+    """Stands in for a gpiozero LED and remembers its state - the pin write
+    itself is the hardware's business, the harness checks when it is issued
+    """
+
+    def __init__(self):
+        self.is_lit = False
+
+    def on(self):
+        self.is_lit = True
+
+    def off(self):
+        self.is_lit = False
+
+
+class Recorder:
+    """Actual event times per channel"""
+
+    def __init__(self, clock):
+        self.clock = clock
+        self.events = {channel: [] for channel in CHANNELS}
+
+    def record(self, channel):
+        self.events[channel].append(self.clock())
+
+    def wrap(self, obj, method, channel):
+        """Record every call of obj.method"""
+        original = getattr(obj, method)
+
+        def recorded(*args, **kwargs):
+            self.record(channel)
+            return original(*args, **kwargs)
+        setattr(obj, method, recorded)
+
+
+class Screen:
+    """Detects changes of the digit areas in the rendered surface"""
+
+    def __init__(self, surface):
+        width, height = surface.get_size()
+        top, bottom = int(height * 0.22), int(height * 0.9)  # Below the buttons, above the hint
+        boundary = int(width * 0.6)
+        self.areas = {
+            'frame digits': surface.subsurface((0, top, boundary, bottom - top)),
+            'shot digits': surface.subsurface((boundary, top, width - boundary, bottom - top)),
+        }
+        self.last = {}
+
+    def changed(self):
+        """Names of the areas whose pixels differ from the last call"""
+        changed = []
+        for name, area in self.areas.items():
+            content = hash(pygame.image.tobytes(area, 'RGB'))
+            if name in self.last and content != self.last[name]:
+                changed.append(name)
+            self.last[name] = content
+        return changed
+
+
+def play_frame(args, clock, timer_state, on_frame):
+    """Start a frame, reset shots at random intervals (some shots expire) until the frame runs out
+
+    Returns:
+        list: (time, shot time limit) of the frame start and every shot reset
+    """
+    rng = random.Random(args.seed)
+    step = 1.0 / args.fps
+    shots = []
+    next_reset = None
+    # Halfway, just before a second flips - the stall delays that flip
+    stall_at = config.FRAME_DURATION / 2 + 0.8 if args.stall_ms else None
+    started = False
+    while True:
+        advance = step + rng.uniform(0, args.jitter_ms / 1000)
+        if stall_at is not None and started and clock() - shots[0][0] >= stall_at:
+            advance += args.stall_ms / 1000
+            stall_at = None
+        clock.advance(advance)
+
+        # Input first, like the main loop
+        if not started and clock() >= 1.0 + clock.start:
+            timer_state.start_frame()
+            started = True
+            shots.append((clock(), timer_state.shot_time_limit))
+            next_reset = clock() + rng.uniform(3, timer_state.shot_time_limit + 4)
+        elif started and timer_state.state == GameState.RUNNING and clock() >= next_reset:
+            timer_state.reset_shot()
+            shots.append((clock(), timer_state.shot_time_limit))
+            next_reset = clock() + rng.uniform(3, timer_state.shot_time_limit + 4)
+
+        timer_state.update()
+        on_frame()
+        if started and timer_state.state == GameState.IDLE:
+            # A few more frames so the last reactions are on record
+            for _ in range(3):
+                clock.advance(step)
+                on_frame()
+            return shots
+
+
+def ideal_timeline(shots, frame_start, period):
+    """When each channel should change, from the reset times alone
+
+    Returns:
+        dict: channel -> list of (time, optional). An event less than one loop
+        period before the next reset is optional - at this loop rate the
+        reset may come first.
+    """
+    frame_end = frame_start + config.FRAME_DURATION
+    ideal = {channel: [] for channel in CHANNELS}
+    ideal['frame digits'] = [(frame_start + k, False) for k in range(int(config.FRAME_DURATION))]
+    ideal['zonk'] = [(frame_end, False)]
+    for index, (start, limit) in enumerate(shots):
+        end = shots[index + 1][0] if index + 1 < len(shots) else frame_end
+        if index:
+            # The reset shows the full time again, unless it still showed it anyway
+            previous_start, previous_limit = shots[index - 1]
+            shown = math.ceil(max(0.0, previous_limit - (start - previous_start)))
+            if shown != limit:
+                ideal['shot digits'].append((start, False))
+            if min(5, shown) != min(5, limit):
+                ideal['leds'].append((start, False))
+        else:
+            ideal['leds'].append((start, False))  # All off while idle
+        for k in range(1, limit + 1):
+            # ceil(remaining) drops to limit - k when remaining reaches it
+            at = start + k
+            if at >= end:
+                break
+            event = (at, at > end - period)
+            ideal['shot digits'].append(event)
+            if limit - k < 5:
+                ideal['leds'].append(event)
+            if 1 <= limit - k <= 5:
+                ideal['tick'].append(event)
+            if limit - k == 0:
+                ideal['zonk'].append(event)
+    # Frame over - LEDs go dark unless the shot had run out already
+    last_start, last_limit = shots[-1]
+    if last_start + last_limit > frame_end:
+        ideal['leds'].append((frame_end, False))
+    ideal['zonk'].sort()
+    return ideal
+
+
+MATCH_WINDOW = 0.5  # Seconds - an event further off than this is counted as missing (and extra)
+
+
+def compare(ideal, actual, tolerance):
+    """Pair ideal and actual events in order and summarise the errors in ms"""
+    report = {}
+    for channel in CHANNELS:
+        expected = ideal[channel]
+        got = actual[channel]
+        matched = []
+        missing = extra = 0
+        j = 0
+        for index, (at, optional) in enumerate(expected):
+            # Skip actual events that belong to nothing
+            while j < len(got) and got[j] < at - MATCH_WINDOW:
+                extra += 1
+                j += 1
+            if j < len(got) and got[j] - at <= MATCH_WINDOW:
+                following = expected[index + 1][0] if index + 1 < len(expected) else None
+                if optional and following is not None and abs(got[j] - following) < abs(got[j] - at):
+                    continue  # The next event came first
+                matched.append((at, (got[j] - at) * 1000))
+                j += 1
+            elif not optional:
+                missing += 1
+        extra += len(got) - j
+        errors = [error for _, error in matched]
+        entry = {'expected': len(expected), 'actual': len(got), 'missing': missing, 'extra': extra,
+                 'over_tolerance': sum(1 for error in errors if abs(error) > tolerance * 1000)}
+        if matched:
+            entry.update({
+                'max_ms': round(max(errors, key=abs), 3),
+                'mean_ms': round(statistics.fmean(errors), 3),
+                'jitter_ms': round(statistics.pstdev(errors), 3),
+                # Error trend over the matched events, ms per minute of frame time
+                'drift_ms_per_min': round(drift([at for at, _ in matched], errors) * 60, 4),
+            })
+        report[channel] = entry
+    return report
+
+
+def drift(times, errors):
+    if len(times) < 2:
+        return 0.0
+    mean_t = statistics.fmean(times)
+    mean_e = statistics.fmean(errors)
+    var = sum((t - mean_t) ** 2 for t in times)
+    return sum((t - mean_t) * (e - mean_e) for t, e in zip(times, errors)) / var if var else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Check display, sound and LED timing against the ideal timeline")
+    parser.add_argument('--fps', type=float, default=config.FPS, help="main loop rate")
+    parser.add_argument('--jitter-ms', type=float, default=0.0, help="random extra delay per loop iteration")
+    parser.add_argument('--stall-ms', type=float, default=0.0, help="one loop stall halfway through the frame")
+    parser.add_argument('--tolerance-ms', type=float, default=None,
+                        help="allowed error per event (default: one frame period + jitter + 5 ms)")
+    parser.add_argument('--resolution', type=lambda s: tuple(map(int, s.split('x'))), default=(800, 480))
+    parser.add_argument('--seed', type=int, default=1)
+    parser.add_argument('-o', '--output', help="write the report as JSON")
+    args = parser.parse_args()
+    tolerance_ms = args.tolerance_ms
+    if tolerance_ms is None:
+        tolerance_ms = 1000 / args.fps + args.jitter_ms + 5
+
+    # Nothing on screen may change but the digits
+    config.SHOW_LED_INDICATORS = False
+    config.SHOW_SHOT_PROGRESS = False
+
+    pygame.display.init()
+    surface = pygame.display.set_mode(args.resolution)
+    clock = VirtualClock(start=1000.0)
+    clock.start = clock.now
+    timer_state = TimerState(clock=clock)
+    recorder = Recorder(clock)
+
+    from src.ui import UI
+    from src.audio import AudioSystem
+    from src.gpio_control import GPIOControl
+    ui = UI(surface)
+    screen = Screen(surface)
+
+    audio = AudioSystem()
+    if not audio.ready:
+        print("audio: mixer unavailable - tick and zonk not checked")
+    recorder.wrap(audio, '_play_tick', 'tick')
+    recorder.wrap(audio, '_play_zonk', 'zonk')
+
+    gpio = GPIOControl(defer_setup=True)
+    gpio.leds = [RecordingLED() for _ in config.LED_PINS]
+    gpio.enabled = True
+    lit = [False] * len(gpio.leds)
+
+    def on_frame():
+        nonlocal lit
+        audio.update(timer_state)
+        gpio.update(timer_state)
+        state = [led.is_lit for led in gpio.leds]
+        if state != lit:
+            recorder.record('leds')
+            lit = state
+        ui.draw(timer_state, flip=False)
+        for name in screen.changed():
+            recorder.record(name)
+
+    ui.draw(timer_state, flip=False)
+    screen.changed()
+    shots = play_frame(args, clock, timer_state, on_frame)
+    pygame.quit()
+
+    ideal = ideal_timeline(shots, shots[0][0], 1.0 / args.fps + args.jitter_ms / 1000)
+    report = compare(ideal, recorder.events, tolerance_ms / 1000)
+    if not audio.ready:
+        del report['tick'], report['zonk']
+
+    print(f"{len(shots) - 1} shot resets, {args.fps:g} fps, jitter {args.jitter_ms:g} ms, "
+          f"stall {args.stall_ms:g} ms, tolerance {tolerance_ms:.1f} ms\n")
+    print(f"{'channel':<14} {'events':>7} {'missing':>8} {'extra':>6} {'late':>5} {'max':>9} {'mean':>9} {'jitter':>8} {'drift/min':>10}")
+    failed = []
+    for channel, entry in report.items():
+        if 'max_ms' in entry:
+            print(f"{channel:<14} {entry['expected']:7d} {entry['missing']:8d} {entry['extra']:6d} "
+                  f"{entry['over_tolerance']:5d} "
+                  f"{entry['max_ms']:7.1f}ms {entry['mean_ms']:7.1f}ms {entry['jitter_ms']:6.1f}ms "
+                  f"{entry['drift_ms_per_min']:8.3f}ms")
+        else:
+            print(f"{channel:<14} {entry['expected']:7d} {entry['missing']:8d} {entry['extra']:6d}")
+        if entry['missing'] or entry['extra'] or entry['over_tolerance']:
+            failed.append(channel)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump({'settings': vars(args), 'tolerance_ms': tolerance_ms, 'channels': report}, f, indent=2)
+        print(f"\nReport written to {args.output}")
+    if failed:
+        print(f"\nFAIL: {', '.join(failed)} off by more than {tolerance_ms:.1f} ms or missing/extra events")
+        return 1
+    print(f"\nPASS: every event within {tolerance_ms:.1f} ms of the ideal timeline")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
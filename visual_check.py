@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""
+Golden-image visual regression check
+Renders UI.draw off-screen for every combination of display resolution,
+timer state, colour theme and overlays (LED indicators, shot progress bar)
+and compares each frame with a stored golden PNG. Small differences from
+anti-aliasing are tolerated; for every frame that differs beyond that a diff
+image marks the changed pixels in red. The matrix is spread over all cores
+with a process pool.
+
+Goldens depend on the pygame/freetype build, so they are created locally
+from a known-good checkout (--update) and not committed.
+
+Usage:
+    python visual_check.py --update                  # create or replace the goldens
+    python visual_check.py                           # compare against them
+    python visual_check.py --filter '800x480-*' --jobs 2
+"""
+
+import argparse
+import concurrent.futures
+import fnmatch
+import itertools
+import os
+import sys
+import time
+
+# Headless drivers, must be set before pygame initialises (inherited by the workers)
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('SDL_AUDIODRIVER', 'dummy')
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+import pygame
+import config
+from src.game_state import GameState, TimerState
+from test_resolution import COMMON_RESOLUTIONS
+
+DEFAULT_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'visual')
+
+STATES = ('idle', 'running', 'warning', 'critical', 'balls_rolling', 'paused', 'shot_expired')
+
+# Colour settings per theme, on top of config.py
+THEMES = {
+    'default': {},
+    'contrast': {
+        'COLOR_BACKGROUND': (0, 0, 0),
+        'COLOR_TEXT': (255, 255, 0),
+        'COLOR_BUTTON': (0, 0, 0),
+        'COLOR_BUTTON_BORDER': (255, 255, 0),
+        'COLOR_WARNING': (255, 160, 0),
+        'COLOR_CRITICAL': (255, 40, 40),
+    },
+}
+
+# Workers render several groups, every theme starts from these
+THEME_DEFAULTS = {key: getattr(config, key) for theme in THEMES.values() for key in theme}
+
+# (name, SHOW_LED_INDICATORS, SHOW_SHOT_PROGRESS)
+OVERLAYS = (
+    ('plain', False, False),
+    ('leds', True, False),
+    ('progress', False, True),
+    ('leds+progress', True, True),
+)
+
+
+def make_timer_state(name):
+    """A TimerState frozen in one of the checked states"""
+    timer_state = TimerState()
+    if name == 'idle':
+        return timer_state
+    timer_state.start_frame()
+    timer_state.last_update = None  # Frozen - draw() does not advance the timers
+    timer_state.frame_time_remaining = 7 * 60 + 42.5
+    timer_state.shot_time_remaining = {
+        'running': 12.5,
+        'warning': config.SHOT_WARNING_TIME - 0.5,
+        'critical': config.SHOT_CRITICAL_TIME - 0.5,
+        'balls_rolling': 15.0,
+        'paused': 9.5,
+        'shot_expired': 0.0,
+    }[name]
+    timer_state.balls_rolling = name == 'balls_rolling'
+    if name == 'paused':
+        timer_state.state = GameState.PAUSED
+    return timer_state
+
+
+def case_name(resolution, theme, overlay, state):
+    return f"{resolution[0]}x{resolution[1]}-{theme}-{overlay}-{state}"
+
+
+def init_worker():
+    # Off-screen surfaces only need the display pixel format
+    pygame.display.init()
+    pygame.display.set_mode((16, 16))
+
+
+def absolute_difference(a, b):
+    """Per-channel |a - b| as a surface"""
+    diff = a.copy()
+    diff.blit(b, (0, 0), special_flags=pygame.BLEND_RGB_SUB)
+    other = b.copy()
+    other.blit(a, (0, 0), special_flags=pygame.BLEND_RGB_SUB)
+    diff.blit(other, (0, 0), special_flags=pygame.BLEND_RGB_ADD)
+    return diff
+
+
+def compare(golden, frame, pixel_threshold):
+    """Count the pixels that visibly differ
+
+    Both images are box-filtered to half size first, so single-pixel
+    anti-aliasing changes average out; what remains and differs in any
+    channel by more than `pixel_threshold` counts.
+
+    Returns:
+        tuple: (differing pixels in the half-size image, their mask at full size)
+    """
+    size = frame.get_size()
+    half = (max(1, size[0] // 2), max(1, size[1] // 2))
+    diff = absolute_difference(pygame.transform.smoothscale(golden, half),
+                               pygame.transform.smoothscale(frame, half))
+    mask = pygame.Surface(half)
+    mask.fill((0, 0, 0))
+    same = pygame.transform.threshold(mask, diff, (0, 0, 0), (pixel_threshold,) * 3 + (255,),
+                                      (255, 0, 0), 1, None, False)
+    return half[0] * half[1] - same, pygame.transform.scale(mask, size)
+
+
+def diff_image(golden, frame, mask):
+    """Golden | frame | frame dimmed with the differing pixels in red"""
+    width, height = frame.get_size()
+    image = pygame.Surface((width * 3, height))
+    image.blit(golden, (0, 0))
+    image.blit(frame, (width, 0))
+    marked = frame.copy()
+    marked.fill((90, 90, 90), special_flags=pygame.BLEND_RGB_MULT)
+    mask.set_colorkey((0, 0, 0))
+    marked.blit(mask, (0, 0))
+    image.blit(marked, (width * 2, 0))
+    return image
+
+
+def check_group(task):
+    """Render all states for one resolution, theme and overlay set
+
+    Returns:
+        list: (case name, status, differing pixels) with status 'pass',
+        'fail', 'missing' or 'updated'
+    """
+    resolution, theme, overlay, args = task
+    overlay_name, leds, progress = overlay
+    for key, value in {**THEME_DEFAULTS, **THEMES[theme]}.items():
+        setattr(config, key, value)
+    config.SHOW_LED_INDICATORS = leds
+    config.SHOW_SHOT_PROGRESS = progress
+
+    from src.ui import UI
+    screen = pygame.Surface(resolution).convert()
+    ui = UI(screen)
+    results = []
+    for state in STATES:
+        name = case_name(resolution, theme, overlay_name, state)
+        if args.filter and not fnmatch.fnmatch(name, args.filter):
+            continue
+        ui.draw(make_timer_state(state), flip=False)
+        golden_path = os.path.join(args.dir, 'golden', name + '.png')
+        diff_path = os.path.join(args.dir, 'diff', name + '.png')
+        if args.update:
+            pygame.image.save(screen, golden_path)
+            results.append((name, 'updated', 0))
+            continue
+        if not os.path.exists(golden_path):
+            results.append((name, 'missing', 0))
+            continue
+        golden = pygame.image.load(golden_path).convert()
+        if golden.get_size() != screen.get_size():
+            results.append((name, 'fail', resolution[0] * resolution[1]))
+            continue
+        changed, mask = compare(golden, screen, args.pixel_threshold)
+        half_pixels = (resolution[0] // 2) * (resolution[1] // 2)
+        if changed > args.max_diff * half_pixels:
+            pygame.image.save(diff_image(golden, screen, mask), diff_path)
+            results.append((name, 'fail', changed))
+        else:
+            if os.path.exists(diff_path):
+                os.remove(diff_path)
+            results.append((name, 'pass', changed))
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Compare rendered frames with golden images")
+    parser.add_argument('--update', action='store_true', help="write the current frames as new goldens")
+    parser.add_argument('--dir', default=DEFAULT_DIR, help="directory with golden/ and diff/ (default: ./visual)")
+    parser.add_argument('--filter', help="only cases matching this pattern, e.g. '1920x1080-*-critical'")
+    parser.add_argument('--jobs', type=int, default=os.cpu_count(), help="worker processes")
+    parser.add_argument('--pixel-threshold', type=int, default=24,
+                        help="channel difference (0-255) a pixel needs to count as changed")
+    parser.add_argument('--max-diff', type=float, default=0.0005,
+                        help="allowed fraction of changed pixels per frame")
+    args = parser.parse_args()
+    os.makedirs(os.path.join(args.dir, 'golden'), exist_ok=True)
+    os.makedirs(os.path.join(args.dir, 'diff'), exist_ok=True)
+
+    # Largest frames first, so no worker is left with a 4K group at the end
+    resolutions = sorted(COMMON_RESOLUTIONS, key=lambda r: r[0] * r[1], reverse=True)
+    tasks = [(resolution, theme, overlay, args)
+             for resolution, theme, overlay in itertools.product(resolutions, THEMES, OVERLAYS)]
+    started = time.perf_counter()
+    with concurrent.futures.ProcessPoolExecutor(max_workers=args.jobs, initializer=init_worker) as pool:
+        results = [result for group in pool.map(check_group, tasks) for result in group]
+    wall = time.perf_counter() - started
+
+    counts = {status: sum(1 for _, s, _ in results if s == status) for status in ('pass', 'fail', 'missing', 'updated')}
+    for name, status, changed in sorted(results):
+        if status == 'fail':
+            print(f"FAIL     {name}  ({changed} pixels changed, see diff/{name}.png)")
+        elif status == 'missing':
+            print(f"MISSING  {name}")
+    print(f"\n{len(results)} frames in {wall:.1f}s with {args.jobs} workers: "
+          + ', '.join(f"{count} {status}" for status, count in counts.items() if count))
+    if args.update:
+        print(f"Goldens written to {os.path.join(args.dir, 'golden')}")
+        return 0
+    if counts['fail'] or counts['missing']:
+        if counts['missing']:
+            print("Missing goldens - create them from a known-good checkout with --update")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())